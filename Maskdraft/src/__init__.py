@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# project/shared im Repository enthält den Code, den Dashboard, API und Build gemeinsam nutzen
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "project"))
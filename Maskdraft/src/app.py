@@ -1,22 +1,29 @@
 import dash
 from dash import dcc, html, Output, Input
 import dash_bootstrap_components as dbc
-from src.config import EXTERNAL_STYLESHEETS, APP_TITLE, MOCK_DATA_DIR
+from src.config import EXTERNAL_STYLESHEETS, APP_TITLE, SNAPSHOT_DIR, DB_FILE, LAYOUT_CACHE_SIZE
 from src.data.data_loader import load_all_data
 from src.layouts.navbar import get_navbar
 from src.layouts.pages import (
     start_page, topkunden_page, bestellwert_page, kundenkarte_page,
     reichweite_page, beliebte_produkte_page, umsatz_produkt_page,
-    launchperformance_page, korrelation_page, durchschnitt_page
+    launchperformance_page, korrelation_page, durchschnitt_page, zuordnung_page,
+    whitespots_page, standorte_page, wachstum_page, kombikauf_page,
+    trend_saisonal_page, trend_wachstum_page, trend_spitzenzeiten_page, trend_fruehwarnung_page
 )
 from src.layouts.components import with_back_button
+from src.layouts.registry import LayoutRegistry
 from src.callbacks.kundenanalyse import register_callbacks as register_kunden_callbacks
 from src.callbacks.filialanalyse import register_callbacks as register_filial_callbacks
 from src.callbacks.produktanalyse import register_callbacks as register_produkt_callbacks
 from src.callbacks.bestellanalyse import register_callbacks as register_bestell_callbacks
+from src.callbacks.geoanalyse import register_callbacks as register_geo_callbacks
+from src.callbacks.startseite import register_callbacks as register_start_callbacks
+from src.callbacks.trendanalyse import register_callbacks as register_trend_callbacks
 
-# Daten laden
-data = load_all_data(MOCK_DATA_DIR)
+# Daten laden; Würfel und Indizes entstehen erst beim ersten Zugriff
+data = load_all_data(SNAPSHOT_DIR, DB_FILE)
+aggregates = data["aggregates"]
 
 # Dash-App initialisieren
 app = dash.Dash(
@@ -26,103 +33,46 @@ app = dash.Dash(
 app.title = APP_TITLE
 app.config.suppress_callback_exceptions = True
 
-# Layouts definieren
-layouts = {
-    "/": start_page(),
-    "/kundenanalyse/topkunden": with_back_button(topkunden_page()),
-    "/kundenanalyse/bestellwert": with_back_button(bestellwert_page(data["orders_df"])),
-    "/kundenanalyse/karte": with_back_button(kundenkarte_page()),
-    "/kundenanalyse/mehrfach": with_back_button(html.Div([
-        html.H2("Wiederkehrende Kunden", className="text-center mb-4"),
+def platzhalter(titel):
+    return lambda: with_back_button(html.Div([
+        html.H2(titel, className="text-center mb-4"),
         html.P("Diese Seite ist noch nicht implementiert.", className="text-center text-light")
-    ])),
-    "/kundenanalyse/dichte": with_back_button(html.Div([
-        html.H2("Kundendichte", className="text-center mb-4"),
-        html.P("Diese Seite ist noch nicht implementiert.", className="text-center text-light")
-    ])),
-    "/filialanalyse/kundenreichweite": with_back_button(reichweite_page(data["stores_df"])),
-    "/filialanalyse/distanz": with_back_button(html.Div([
-        html.H2("Ø Distanz", className="text-center mb-4"),
-        html.P("Diese Seite ist noch nicht implementiert.", className="text-center text-light")
-    ])),
-    "/filialanalyse/produkte": with_back_button(html.Div([
-        html.H2("Produktverkäufe", className="text-center mb-4"),
-        html.P("Diese Seite ist noch nicht implementiert.", className="text-center text-light")
-    ])),
-    "/filialanalyse/umsatz": with_back_button(html.Div([
-        html.H2("Umsatz", className="text-center mb-4"),
-        html.P("Diese Seite ist noch nicht implementiert.", className="text-center text-light")
-    ])),
-    "/filialanalyse/zeitverlauf": with_back_button(html.Div([
-        html.H2("Umsatz Zeitverlauf", className="text-center mb-4"),
-        html.P("Diese Seite ist noch nicht implementiert.", className="text-center text-light")
-    ])),
-    "/filialanalyse/staat": with_back_button(html.Div([
-        html.H2("Umsatz nach Staat", className="text-center mb-4"),
-        html.P("Diese Seite ist noch nicht implementiert.", className="text-center text-light")
-    ])),
-    "/produktanalyse/beliebt": with_back_button(beliebte_produkte_page()),
-    "/produktanalyse/umsatz": with_back_button(umsatz_produkt_page()),
-    "/produktanalyse/launchperformance": with_back_button(launchperformance_page(data["products_df"])),
-    "/produktanalyse/korrelation": with_back_button(korrelation_page()),
-    "/produktanalyse/preise": with_back_button(html.Div([
-        html.H2("Ø Preis", className="text-center mb-4"),
-        html.P("Diese Seite ist noch nicht implementiert.", className="text-center text-light")
-    ])),
-    "/bestellanalyse/durchschnitt": with_back_button(durchschnitt_page(data["orders_df"])),
-    "/bestellanalyse/zeitverlauf": with_back_button(html.Div([
-        html.H2("Umsatz Zeitverlauf", className="text-center mb-4"),
-        html.P("Diese Seite ist noch nicht implementiert.", className="text-center text-light")
-    ])),
-    "/bestellanalyse/volatil": with_back_button(html.Div([
-        html.H2("Hohe Volatilität", className="text-center mb-4"),
-        html.P("Diese Seite ist noch nicht implementiert.", className="text-center text-light")
-    ])),
-    "/bestellanalyse/artikelanzahl": with_back_button(html.Div([
-        html.H2("Ø Artikelanzahl", className="text-center mb-4"),
-        html.P("Diese Seite ist noch nicht implementiert.", className="text-center text-light")
-    ])),
-    "/bestellanalyse/kombikauf": with_back_button(html.Div([
-        html.H2("Kombikauf", className="text-center mb-4"),
-        html.P("Diese Seite ist noch nicht implementiert.", className="text-center text-light")
-    ])),
-    "/geografisch/distanz": with_back_button(html.Div([
-        html.H2("Ø Distanz", className="text-center mb-4"),
-        html.P("Diese Seite ist noch nicht implementiert.", className="text-center text-light")
-    ])),
-    "/geografisch/standorte": with_back_button(html.Div([
-        html.H2("Neue Standorte", className="text-center mb-4"),
-        html.P("Diese Seite ist noch nicht implementiert.", className="text-center text-light")
-    ])),
-    "/geografisch/zuordnung": with_back_button(html.Div([
-        html.H2("Kunden-Zuordnung", className="text-center mb-4"),
-        html.P("Diese Seite ist noch nicht implementiert.", className="text-center text-light")
-    ])),
-    "/geografisch/whitespots": with_back_button(html.Div([
-        html.H2("White-Spot-Analyse", className="text-center mb-4"),
-        html.P("Diese Seite ist noch nicht implementiert.", className="text-center text-light")
-    ])),
-    "/geografisch/wachstum": with_back_button(html.Div([
-        html.H2("Wachstumsgebiete", className="text-center mb-4"),
-        html.P("Diese Seite ist noch nicht implementiert.", className="text-center text-light")
-    ])),
-    "/trends/saisonal": with_back_button(html.Div([
-        html.H2("Saisonale Trends", className="text-center mb-4"),
-        html.P("Diese Seite ist noch nicht implementiert.", className="text-center text-light")
-    ])),
-    "/trends/wachstum": with_back_button(html.Div([
-        html.H2("Wachstum", className="text-center mb-4"),
-        html.P("Diese Seite ist noch nicht implementiert.", className="text-center text-light")
-    ])),
-    "/trends/spitzenzeiten": with_back_button(html.Div([
-        html.H2("Spitzenzeiten", className="text-center mb-4"),
-        html.P("Diese Seite ist noch nicht implementiert.", className="text-center text-light")
-    ])),
-    "/trends/fruehwarnung": with_back_button(html.Div([
-        html.H2("Frühwarnsystem", className="text-center mb-4"),
-        html.P("Diese Seite ist noch nicht implementiert.", className="text-center text-light")
-    ])),
-}
+    ]))
+
+# Seitenlayouts werden erst beim ersten Besuch gebaut
+layouts = LayoutRegistry({
+    "/": lambda: start_page(data["stores_df"], aggregates.store_kpis()),
+    "/kundenanalyse/topkunden": lambda: with_back_button(topkunden_page()),
+    "/kundenanalyse/bestellwert": lambda: with_back_button(bestellwert_page()),
+    "/kundenanalyse/karte": lambda: with_back_button(kundenkarte_page()),
+    "/kundenanalyse/mehrfach": platzhalter("Wiederkehrende Kunden"),
+    "/kundenanalyse/dichte": platzhalter("Kundendichte"),
+    "/filialanalyse/kundenreichweite": lambda: with_back_button(reichweite_page(data["stores_df"])),
+    "/filialanalyse/distanz": platzhalter("Ø Distanz"),
+    "/filialanalyse/produkte": platzhalter("Produktverkäufe"),
+    "/filialanalyse/umsatz": platzhalter("Umsatz"),
+    "/filialanalyse/zeitverlauf": platzhalter("Umsatz Zeitverlauf"),
+    "/filialanalyse/staat": platzhalter("Umsatz nach Staat"),
+    "/produktanalyse/beliebt": lambda: with_back_button(beliebte_produkte_page()),
+    "/produktanalyse/umsatz": lambda: with_back_button(umsatz_produkt_page()),
+    "/produktanalyse/launchperformance": lambda: with_back_button(launchperformance_page(data["products_df"])),
+    "/produktanalyse/korrelation": lambda: with_back_button(korrelation_page()),
+    "/produktanalyse/preise": platzhalter("Ø Preis"),
+    "/bestellanalyse/durchschnitt": lambda: with_back_button(durchschnitt_page()),
+    "/bestellanalyse/zeitverlauf": platzhalter("Umsatz Zeitverlauf"),
+    "/bestellanalyse/volatil": platzhalter("Hohe Volatilität"),
+    "/bestellanalyse/artikelanzahl": platzhalter("Ø Artikelanzahl"),
+    "/bestellanalyse/kombikauf": lambda: with_back_button(kombikauf_page()),
+    "/geografisch/distanz": platzhalter("Ø Distanz"),
+    "/geografisch/standorte": lambda: with_back_button(standorte_page()),
+    "/geografisch/zuordnung": lambda: with_back_button(zuordnung_page()),
+    "/geografisch/whitespots": lambda: with_back_button(whitespots_page()),
+    "/geografisch/wachstum": lambda: with_back_button(wachstum_page()),
+    "/trends/saisonal": lambda: with_back_button(trend_saisonal_page(aggregates.trend_cube(), data["stores_df"])),
+    "/trends/wachstum": lambda: with_back_button(trend_wachstum_page(aggregates.trend_cube(), data["stores_df"])),
+    "/trends/spitzenzeiten": lambda: with_back_button(trend_spitzenzeiten_page(aggregates.trend_cube(), data["stores_df"])),
+    "/trends/fruehwarnung": lambda: with_back_button(trend_fruehwarnung_page(aggregates.trend_cube())),
+}, max_pages=LAYOUT_CACHE_SIZE)
 
 app.layout = html.Div([
     dcc.Location(id="url"),
@@ -145,6 +95,9 @@ register_kunden_callbacks(app, data)
 register_filial_callbacks(app, data)
 register_produkt_callbacks(app, data)
 register_bestell_callbacks(app, data)
+register_geo_callbacks(app, data)
+register_start_callbacks(app, data)
+register_trend_callbacks(app, data)
 
 if __name__ == "__main__":
     app.run(debug=True)
\ No newline at end of file
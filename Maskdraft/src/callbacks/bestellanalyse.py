@@ -1,20 +1,31 @@
 from dash.dependencies import Input, Output
 import plotly.express as px
 import pandas as pd
+from shared.basket import association_rules
+from src.utils.table_page import table_page
+
+# Balken im Kombikauf-Diagramm
+KOMBIKAUF_TOP_N = 20
 
 def register_callbacks(app, data):
-    orders_df = data["orders_df"]
+    aggregates = data["aggregates"]
+    product_names = data["products_df"].drop_duplicates("SKU").set_index("SKU")["Name"]
+
+    def label(baskets, mask):
+        return " + ".join(product_names.get(sku, sku) for sku in baskets.decode(mask))
+
+    def bestellwerte():
+        df = aggregates.customer_stats()["mean"].round(2).reset_index()
+        df.columns = ["Kunde", "Ø Bestellwert"]
+        return df
 
     @app.callback(
-        [Output("durchschnitt-tabelle", "data"),
-         Output("durchschnitt-tabelle", "columns"),
+        [Output("durchschnitt-tabelle", "columns"),
          Output("durchschnitt-plot", "figure")],
         Input("kunde-auswahl", "value")
     )
     def update_durchschnitt(selected_customer):
-        df = orders_df.groupby("customerID")["total"].mean().reset_index()
-        df.columns = ["Kunde", "Ø Bestellwert"]
-        df["Ø Bestellwert"] = df["Ø Bestellwert"].round(2)
+        df = bestellwerte()
         columns = [{"name": col, "id": col} for col in df.columns]
         fig_data = df
         if selected_customer:
@@ -28,4 +39,54 @@ def register_callbacks(app, data):
             height=400
         )
         fig.update_layout(plot_bgcolor="#2d2d2d", paper_bgcolor="#2d2d2d", font_color="white")
-        return (df.to_dict("records"), columns, fig)
\ No newline at end of file
+        return (columns, fig)
+
+    @app.callback(
+        [Output("durchschnitt-tabelle", "data"),
+         Output("durchschnitt-tabelle", "page_count")],
+        [Input("durchschnitt-tabelle", "page_current"),
+         Input("durchschnitt-tabelle", "page_size"),
+         Input("durchschnitt-tabelle", "sort_by")]
+    )
+    def update_durchschnitt_seite(page_current, page_size, sort_by):
+        return table_page(bestellwerte(), page_current, page_size, sort_by)
+
+    @app.callback(
+        [Output("kombikauf-plot", "figure"),
+         Output("kombikauf-tabelle", "data"),
+         Output("kombikauf-tabelle", "columns")],
+        [Input("kombikauf-support", "value"),
+         Input("kombikauf-groesse", "value")]
+    )
+    def update_kombikauf(support_percent, max_size):
+        baskets = aggregates.baskets()
+        frequent = aggregates.frequent_itemsets(round(support_percent / 100, 4), max_size)
+        combos = sorted(((count, mask) for mask, count in frequent.items() if mask & (mask - 1)),
+                        key=lambda item: (-item[0], item[1]))[:KOMBIKAUF_TOP_N]
+        combos_df = pd.DataFrame({
+            "Kombination": [label(baskets, mask) for _, mask in combos],
+            "Bestellungen": [count for count, _ in combos],
+        })
+        fig = px.bar(
+            combos_df,
+            x="Bestellungen",
+            y="Kombination",
+            orientation="h",
+            title="Häufigste Produktkombinationen",
+            height=600
+        )
+        fig.update_layout(plot_bgcolor="#2d2d2d", paper_bgcolor="#2d2d2d", font_color="white",
+                          yaxis={"autorange": "reversed"})
+
+        rules = pd.DataFrame(association_rules(frequent, baskets.n_orders),
+                             columns=["antecedent", "consequent", "support", "confidence", "lift"])
+        rules = rules.sort_values("lift", ascending=False).head(100)
+        table = pd.DataFrame({
+            "Wer kauft": [label(baskets, mask) for mask in rules["antecedent"]],
+            "kauft auch": [label(baskets, mask) for mask in rules["consequent"]],
+            "Support (%)": (rules["support"] * 100).round(2),
+            "Konfidenz (%)": (rules["confidence"] * 100).round(1),
+            "Lift": rules["lift"].round(3),
+        })
+        columns = [{"name": col, "id": col} for col in table.columns]
+        return fig, table.to_dict("records"), columns
@@ -1,11 +1,12 @@
 from dash.dependencies import Input, Output
 import plotly.express as px
 import plotly.graph_objects as go
-from src.utils.helpers import haversine
+import numpy as np
 
 def register_callbacks(app, data):
     stores_df = data["stores_df"]
     customers_df = data["customers_df"]
+    aggregates = data["aggregates"]
 
     @app.callback(
         Output("reichweite-karte", "figure"),
@@ -16,12 +17,13 @@ def register_callbacks(app, data):
             return go.Figure()
         filiale = stores_df[stores_df["storeID"] == filial_id].iloc[0]
         radius_km = 50
-        customers_df["distance"] = customers_df.apply(
-            lambda row: haversine(filiale["latitude"], filiale["longitude"], row["latitude"], row["longitude"]), axis=1
-        )
-        customers_df["in_range"] = customers_df["distance"] <= radius_km
+        in_range_idx, _ = aggregates.spatial_index().within_radius(filial_id, radius_km)
+        in_range = np.zeros(len(customers_df), dtype=bool)
+        in_range[in_range_idx] = True
+        # Nur eine Kopie für den Plot erweitern, customers_df wird von allen Callbacks geteilt
+        plot_df = customers_df.assign(in_range=in_range)
         fig = px.scatter_mapbox(
-            customers_df,
+            plot_df,
             lat="latitude",
             lon="longitude",
             color="in_range",
@@ -0,0 +1,119 @@
+from dash.dependencies import Input, Output
+import plotly.express as px
+import plotly.graph_objects as go
+import pandas as pd
+from shared.whitespots import candidate_sites, growth_cells, whitespot_cells
+
+# Zeilen in den Tabellen der Rasterseiten
+RASTER_TOP_N = 50
+
+
+def _raster_karte(cells, color, size, hover_data, stores_df=None):
+    fig = px.scatter_mapbox(
+        cells,
+        lat="latitude",
+        lon="longitude",
+        color=color,
+        size=size,
+        hover_data=hover_data,
+        color_continuous_scale="OrRd",
+        zoom=4,
+        height=600
+    )
+    if stores_df is not None:
+        fig.add_trace(go.Scattermapbox(lat=stores_df["latitude"], lon=stores_df["longitude"], mode="markers",
+                                       marker={"size": 10, "color": "#1f77b4"}, name="Filialen",
+                                       text=stores_df["storeID"]))
+    fig.update_layout(mapbox_style="open-street-map", plot_bgcolor="#2d2d2d", paper_bgcolor="#2d2d2d", font_color="white")
+    return fig
+
+
+def _raster_tabelle(cells, names):
+    table = cells.head(RASTER_TOP_N).rename(columns=names).round(2)
+    return table.to_dict("records"), [{"name": col, "id": col} for col in table.columns]
+
+def register_callbacks(app, data):
+    stores_df = data["stores_df"]
+    aggregates = data["aggregates"]
+
+    @app.callback(
+        [Output("zuordnung-karte", "figure"),
+         Output("zuordnung-tabelle", "data"),
+         Output("zuordnung-tabelle", "columns"),
+         Output("kpi-zuordnung-distanz", "children")],
+        Input("page-content", "children")
+    )
+    def update_zuordnung(_):
+        # Die Zuordnung wird einmal pro Datenstand berechnet, hier nur noch dargestellt
+        assignments_df = aggregates.assignments()
+        summary = assignments_df.groupby("storeID")["distance_km"].agg(["size", "mean", "max"]).reset_index()
+        summary = summary.merge(stores_df[["storeID", "city", "state"]], on="storeID")
+        summary.columns = ["Filiale", "Kunden", "Ø Distanz (km)", "Max. Distanz (km)", "Stadt", "Staat"]
+        summary = summary.round(2).sort_values("Kunden", ascending=False)
+        columns = [{"name": col, "id": col} for col in ["Filiale", "Stadt", "Staat", "Kunden", "Ø Distanz (km)", "Max. Distanz (km)"]]
+        fig = px.scatter_mapbox(
+            assignments_df,
+            lat="latitude",
+            lon="longitude",
+            color="storeID",
+            hover_name="customerID",
+            hover_data={"distance_km": ":.1f"},
+            zoom=5,
+            height=600
+        )
+        fig.update_layout(mapbox_style="open-street-map", plot_bgcolor="#2d2d2d", paper_bgcolor="#2d2d2d", font_color="white")
+        return (fig, summary.to_dict("records"), columns, f"{assignments_df['distance_km'].mean():.2f} km")
+
+    @app.callback(
+        [Output("whitespots-karte", "figure"),
+         Output("whitespots-tabelle", "data"),
+         Output("whitespots-tabelle", "columns")],
+        Input("whitespots-raster", "value")
+    )
+    def update_whitespots(cell_km):
+        spatial_index = aggregates.spatial_index()
+        cells = pd.DataFrame(whitespot_cells(spatial_index.customers.lats, spatial_index.customers.lons,
+                                             spatial_index.store_lats, spatial_index.store_lons, cell_km))
+        fig = _raster_karte(cells, "distance_km", "customers", {"score": ":.0f"}, stores_df)
+        data, columns = _raster_tabelle(cells, {
+            "latitude": "Lat", "longitude": "Lon", "customers": "Kunden",
+            "distance_km": "Distanz zur Filiale (km)", "score": "Kunden x km"
+        })
+        return fig, data, columns
+
+    @app.callback(
+        [Output("standorte-karte", "figure"),
+         Output("standorte-tabelle", "data"),
+         Output("standorte-tabelle", "columns")],
+        [Input("standorte-raster", "value"),
+         Input("standorte-anzahl", "value")]
+    )
+    def update_standorte(cell_km, n_sites):
+        spatial_index = aggregates.spatial_index()
+        sites = pd.DataFrame(candidate_sites(spatial_index.customers.lats, spatial_index.customers.lons,
+                                             spatial_index.store_lats, spatial_index.store_lons, cell_km, n_sites),
+                             columns=["latitude", "longitude", "customers_served", "distance_saved_km"])
+        sites.insert(0, "rank", range(1, len(sites) + 1))
+        fig = _raster_karte(sites, "distance_saved_km", "customers_served", {"rank": True}, stores_df)
+        data, columns = _raster_tabelle(sites, {
+            "rank": "Rang", "latitude": "Lat", "longitude": "Lon",
+            "customers_served": "Kunden mit kürzerem Weg", "distance_saved_km": "Eingesparte km"
+        })
+        return fig, data, columns
+
+    @app.callback(
+        [Output("wachstum-karte", "figure"),
+         Output("wachstum-tabelle", "data"),
+         Output("wachstum-tabelle", "columns")],
+        Input("wachstum-raster", "value")
+    )
+    def update_wachstum(cell_km):
+        spatial_index = aggregates.spatial_index()
+        cells = pd.DataFrame(growth_cells(spatial_index.customers.lats, spatial_index.customers.lons,
+                                          aggregates.customer_orders(), cell_km))
+        fig = _raster_karte(cells, "missing_orders", "customers", {"orders_per_customer": ":.2f"}, stores_df)
+        data, columns = _raster_tabelle(cells, {
+            "latitude": "Lat", "longitude": "Lon", "customers": "Kunden",
+            "orders_per_customer": "Bestellungen pro Kunde", "missing_orders": "Fehlende Bestellungen"
+        })
+        return fig, data, columns
@@ -1,10 +1,29 @@
-from dash.dependencies import Input, Output
+from dash.dependencies import Input, Output, State
+from dash.exceptions import PreventUpdate
 import plotly.express as px
 import pandas as pd
+from src.utils.table_page import table_page
 
 def register_callbacks(app, data):
     orders_df = data["orders_df"]
     customers_df = data["customers_df"]
+    aggregates = data["aggregates"]
+
+    # Gilt für beide Seiten mit "kunde-auswahl" (Bestellwert und Ø Bestellwert):
+    # statt aller Kunden nur die Treffer zur aktuellen Eingabe ausliefern
+    @app.callback(
+        Output("kunde-auswahl", "options"),
+        Input("kunde-auswahl", "search_value"),
+        State("kunde-auswahl", "value")
+    )
+    def update_kunden_optionen(search_value, selected_customer):
+        if not search_value and not selected_customer:
+            raise PreventUpdate
+        matches = aggregates.customer_search().search(search_value) if search_value else []
+        # Die aktuelle Auswahl muss unter den Optionen bleiben, sonst verschwindet sie
+        if selected_customer and selected_customer not in matches:
+            matches = [selected_customer] + matches
+        return [{"label": cid, "value": cid} for cid in matches]
 
     @app.callback(
         [Output("topkunden-tabelle", "data"),
@@ -15,7 +34,7 @@ def register_callbacks(app, data):
         Input("page-content", "children")
     )
     def update_topkunden(_):
-        top_customers = orders_df.groupby("customerID").size().sort_values(ascending=False).head(10).reset_index()
+        top_customers = aggregates.customer_stats()["count"].nlargest(10).reset_index()
         top_customers.columns = ["Kunde", "Anzahl Bestellungen"]
         columns = [{"name": col, "id": col} for col in top_customers.columns]
         fig = px.bar(
@@ -29,18 +48,21 @@ def register_callbacks(app, data):
         fig.update_layout(plot_bgcolor="#2d2d2d", paper_bgcolor="#2d2d2d", font_color="white")
         return (top_customers.to_dict("records"), columns, fig, len(orders_df), top_customers["Anzahl Bestellungen"].iloc[0])
 
+    def bestellwerte():
+        df = aggregates.customer_stats()["mean"].round(2).reset_index()
+        df.columns = ["Kunde", "Ø Bestellwert"]
+        return df
+
     @app.callback(
-        [Output("bestellwert-tabelle", "data"),
-         Output("bestellwert-tabelle", "columns"),
+        [Output("bestellwert-tabelle", "columns"),
          Output("bestellwert-plot", "figure"),
          Output("kpi-gesamt-durchschnitt", "children"),
          Output("kpi-kunden-durchschnitt", "children")],
         [Input("kunde-auswahl", "value")]
     )
     def update_bestellwert(selected_customer):
-        df = orders_df.groupby("customerID")["total"].mean().reset_index()
-        df.columns = ["Kunde", "Ø Bestellwert"]
-        df["Ø Bestellwert"] = df["Ø Bestellwert"].round(2)
+        stats = aggregates.customer_stats()
+        df = bestellwerte()
         columns = [{"name": col, "id": col} for col in df.columns]
         fig = px.bar(
             df,
@@ -54,9 +76,20 @@ def register_callbacks(app, data):
         gesamt = f"{orders_df['total'].mean():.2f} €"
         kunden_durchschnitt = "Wähle einen Kunden"
         if selected_customer:
-            df_selected = orders_df[orders_df["customerID"] == selected_customer]
-            kunden_durchschnitt = f"{df_selected['total'].mean():.2f} €" if not df_selected.empty else "Keine Daten"
-        return (df.to_dict("records"), columns, fig, gesamt, kunden_durchschnitt)
+            kunden_durchschnitt = (f"{stats.at[selected_customer, 'mean']:.2f} €"
+                                   if selected_customer in stats.index else "Keine Daten")
+        return (columns, fig, gesamt, kunden_durchschnitt)
+
+    @app.callback(
+        [Output("bestellwert-tabelle", "data"),
+         Output("bestellwert-tabelle", "page_count")],
+        [Input("bestellwert-tabelle", "page_current"),
+         Input("bestellwert-tabelle", "page_size"),
+         Input("bestellwert-tabelle", "sort_by"),
+         Input("bestellwert-tabelle", "filter_query")]
+    )
+    def update_bestellwert_seite(page_current, page_size, sort_by, filter_query):
+        return table_page(bestellwerte(), page_current, page_size, sort_by, filter_query)
 
     @app.callback(
         Output("kundenkarte", "figure"),
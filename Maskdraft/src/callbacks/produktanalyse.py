@@ -1,11 +1,16 @@
 from dash.dependencies import Input, Output
+import numpy as np
 import plotly.express as px
+import plotly.graph_objects as go
 import pandas as pd
 
 def register_callbacks(app, data):
     orderitems_df = data["orderitems_df"]
     products_df = data["products_df"]
     orders_df = data["orders_df"]
+    aggregates = data["aggregates"]
+    unique_products = products_df.drop_duplicates("SKU").set_index("SKU")
+    product_labels = unique_products["Name"] + " (" + unique_products["Size"] + ")"
 
     @app.callback(
         [Output("beliebteste-produkte-tabelle", "data"),
@@ -61,28 +66,17 @@ def register_callbacks(app, data):
     def update_launchperformance(selected_products, time_unit):
         if not selected_products:
             return px.line(title="Bitte Produkte auswählen")
-        merged = orderitems_df.merge(orders_df, on="orderID").merge(products_df, on="SKU")
-        merged["orderDate"] = pd.to_datetime(merged["orderDate"])
-        merged = merged[merged["SKU"].isin(selected_products)]
-        merged["Umsatz"] = merged["Price"] * merged["quantity"]
-        merged["Produkt"] = merged["Name"] + " (" + merged["Size"] + ")"
-        if time_unit == "D":
-            merged["Zeit"] = merged["orderDate"].dt.date
-        elif time_unit == "M":
-            merged["Zeit"] = merged["orderDate"].dt.to_period("M").dt.to_timestamp()
-        elif time_unit == "Y":
-            merged["Zeit"] = merged["orderDate"].dt.to_period("Y").dt.to_timestamp()
-        grouped = merged.groupby(["Zeit", "Produkt"]).agg({"Umsatz": "sum"}).reset_index()
-        fig = px.line(
-            grouped,
-            x="Zeit",
-            y="Umsatz",
-            color="Produkt",
-            markers=True,
-            title="Produktumsatz über Zeit",
-            height=600
-        )
-        fig.update_layout(plot_bgcolor="#2d2d2d", paper_bgcolor="#2d2d2d", font_color="white")
+        # Nur noch Zeilen des vorberechneten Würfels auswählen; eine Linie pro
+        # SKU direkt aus der Matrixzeile, ohne Umweg über eine lange Tabelle
+        periods, values, skus = aggregates.sales_cube().revenue_series(selected_products, time_unit)
+        fig = go.Figure([
+            go.Scatter(x=periods[~np.isnan(row)], y=row[~np.isnan(row)], mode="lines+markers",
+                       name=product_labels.get(sku, sku))
+            for sku, row in zip(skus, values)
+        ])
+        fig.update_layout(title="Produktumsatz über Zeit", height=600, xaxis_title="Zeit", yaxis_title="Umsatz",
+                          legend_title_text="Produkt", plot_bgcolor="#2d2d2d", paper_bgcolor="#2d2d2d",
+                          font_color="white")
         return fig
 
     @app.callback(
@@ -90,7 +84,7 @@ def register_callbacks(app, data):
         Input("page-content", "children")
     )
     def update_korrelation(_):
-        sales = orderitems_df.groupby("SKU")["quantity"].sum().reset_index()
+        sales = orderitems_df.groupby("SKU", observed=True)["quantity"].sum().reset_index()
         merged = pd.merge(sales, products_df, on="SKU")
         merged["Produkt"] = merged["Name"] + " (" + merged["Size"] + ")"
         fig = px.scatter(
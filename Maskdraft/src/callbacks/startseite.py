@@ -0,0 +1,41 @@
+from dash.dependencies import Input, Output
+from dash.exceptions import PreventUpdate
+from src.layouts.pages import START_KPIS
+
+# Kartenname -> (Kennzahl in StoreKpis, Format)
+KPI_FORMATE = {
+    "umsatz": ("revenue", "{:,.2f} €"),
+    "bestellungen": ("orders", "{:,.0f}"),
+    "bestellwert": ("avg_order_value", "{:.2f} €"),
+    "artikel": ("avg_items", "{:.2f}"),
+    "neukunden": ("new_customers", "{:,.0f}"),
+}
+
+def _veraenderung(aktuell, vorher):
+    if aktuell is None or not vorher:
+        return "keine Vergleichsdaten"
+    return f"{(aktuell - vorher) / vorher * 100:+.1f} % ggü. Vorperiode"
+
+def register_callbacks(app, data):
+    aggregates = data["aggregates"]
+
+    # Alle Karten kommen aus einem Callback und damit aus einem Request
+    @app.callback(
+        [Output(f"kpi-start-{name}{suffix}", "children")
+         for name, _, _ in START_KPIS for suffix in ("", "-trend")],
+        [Input("start-zeitraum", "start_date"),
+         Input("start-zeitraum", "end_date"),
+         Input("start-filiale", "value"),
+         Input("start-staat", "value")]
+    )
+    def update_start_kpis(start_date, end_date, filial_id, staat):
+        if not start_date or not end_date:
+            raise PreventUpdate
+        aktuell, vorher = aggregates.store_kpis().compare(start_date[:10], end_date[:10], filial_id, staat)
+        ausgabe = []
+        for name, _, _ in START_KPIS:
+            feld, fmt = KPI_FORMATE[name]
+            wert = aktuell[feld]
+            ausgabe.append(fmt.format(wert) if wert is not None else "–")
+            ausgabe.append(_veraenderung(wert, vorher[feld] if vorher else None))
+        return ausgabe
@@ -0,0 +1,156 @@
+from dash.dependencies import Input, Output
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from shared.trends import detect_peaks, season_labels, seasonal_indices, yoy_growth
+
+KENNZAHLEN = {"revenue": "Umsatz (€)", "orders": "Bestellungen"}
+MONATE = ["Jan", "Feb", "Mär", "Apr", "Mai", "Jun", "Jul", "Aug", "Sep", "Okt", "Nov", "Dez"]
+WOCHENTAGE = ["Mo", "Di", "Mi", "Do", "Fr", "Sa", "So"]
+# Zeilen in der Tabelle der Spitzentage
+SPITZEN_TOP_N = 50
+ARTEN = {"store": "Filiale", "sku": "Produkt"}
+
+
+def _filter_inputs(prefix):
+    return [Input(f"{prefix}-kennzahl", "value"),
+            Input(f"{prefix}-zeitraum", "start_date"),
+            Input(f"{prefix}-zeitraum", "end_date"),
+            Input(f"{prefix}-kategorie", "value"),
+            Input(f"{prefix}-staat", "value")]
+
+
+def _tabelle(df):
+    return df.to_dict("records"), [{"name": col, "id": col} for col in df.columns]
+
+
+def _layout(fig, **kwargs):
+    fig.update_layout(plot_bgcolor="#2d2d2d", paper_bgcolor="#2d2d2d", font_color="white", height=500, **kwargs)
+    return fig
+
+
+def register_callbacks(app, data):
+    aggregates = data["aggregates"]
+    alerts = data["anomaly_alerts"]
+
+    def auswahl(metric, start_date, end_date, kategorien, staat, nach_kategorie=False):
+        trend_cube = aggregates.trend_cube()
+        values, gruppen = trend_cube.series(
+            metric, "category" if nach_kategorie else "total",
+            categories=np.isin(trend_cube.categories, kategorien) if kategorien else None,
+            stores=trend_cube.store_mask(state=staat), total_label="Gesamt")
+        window = trend_cube.day_slice(start_date and start_date[:10], end_date and end_date[:10])
+        return values, gruppen, window
+
+    @app.callback(
+        [Output("trend-saisonal-plot", "figure"),
+         Output("trend-saisonal-tabelle", "data"),
+         Output("trend-saisonal-tabelle", "columns")],
+        _filter_inputs("trend-saisonal") + [Input("trend-saisonal-art", "value"),
+                                            Input("trend-saisonal-aufteilung", "value")]
+    )
+    def update_saisonal(metric, start_date, end_date, kategorien, staat, art, aufteilung):
+        values, gruppen, window = auswahl(metric, start_date, end_date, kategorien, staat, aufteilung == "kategorie")
+        indices, _ = seasonal_indices(aggregates.trend_cube().days[window], values[window], art)
+        namen = MONATE if art == "month" else WOCHENTAGE
+        fig = go.Figure(go.Heatmap(z=indices.T, x=namen, y=gruppen, colorscale="RdBu_r", zmid=1,
+                                   colorbar={"title": "Index"}))
+        _layout(fig, title=f"Saisonindex {KENNZAHLEN[metric]}")
+        tabelle = pd.DataFrame(indices.round(3), columns=gruppen).assign(Saison=namen)
+        return fig, *_tabelle(tabelle[["Saison"] + gruppen])
+
+    @app.callback(
+        [Output("trend-wachstum-plot", "figure"),
+         Output("trend-wachstum-tabelle", "data"),
+         Output("trend-wachstum-tabelle", "columns")],
+        _filter_inputs("trend-wachstum") + [Input("trend-wachstum-aufteilung", "value")]
+    )
+    def update_trend_wachstum(metric, start_date, end_date, kategorien, staat, aufteilung):
+        values, gruppen, window = auswahl(metric, start_date, end_date, kategorien, staat, aufteilung == "kategorie")
+        # Vorjahreswerte liegen vor dem Zeitraum und kommen trotzdem aus dem Würfel
+        months, current, previous, growth = yoy_growth(aggregates.trend_cube().days, values, window)
+        monate = [str(m) for m in months]
+        fig = go.Figure([go.Bar(x=monate, y=growth[:, i] * 100, name=gruppe) for i, gruppe in enumerate(gruppen)])
+        _layout(fig, title=f"{KENNZAHLEN[metric]}: Veränderung gegenüber Vorjahresmonat (%)", barmode="group")
+        tabelle = pd.DataFrame({
+            "Monat": np.repeat(monate, len(gruppen)),
+            "Gruppe": np.tile(gruppen, len(monate)),
+            KENNZAHLEN[metric]: current.ravel().round(2),
+            "Vorjahr": previous.ravel().round(2),
+            "Wachstum (%)": (growth.ravel() * 100).round(1),
+        })
+        return fig, *_tabelle(tabelle)
+
+    @app.callback(
+        [Output("trend-spitzen-plot", "figure"),
+         Output("trend-spitzen-tabelle", "data"),
+         Output("trend-spitzen-tabelle", "columns")],
+        _filter_inputs("trend-spitzen") + [Input("trend-spitzen-fenster", "value"),
+                                           Input("trend-spitzen-schwelle", "value")]
+    )
+    def update_spitzenzeiten(metric, start_date, end_date, kategorien, staat, fenster, schwelle):
+        values, _, window = auswahl(metric, start_date, end_date, kategorien, staat)
+        totals = values[:, 0]
+        # Auf der ganzen Reihe suchen, damit auch die ersten Tage im Zeitraum ein Vergleichsfenster haben
+        tage, erwartet, z = detect_peaks(totals, fenster, schwelle)
+        im_zeitraum = (tage >= window.start) & (tage < window.stop)
+        tage, erwartet, z = tage[im_zeitraum], erwartet[im_zeitraum], z[im_zeitraum]
+        days = aggregates.trend_cube().days
+        fig = go.Figure([
+            go.Scatter(x=days[window], y=totals[window], mode="lines", name=KENNZAHLEN[metric]),
+            go.Scatter(x=days[tage], y=totals[tage], mode="markers", name="Spitzentag",
+                       marker={"size": 10, "color": "red"}),
+        ])
+        _layout(fig, title=f"{KENNZAHLEN[metric]} pro Tag")
+        tabelle = pd.DataFrame({
+            "Tag": [str(d) for d in days[tage]],
+            "Wochentag": [WOCHENTAGE[w] for w in season_labels(days[tage], "weekday")],
+            KENNZAHLEN[metric]: totals[tage].round(2),
+            "Erwartet": erwartet.round(2),
+            "z-Wert": z.round(2),
+        }).head(SPITZEN_TOP_N)
+        return fig, *_tabelle(tabelle)
+
+    @app.callback(
+        [Output("fruehwarnung-plot", "figure"),
+         Output("fruehwarnung-tabelle", "data"),
+         Output("fruehwarnung-tabelle", "columns")],
+        [Input("fruehwarnung-art", "value"),
+         Input("fruehwarnung-kennzahl", "value"),
+         Input("fruehwarnung-richtung", "value"),
+         Input("fruehwarnung-zeitraum", "start_date"),
+         Input("fruehwarnung-zeitraum", "end_date"),
+         Input("fruehwarnung-schwelle", "value")]
+    )
+    def update_fruehwarnung(art, metric, richtung, start_date, end_date, schwelle):
+        # Die Warnungen sind beim Laden berechnet, hier wird nur gefiltert
+        auswahl = alerts["z"].abs() >= schwelle
+        if art != "alle":
+            auswahl &= alerts["kind"] == art
+        if metric != "alle":
+            auswahl &= alerts["metric"] == metric
+        if richtung != "alle":
+            auswahl &= (alerts["z"] > 0) if richtung == "up" else (alerts["z"] < 0)
+        if start_date:
+            auswahl &= alerts["day"] >= np.datetime64(start_date[:10], "D")
+        if end_date:
+            auswahl &= alerts["day"] <= np.datetime64(end_date[:10], "D")
+        treffer = alerts[auswahl]
+        bezeichnung = treffer["name"].fillna(treffer["key"]) + " (" + treffer["kind"].map(ARTEN) + ", " \
+            + treffer["metric"].map(KENNZAHLEN) + ")"
+        fig = go.Figure(go.Scatter(
+            x=treffer["day"], y=treffer["z"], mode="markers", text=bezeichnung,
+            marker={"size": 9, "color": np.where(treffer["z"] > 0, "#2ca02c", "#d62728")},
+            hovertemplate="%{x|%d.%m.%Y}<br>%{text}<br>z = %{y:.2f}<extra></extra>"
+        ))
+        _layout(fig, title="Abweichungen von der Baseline (z-Wert)")
+        tabelle = pd.DataFrame({
+            "Tag": treffer["day"].dt.strftime("%Y-%m-%d"),
+            "Art": treffer["kind"].map(ARTEN),
+            "Name": treffer["name"].fillna(treffer["key"]),
+            "Kennzahl": treffer["metric"].map(KENNZAHLEN),
+            "Wert": treffer["value"].round(2),
+            "Erwartet": treffer["expected"].round(2),
+            "z-Wert": treffer["z"].round(2),
+        })
+        return fig, *_tabelle(tabelle)
@@ -1,4 +1,6 @@
-MOCK_DATA_DIR = "mock_data"
+# Arrow-Snapshot von project/database/build_db.py; fehlt er, wird app.db direkt gelesen
+SNAPSHOT_DIR = "../project/data/snapshot"
+DB_FILE = "../app.db"
 
 EXTERNAL_STYLESHEETS = [
     "dbc.themes.DARKLY",
@@ -7,4 +9,6 @@ EXTERNAL_STYLESHEETS = [
     "https://cdnjs.cloudflare.com/ajax/libs/animate.css/4.1.1/animate.min.css"
 ]
 
-APP_TITLE = "Erweitertes Analyse-Dashboard"
\ No newline at end of file
+APP_TITLE = "Erweitertes Analyse-Dashboard"
+# Anzahl fertig gebauter Seitenlayouts, die im Speicher bleiben
+LAYOUT_CACHE_SIZE = 8
@@ -0,0 +1,178 @@
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from shared.basket import Baskets, frequent_itemsets
+from shared.grid_index import StoreCustomerIndex
+from src.data.kpis import build_store_kpis
+from src.data.rollups import SalesCube
+from src.data.trends import build_trend_cube
+from src.utils.customer_search import CustomerSearch
+
+logger = logging.getLogger(__name__)
+
+# Obergrenze für alle gecachten Aggregate zusammen
+AGGREGATE_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+
+def _nbytes(value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(np.sum(value.memory_usage(deep=True)))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_nbytes(v) for v in value.values())
+    if hasattr(value, "__dict__"):
+        # Würfel und Indizes: das Objekt samt seiner Arrays und Tabellen
+        return sys.getsizeof(value) + _nbytes(vars(value))
+    return sys.getsizeof(value)
+
+
+class AggregateCache:
+    """
+    Gemeinsamer LRU-Cache für Aggregate, Würfel und Indizes, die Callbacks
+    und Seiten brauchen. Nichts davon entsteht beim Laden: jedes Aggregat
+    wird beim ersten Zugriff pro Datenstand einmal berechnet; ein neuer
+    Stand oder invalidate() verwirft die Einträge.
+    """
+
+    def __init__(self, data, max_bytes=AGGREGATE_CACHE_MAX_BYTES):
+        self.data = data
+        self.max_bytes = max_bytes
+        self.version = None
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, name, build):
+        """
+        Liefert das Aggregat `name`, bei Bedarf berechnet mit build(data)
+        """
+        with self._lock:
+            if self.data.get("data_version") != self.version:
+                self._clear()
+                self.version = self.data.get("data_version")
+            entry = self._entries.get(name)
+            if entry is not None:
+                self._entries.move_to_end(name)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            version = self.version
+
+        start = time.perf_counter()
+        value = build(self.data)
+        nbytes = _nbytes(value)
+        logger.info(f"🧮 Aggregat {name} berechnet: {nbytes / 1024:.0f} KiB in {time.perf_counter() - start:.3f}s")
+
+        with self._lock:
+            # Inzwischen invalidiert: Ergebnis ausliefern, aber nicht behalten
+            if version != self.version:
+                return value
+            old = self._entries.pop(name, None)
+            if old is not None:
+                self.size -= old[1]
+            self._entries[name] = (value, nbytes)
+            self.size += nbytes
+            while self.size > self.max_bytes and len(self._entries) > 1:
+                _, (_, old_bytes) = self._entries.popitem(last=False)
+                self.size -= old_bytes
+        return value
+
+    def invalidate(self, name=None):
+        """
+        Verwirft ein einzelnes Aggregat oder, ohne Namen, alle
+        """
+        with self._lock:
+            if name is None:
+                self._clear()
+            else:
+                entry = self._entries.pop(name, None)
+                if entry is not None:
+                    self.size -= entry[1]
+
+    def _clear(self):
+        self._entries.clear()
+        self.size = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": {name: nbytes for name, (_, nbytes) in self._entries.items()},
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "data_version": self.version,
+            }
+
+    def customer_stats(self):
+        """
+        Bestellungen pro Kunde: Anzahl, Ø Bestellwert und Summe, Index customerID
+        """
+        return self.get("customer_stats", lambda data: customer_order_stats(data["orders_df"]))
+
+    def sales_cube(self):
+        return self.get("sales_cube", lambda data: SalesCube(
+            data["orderitems_df"], data["orders_df"], data["products_df"]))
+
+    def trend_cube(self):
+        return self.get("trend_cube", lambda data: build_trend_cube(
+            data["orders_df"], data["orderitems_df"], data["products_df"], data["stores_df"]))
+
+    def store_kpis(self):
+        return self.get("store_kpis", lambda data: build_store_kpis(data["orders_df"], data["stores_df"]))
+
+    def spatial_index(self):
+        return self.get("spatial_index", lambda data: StoreCustomerIndex(
+            data["customers_df"]["customerID"], data["customers_df"]["latitude"], data["customers_df"]["longitude"],
+            data["stores_df"]["storeID"], data["stores_df"]["latitude"], data["stores_df"]["longitude"]))
+
+    def assignments(self):
+        """
+        Kunden mit nächster Filiale (storeID) und Entfernung (distance_km)
+        """
+        def build(data):
+            customers_df = data["customers_df"]
+            nearest_store, nearest_distance = self.spatial_index().nearest_stores(
+                customers_df["latitude"], customers_df["longitude"])
+            return customers_df.assign(storeID=nearest_store, distance_km=nearest_distance)
+        return self.get("assignments", build)
+
+    def customer_orders(self):
+        """
+        Bestellungen pro Kunde in der Reihenfolge des räumlichen Index
+        """
+        return self.get("customer_orders", lambda data: data["orders_df"]["customerID"].value_counts()
+                        .reindex(self.spatial_index().customer_ids, fill_value=0).to_numpy())
+
+    def baskets(self):
+        """
+        SKU-Bitmaske je Bestellung für die Warenkorbanalyse
+        """
+        return self.get("baskets", lambda data: Baskets.from_lines(
+            sorted(data["products_df"]["SKU"].unique()), data["orderitems_df"]["orderID"], data["orderitems_df"]["SKU"]))
+
+    def frequent_itemsets(self, min_support, max_size):
+        """
+        {Maske: Anzahl Bestellungen} der Kombinationen ab min_support (Anteil
+        der Bestellungen) bis max_size Produkte, ein Eintrag pro Schwelle
+        """
+        def build(data):
+            baskets = self.baskets()
+            return frequent_itemsets(baskets, baskets.min_count(min_support), max_size)
+        return self.get(f"frequent_itemsets_{min_support}_{max_size}", build)
+
+    def customer_search(self):
+        return self.get("customer_search", lambda data: CustomerSearch(data["orders_df"]["customerID"].unique()))
+
+
+def customer_order_stats(orders_df):
+    stats = orders_df.groupby("customerID", observed=True)["total"].agg(["size", "mean", "sum"])
+    stats.columns = ["count", "mean", "total"]
+    return stats
@@ -1,44 +1,89 @@
-import pandas as pd
+import json
 import os
+import sqlite3
+import time
 import logging
+from pathlib import Path
+import pyarrow as pa
+from src.data.aggregates import AggregateCache
+from shared.snapshot import SNAPSHOT_TABLES, id_dictionaries, read_table
 
 # Logging konfigurieren
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def load_mock_data(file_name, mock_data_dir="mock_data"):
-    file_path = os.path.join(mock_data_dir, file_name)
-    try:
-        df = pd.read_csv(file_path)
-        logger.info(f"✅ Mockdaten aus {file_name} geladen: {len(df)} Zeilen")
-        return df
-    except Exception as e:
-        logger.error(f"❌ Fehler beim Laden von {file_name}: {str(e)}")
-        raise
+TABLES = list(SNAPSHOT_TABLES)
 
-def load_all_data(mock_data_dir="mock_data"):
+def load_snapshot_table(name, snapshot_dir):
+    """
+    Eine Tabelle aus dem Arrow-Snapshot von build_db.py. Der Stream wird
+    per mmap eingeblendet statt geparst; IDs kommen als Kategorien,
+    Datumsspalten als datetime64, Koordinaten als float32.
+    """
+    start = time.perf_counter()
+    with pa.memory_map(os.path.join(snapshot_dir, f"{name}.arrows")) as source:
+        df = pa.ipc.open_stream(source).read_all().to_pandas()
+    logger.info(f"✅ {name} aus Snapshot geladen: {len(df)} Zeilen in {time.perf_counter() - start:.3f} s")
+    return df
+
+def load_db_tables(db_file):
+    """
+    Alle Tabellen direkt aus app.db, mit denselben Abfragen und Datentypen
+    wie der Snapshot; langsamer, weil jede Zeile durch Python geht
+    """
+    start = time.perf_counter()
+    conn = sqlite3.connect(f"{Path(db_file).resolve().as_uri()}?mode=ro", uri=True)
     try:
-        customers_df = load_mock_data("customers.csv", mock_data_dir)
-        orders_df = load_mock_data("orders.csv", mock_data_dir)
-        orderitems_df = load_mock_data("orderitems.csv", mock_data_dir)
-        products_df = load_mock_data("products.csv", mock_data_dir)
-        ingredients_df = load_mock_data("ingredients.csv", mock_data_dir)
-        productingredients_df = load_mock_data("productingredients.csv", mock_data_dir)
-        stores_df = load_mock_data("stores.csv", mock_data_dir)
+        dictionaries = id_dictionaries(conn)
+        tables = {name: read_table(conn, name, dictionaries).to_pandas() for name in TABLES}
+        version = conn.execute("SELECT value FROM build_meta WHERE key = 'data_version'").fetchone()[0]
+    finally:
+        conn.close()
+    logger.info(f"✅ {len(tables)} Tabellen aus {db_file} geladen in {time.perf_counter() - start:.3f} s")
+    return tables, version
 
-        # Datentypen korrigieren
-        orders_df['orderDate'] = pd.to_datetime(orders_df['orderDate'])
-        products_df['Launch'] = pd.to_datetime(products_df['Launch'])
+def load_tables(snapshot_dir, db_file):
+    """
+    Alle Tabellen und die Kennung des Datenstands: aus dem Snapshot, wenn er
+    vollständig ist (meta.json wird zuletzt geschrieben), sonst direkt aus
+    app.db. Gibt es keins von beiden, bricht das Laden mit Fehler ab.
+    """
+    meta_file = os.path.join(snapshot_dir, "meta.json")
+    if os.path.exists(meta_file):
+        try:
+            with open(meta_file) as f:
+                meta = json.load(f)
+            tables = {name: load_snapshot_table(name, snapshot_dir) for name in TABLES}
+            return tables, meta["data_version"]
+        except Exception as e:
+            logger.warning(f"⚠️ Snapshot in {snapshot_dir} unbrauchbar ({e}), lese app.db direkt")
+    if not os.path.exists(db_file):
+        raise FileNotFoundError(f"Weder Snapshot in {snapshot_dir} noch {db_file} gefunden, "
+                                "zuerst project/database/build_db.py ausführen")
+    return load_db_tables(db_file)
 
-        return {
-            "customers_df": customers_df,
-            "orders_df": orders_df,
-            "orderitems_df": orderitems_df,
-            "products_df": products_df,
-            "ingredients_df": ingredients_df,
-            "productingredients_df": productingredients_df,
-            "stores_df": stores_df
+def load_all_data(snapshot_dir, db_file):
+    """
+    Die Tabellen und ein AggregateCache darüber. Würfel, Indizes und
+    Aggregate baut erst der erste Callback bzw. die erste Seite, die sie
+    braucht (data["aggregates"].sales_cube() usw.).
+    """
+    try:
+        tables, version = load_tables(snapshot_dir, db_file)
+        data = {
+            "customers_df": tables["customers"],
+            "orders_df": tables["orders"],
+            "orderitems_df": tables["orderitems"],
+            "products_df": tables["products"],
+            "ingredients_df": tables["ingredients"],
+            "productingredients_df": tables["productingredients"],
+            "stores_df": tables["stores"],
+            # Die Warnungen rechnet build_db.py beim Import, hier wird nur gelesen
+            "anomaly_alerts": tables["anomaly_alerts"],
+            "data_version": version
         }
+        data["aggregates"] = AggregateCache(data)
+        return data
     except Exception as e:
-        logger.error("Fehler beim Laden der Mockdaten")
-        raise
\ No newline at end of file
+        logger.error("Fehler beim Laden der Daten")
+        raise
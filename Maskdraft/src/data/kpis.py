@@ -0,0 +1,22 @@
+import numpy as np
+from shared.kpis import StoreKpis
+
+
+def build_store_kpis(orders_df, stores_df):
+    """
+    KPI-Summen aus shared/kpis.py, gefüllt aus orders_df statt aus
+    rollup_store_day wie in der API: jede Bestellung ist eine Zelle, die
+    Summen je Filiale und Tag bildet StoreKpis selbst.
+    """
+    stores = stores_df.drop_duplicates("storeID")
+    # Neukunde: die erste Bestellung eines Kunden überhaupt
+    first_order = ~orders_df.sort_values("orderDate", kind="stable").duplicated("customerID")
+    cells = {
+        "day": orders_df["orderDate"].to_numpy().astype("datetime64[D]"),
+        "storeID": orders_df["storeID"].to_numpy(),
+        "orders": np.ones(len(orders_df)),
+        "items": orders_df["nItems"].to_numpy(),
+        "revenue": orders_df["total"].to_numpy(),
+        "new_customers": first_order.reindex(orders_df.index).to_numpy(),
+    }
+    return StoreKpis(stores["storeID"], stores["state"], stores["state_abbr"], cells)
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+# Zeiteinheiten der Launch-Performance: Pandas-Periodenkürzel -> NumPy-Einheit
+TIME_UNITS = {"D": "D", "M": "M", "Y": "Y"}
+
+
+class SalesCube:
+    """
+    Dichter Umsatzwürfel SKU x Tag als NumPy-Array, einmal beim Laden gebaut.
+    Monats- und Jahreswerte entstehen aus der kumulierten Summe über die
+    Tage: Umsatz einer Periode = cumsum am Periodenende - cumsum am Anfang.
+    """
+
+    def __init__(self, orderitems_df, orders_df, products_df):
+        self.skus = products_df["SKU"].drop_duplicates().to_numpy()
+        self.sku_pos = {sku: i for i, sku in enumerate(self.skus)}
+        merged = orderitems_df[["orderID", "SKU", "quantity"]].merge(
+            orders_df[["orderID", "orderDate"]], on="orderID"
+        )
+        days = pd.to_datetime(merged["orderDate"]).to_numpy().astype("datetime64[D]")
+        first_day = days.min() if len(days) else np.datetime64("today", "D")
+        n_days = int((days.max() - first_day).astype(int)) + 1 if len(days) else 1
+        self.days = first_day + np.arange(n_days)
+
+        prices = products_df.drop_duplicates("SKU").set_index("SKU")["Price"]
+        sku_idx = merged["SKU"].map(self.sku_pos)
+        known = sku_idx.notna().to_numpy()
+        flat = sku_idx.to_numpy()[known].astype(np.int64) * n_days + (days[known] - first_day).astype(np.int64)
+        revenue = (merged["quantity"] * merged["SKU"].map(prices)).to_numpy()[known]
+        size = len(self.skus) * n_days
+        self.revenue = np.bincount(flat, weights=revenue, minlength=size).reshape(len(self.skus), n_days)
+        self.quantity = np.bincount(flat, weights=merged["quantity"].to_numpy()[known],
+                                    minlength=size).reshape(len(self.skus), n_days)
+        # Bestellungen mit der SKU pro Tag (eine Zeile je Bestellung und SKU)
+        self.orders = np.bincount(flat, minlength=size).reshape(len(self.skus), n_days)
+        # Erster Verkaufstag je SKU; davor gibt es keine Werte, nicht Null
+        sold = self.quantity > 0
+        self.first_sale = np.where(sold.any(axis=1), sold.argmax(axis=1), n_days)
+
+        cumulative = np.concatenate([np.zeros((len(self.skus), 1)), self.revenue.cumsum(axis=1)], axis=1)
+        self.rollups = {}
+        for unit, numpy_unit in TIME_UNITS.items():
+            periods = self.days.astype(f"datetime64[{numpy_unit}]")
+            starts = np.flatnonzero(np.r_[True, periods[1:] != periods[:-1]])
+            ends = np.r_[starts[1:], n_days]
+            values = cumulative[:, ends] - cumulative[:, starts]
+            # Perioden, die vor dem ersten Verkauf enden, bleiben leer
+            values[ends[None, :] <= self.first_sale[:, None]] = np.nan
+            self.rollups[unit] = (periods[starts].astype("datetime64[D]"), values)
+
+    def revenue_series(self, skus, unit):
+        """
+        (Periodenstart, Umsatzmatrix SKU x Periode) für die gewählten SKUs
+        """
+        rows = [self.sku_pos[sku] for sku in skus if sku in self.sku_pos]
+        periods, values = self.rollups[unit]
+        return periods, values[rows], [self.skus[row] for row in rows]
@@ -0,0 +1,26 @@
+from shared.trends import TrendCube
+
+
+def build_trend_cube(orders_df, orderitems_df, products_df, stores_df):
+    """
+    Trendwürfel aus shared/trends.py, gefüllt aus den geladenen Tabellen
+    statt aus den Rollups der API: Umsatz und Bestellungen je Tag,
+    Kategorie und Filiale, dazu die Bestellungen je Tag und Filiale.
+    """
+    products = products_df.drop_duplicates("SKU")
+    stores = stores_df.drop_duplicates("storeID")
+    lines = orderitems_df[["orderID", "SKU", "quantity"]].merge(
+        orders_df[["orderID", "storeID", "orderDate"]], on="orderID"
+    ).merge(products[["SKU", "Category", "Price"]], on="SKU")
+    lines["day"] = lines["orderDate"].dt.floor("D")
+    lines["revenue"] = lines["quantity"] * lines["Price"]
+    # Eine Bestellung zählt je Kategorie einmal, egal wie viele Produkte daraus
+    lines["orders"] = ~lines.duplicated(["orderID", "Category"])
+    cells = lines.groupby(["day", "Category", "storeID"], observed=True, sort=False)[["revenue", "orders"]] \
+        .sum().reset_index()
+    store_cells = orders_df.assign(day=orders_df["orderDate"].dt.floor("D")) \
+        .groupby(["day", "storeID"], observed=True, sort=False).size().rename("orders").reset_index()
+    return TrendCube(
+        products["Category"].dropna().unique(), stores["storeID"], stores["state"], stores["state_abbr"],
+        cells, store_cells,
+    )
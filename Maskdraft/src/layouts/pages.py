@@ -3,10 +3,65 @@ import dash_core_components as dcc
 import dash_bootstrap_components as dbc
 import dash_table
 
-def start_page():
+START_KPIS = [
+    ("umsatz", "Umsatz", "primary"),
+    ("bestellungen", "Bestellungen", "info"),
+    ("bestellwert", "Ø Bestellwert", "success"),
+    ("artikel", "Ø Artikel pro Bestellung", "warning"),
+    ("neukunden", "Neukunden", "danger"),
+]
+
+def start_page(stores_df, store_kpis):
+    letzter_tag = str(store_kpis.last_day)
+    dropdown_style = {"backgroundColor": "#000000", "color": "#fff", "border": "1px solid #444", "borderRadius": "4px"}
     return html.Div([
         html.H1("Willkommen beim Analyse-Dashboard", className="text-center mb-4 animate__animated animate__fadeIn"),
         html.P("Wählen Sie eine Analyseart aus der Navigation oben.", className="text-center mb-4 text-light"),
+        dbc.Row([
+            dbc.Col([
+                html.Label("Zeitraum:", className="text-light"),
+                dcc.DatePickerRange(
+                    id="start-zeitraum",
+                    min_date_allowed=str(store_kpis.first_day),
+                    max_date_allowed=letzter_tag,
+                    start_date=str(max(store_kpis.first_day, store_kpis.last_day - 364)),
+                    end_date=letzter_tag,
+                    display_format="DD.MM.YYYY",
+                    className="mb-3"
+                )
+            ], width=4),
+            dbc.Col([
+                html.Label("Filiale:", className="text-light"),
+                dcc.Dropdown(
+                    id="start-filiale",
+                    options=[{"label": f"{row['city']} – {row['storeID']}", "value": row["storeID"]}
+                             for _, row in stores_df.iterrows()],
+                    placeholder="Alle Filialen",
+                    className="mb-3",
+                    style=dropdown_style
+                )
+            ], width=4),
+            dbc.Col([
+                html.Label("Staat:", className="text-light"),
+                dcc.Dropdown(
+                    id="start-staat",
+                    options=[{"label": state, "value": state} for state in sorted(stores_df["state"].unique())],
+                    placeholder="Alle Staaten",
+                    className="mb-3",
+                    style=dropdown_style
+                )
+            ], width=4)
+        ], className="mb-4"),
+        dbc.Row([
+            dbc.Col(dbc.Card([
+                dbc.CardBody([
+                    html.H4(titel, className="card-title"),
+                    html.H2(id=f"kpi-start-{name}", className="card-text"),
+                    html.P(id=f"kpi-start-{name}-trend", className="card-text mb-0")
+                ])
+            ], color=farbe, inverse=True, className="shadow"))
+            for name, titel, farbe in START_KPIS
+        ], className="mb-4")
     ])
 
 def topkunden_page():
@@ -34,7 +89,7 @@ def topkunden_page():
                              page_size=10, sort_action="native")
     ])
 
-def bestellwert_page(orders_df):
+def bestellwert_page():
     return html.Div([
         html.H2("Durchschnittlicher Bestellwert pro Kunde", className="text-center mb-4 animate__animated animate__fadeIn"),
         dbc.Row([
@@ -42,9 +97,9 @@ def bestellwert_page(orders_df):
                 html.Label("Kunde auswählen:", className="text-light"),
                 dcc.Dropdown(
                     id="kunde-auswahl",
-                    options=[{"label": cid, "value": cid} for cid in sorted(orders_df["customerID"].unique())],
+                    options=[],
                     value=None,
-                    placeholder="Kunden-ID auswählen",
+                    placeholder="Kunden-ID eingeben, z. B. C00",
                     className="mb-3",
                     style={
                         "backgroundColor": "#000000",
@@ -71,10 +126,12 @@ def bestellwert_page(orders_df):
         ], className="mb-4"),
         dcc.Graph(id="bestellwert-plot"),
         html.H3("Details", className="text-light mb-3"),
+        # Eine Zeile pro Kunde: Seiten, Sortierung und Filter rechnet der Server
         dash_table.DataTable(id="bestellwert-tabelle", style_table={"overflowX": "auto"},
                              style_cell={"backgroundColor": "#2d2d2d", "color": "white", "border": "1px solid #444"},
                              style_header={"backgroundColor": "#1f77b4", "fontWeight": "bold", "color": "white"},
-                             page_size=10, sort_action="native", filter_action="native")
+                             page_current=0, page_size=10, page_action="custom",
+                             sort_action="custom", sort_by=[], filter_action="custom", filter_query="")
     ])
 
 def kundenkarte_page():
@@ -182,7 +239,7 @@ def korrelation_page():
         dcc.Graph(id="korrelation-grafik")
     ])
 
-def durchschnitt_page(orders_df):
+def durchschnitt_page():
     return html.Div([
         html.H2("Durchschnittlicher Bestellwert", className="text-center mb-4 animate__animated animate__fadeIn"),
         dbc.Row([
@@ -190,8 +247,8 @@ def durchschnitt_page(orders_df):
                 html.Label("Kunde auswählen:", className="text-light"),
                 dcc.Dropdown(
                     id="kunde-auswahl",
-                    options=[{"label": cid, "value": cid} for cid in sorted(orders_df["customerID"].unique())],
-                    placeholder="Kunden-ID auswählen",
+                    options=[],
+                    placeholder="Kunden-ID eingeben, z. B. C00",
                     className="mb-3",
                     style={
                         "backgroundColor": "#000000",
@@ -204,8 +261,248 @@ def durchschnitt_page(orders_df):
         ], className="mb-4"),
         dcc.Graph(id="durchschnitt-plot"),
         html.H3("Details", className="text-light mb-3"),
+        # Eine Zeile pro Kunde: Seiten und Sortierung rechnet der Server
         dash_table.DataTable(id="durchschnitt-tabelle", style_table={"overflowX": "auto"},
+                             style_cell={"backgroundColor": "#2d2d2d", "color": "white", "border": "1px solid #444"},
+                             style_header={"backgroundColor": "#1f77b4", "fontWeight": "bold", "color": "white"},
+                             page_current=0, page_size=10, page_action="custom", sort_action="custom", sort_by=[])
+    ])
+
+def zuordnung_page():
+    return html.Div([
+        html.H2("Kunden-Zuordnung zur nächsten Filiale", className="text-center mb-4 animate__animated animate__fadeIn"),
+        dbc.Row([
+            dbc.Col(dbc.Card([
+                dbc.CardBody([
+                    html.H4("Ø Distanz zur nächsten Filiale", className="card-title"),
+                    html.H2(id="kpi-zuordnung-distanz", className="card-text")
+                ])
+            ], color="primary", inverse=True, className="shadow"), width=3)
+        ], className="mb-4"),
+        dcc.Graph(id="zuordnung-karte", style={"height": "600px"}),
+        html.H3("Details", className="text-light mb-3"),
+        dash_table.DataTable(id="zuordnung-tabelle", style_table={"overflowX": "auto"},
                              style_cell={"backgroundColor": "#2d2d2d", "color": "white", "border": "1px solid #444"},
                              style_header={"backgroundColor": "#1f77b4", "fontWeight": "bold", "color": "white"},
                              page_size=10, sort_action="native")
-    ])
\ No newline at end of file
+    ])
+
+def _raster_slider(slider_id):
+    return dbc.Col([
+        html.Label("Rastergröße (km):", className="text-light"),
+        dcc.Slider(id=slider_id, min=5, max=100, step=5, value=25,
+                   marks={km: str(km) for km in (5, 25, 50, 75, 100)}, className="mb-3")
+    ], width=4)
+
+def _raster_tabelle(table_id):
+    return dash_table.DataTable(id=table_id, style_table={"overflowX": "auto"},
+                                style_cell={"backgroundColor": "#2d2d2d", "color": "white", "border": "1px solid #444"},
+                                style_header={"backgroundColor": "#1f77b4", "fontWeight": "bold", "color": "white"},
+                                page_size=10, sort_action="native")
+
+def whitespots_page():
+    return html.Div([
+        html.H2("White-Spot-Analyse", className="text-center mb-4 animate__animated animate__fadeIn"),
+        dbc.Row([_raster_slider("whitespots-raster")], className="mb-4"),
+        dcc.Graph(id="whitespots-karte", style={"height": "600px"}),
+        html.H3("Unterversorgte Zellen", className="text-light mb-3"),
+        _raster_tabelle("whitespots-tabelle")
+    ])
+
+def standorte_page():
+    return html.Div([
+        html.H2("Neue Standorte", className="text-center mb-4 animate__animated animate__fadeIn"),
+        dbc.Row([
+            _raster_slider("standorte-raster"),
+            dbc.Col([
+                html.Label("Anzahl neuer Filialen:", className="text-light"),
+                dcc.Slider(id="standorte-anzahl", min=1, max=10, step=1, value=5,
+                           marks={n: str(n) for n in range(1, 11)}, className="mb-3")
+            ], width=4)
+        ], className="mb-4"),
+        dcc.Graph(id="standorte-karte", style={"height": "600px"}),
+        html.H3("Vorgeschlagene Standorte", className="text-light mb-3"),
+        _raster_tabelle("standorte-tabelle")
+    ])
+
+def wachstum_page():
+    return html.Div([
+        html.H2("Wachstumsgebiete", className="text-center mb-4 animate__animated animate__fadeIn"),
+        dbc.Row([_raster_slider("wachstum-raster")], className="mb-4"),
+        dcc.Graph(id="wachstum-karte", style={"height": "600px"}),
+        html.H3("Gebiete mit unterdurchschnittlicher Bestellhäufigkeit", className="text-light mb-3"),
+        _raster_tabelle("wachstum-tabelle")
+    ])
+
+def kombikauf_page():
+    return html.Div([
+        html.H2("Kombikauf", className="text-center mb-4 animate__animated animate__fadeIn"),
+        dbc.Row([
+            dbc.Col([
+                html.Label("Mindest-Support (% der Bestellungen):", className="text-light"),
+                dcc.Slider(id="kombikauf-support", min=0.1, max=5, step=0.1, value=1,
+                           marks={p: f"{p}%" for p in (0.1, 1, 2, 3, 4, 5)}, className="mb-3")
+            ], width=4),
+            dbc.Col([
+                html.Label("Max. Produkte pro Kombination:", className="text-light"),
+                dcc.RadioItems(
+                    id="kombikauf-groesse",
+                    options=[{"label": str(n), "value": n} for n in (2, 3, 4)],
+                    value=3,
+                    labelStyle={"display": "inline-block", "margin-right": "15px"},
+                    className="mb-3"
+                )
+            ], width=4)
+        ], className="mb-4"),
+        dcc.Graph(id="kombikauf-plot"),
+        html.H3("Assoziationsregeln", className="text-light mb-3"),
+        dash_table.DataTable(id="kombikauf-tabelle", style_table={"overflowX": "auto"},
+                             style_cell={"backgroundColor": "#2d2d2d", "color": "white", "border": "1px solid #444"},
+                             style_header={"backgroundColor": "#1f77b4", "fontWeight": "bold", "color": "white"},
+                             page_size=10, sort_action="native")
+    ])
+
+def _trend_filter(prefix, trend_cube, stores_df):
+    dropdown_style = {"backgroundColor": "#000000", "color": "#fff", "border": "1px solid #444", "borderRadius": "4px"}
+    return dbc.Row([
+        dbc.Col([
+            html.Label("Kennzahl:", className="text-light"),
+            dcc.RadioItems(
+                id=f"{prefix}-kennzahl",
+                options=[{"label": "Umsatz", "value": "revenue"}, {"label": "Bestellungen", "value": "orders"}],
+                value="revenue",
+                labelStyle={"display": "inline-block", "margin-right": "15px"},
+                className="mb-3"
+            )
+        ], width=3),
+        dbc.Col([
+            html.Label("Zeitraum:", className="text-light"),
+            dcc.DatePickerRange(
+                id=f"{prefix}-zeitraum",
+                min_date_allowed=str(trend_cube.days[0]),
+                max_date_allowed=str(trend_cube.days[-1]),
+                start_date=str(trend_cube.days[0]),
+                end_date=str(trend_cube.days[-1]),
+                display_format="DD.MM.YYYY",
+                className="mb-3"
+            )
+        ], width=3),
+        dbc.Col([
+            html.Label("Kategorien:", className="text-light"),
+            dcc.Dropdown(id=f"{prefix}-kategorie", options=[{"label": c, "value": c} for c in trend_cube.categories],
+                         multi=True, placeholder="Alle Kategorien", className="mb-3", style=dropdown_style)
+        ], width=3),
+        dbc.Col([
+            html.Label("Staat:", className="text-light"),
+            dcc.Dropdown(id=f"{prefix}-staat", options=[{"label": s, "value": s} for s in sorted(stores_df["state"].unique())],
+                         placeholder="Alle Staaten", className="mb-3", style=dropdown_style)
+        ], width=3)
+    ], className="mb-2")
+
+def _aufteilung(radio_id):
+    return dcc.RadioItems(
+        id=radio_id,
+        options=[{"label": "Gesamt", "value": "gesamt"}, {"label": "Nach Kategorie", "value": "kategorie"}],
+        value="gesamt",
+        labelStyle={"display": "inline-block", "margin-right": "15px"},
+        className="mb-3"
+    )
+
+def trend_saisonal_page(trend_cube, stores_df):
+    return html.Div([
+        html.H2("Saisonale Trends", className="text-center mb-4 animate__animated animate__fadeIn"),
+        _trend_filter("trend-saisonal", trend_cube, stores_df),
+        dbc.Row([
+            dbc.Col([
+                html.Label("Saison:", className="text-light"),
+                dcc.RadioItems(
+                    id="trend-saisonal-art",
+                    options=[{"label": "Monat", "value": "month"}, {"label": "Wochentag", "value": "weekday"}],
+                    value="month",
+                    labelStyle={"display": "inline-block", "margin-right": "15px"},
+                    className="mb-3"
+                )
+            ], width=3),
+            dbc.Col([html.Label("Aufteilung:", className="text-light"), _aufteilung("trend-saisonal-aufteilung")], width=3)
+        ], className="mb-4"),
+        dcc.Graph(id="trend-saisonal-plot"),
+        html.H3("Saisonindex (1,0 = durchschnittlicher Tag)", className="text-light mb-3"),
+        _raster_tabelle("trend-saisonal-tabelle")
+    ])
+
+def trend_wachstum_page(trend_cube, stores_df):
+    return html.Div([
+        html.H2("Wachstum gegenüber Vorjahr", className="text-center mb-4 animate__animated animate__fadeIn"),
+        _trend_filter("trend-wachstum", trend_cube, stores_df),
+        dbc.Row([
+            dbc.Col([html.Label("Aufteilung:", className="text-light"), _aufteilung("trend-wachstum-aufteilung")], width=3)
+        ], className="mb-4"),
+        dcc.Graph(id="trend-wachstum-plot"),
+        html.H3("Monatswerte", className="text-light mb-3"),
+        _raster_tabelle("trend-wachstum-tabelle")
+    ])
+
+def trend_spitzenzeiten_page(trend_cube, stores_df):
+    return html.Div([
+        html.H2("Spitzenzeiten", className="text-center mb-4 animate__animated animate__fadeIn"),
+        _trend_filter("trend-spitzen", trend_cube, stores_df),
+        dbc.Row([
+            dbc.Col([
+                html.Label("Vergleichsfenster (Tage):", className="text-light"),
+                dcc.Slider(id="trend-spitzen-fenster", min=7, max=91, step=7, value=28,
+                           marks={d: str(d) for d in (7, 28, 56, 91)}, className="mb-3")
+            ], width=4),
+            dbc.Col([
+                html.Label("Schwelle (Standardabweichungen):", className="text-light"),
+                dcc.Slider(id="trend-spitzen-schwelle", min=1.5, max=4, step=0.5, value=2.5,
+                           marks={z: str(z) for z in (1.5, 2, 2.5, 3, 3.5, 4)}, className="mb-3")
+            ], width=4)
+        ], className="mb-4"),
+        dcc.Graph(id="trend-spitzen-plot"),
+        html.H3("Spitzentage", className="text-light mb-3"),
+        _raster_tabelle("trend-spitzen-tabelle")
+    ])
+
+def _auswahl(radio_id, optionen):
+    return dcc.RadioItems(
+        id=radio_id,
+        options=[{"label": label, "value": value} for value, label in optionen],
+        value=optionen[0][0],
+        labelStyle={"display": "inline-block", "margin-right": "15px"},
+        className="mb-3"
+    )
+
+def trend_fruehwarnung_page(trend_cube):
+    return html.Div([
+        html.H2("Frühwarnsystem", className="text-center mb-4 animate__animated animate__fadeIn"),
+        dbc.Row([
+            dbc.Col([html.Label("Art:", className="text-light"),
+                     _auswahl("fruehwarnung-art", [("alle", "Alle"), ("store", "Filialen"), ("sku", "Produkte")])], width=3),
+            dbc.Col([html.Label("Kennzahl:", className="text-light"),
+                     _auswahl("fruehwarnung-kennzahl", [("alle", "Alle"), ("revenue", "Umsatz"), ("orders", "Bestellungen")])], width=3),
+            dbc.Col([html.Label("Richtung:", className="text-light"),
+                     _auswahl("fruehwarnung-richtung", [("alle", "Alle"), ("up", "Anstieg"), ("down", "Einbruch")])], width=3),
+            dbc.Col([
+                html.Label("Zeitraum:", className="text-light"),
+                dcc.DatePickerRange(
+                    id="fruehwarnung-zeitraum",
+                    min_date_allowed=str(trend_cube.days[0]),
+                    max_date_allowed=str(trend_cube.days[-1]),
+                    start_date=str(max(trend_cube.days[0], trend_cube.days[-1] - 90)),
+                    end_date=str(trend_cube.days[-1]),
+                    display_format="DD.MM.YYYY",
+                    className="mb-3"
+                )
+            ], width=3)
+        ], className="mb-2"),
+        dbc.Row([
+            dbc.Col([
+                html.Label("Mindestabweichung (Standardabweichungen):", className="text-light"),
+                dcc.Slider(id="fruehwarnung-schwelle", min=3, max=6, step=0.5, value=3,
+                           marks={z: str(z) for z in (3, 4, 5, 6)}, className="mb-3")
+            ], width=4)
+        ], className="mb-4"),
+        dcc.Graph(id="fruehwarnung-plot"),
+        html.H3("Warnungen", className="text-light mb-3"),
+        _raster_tabelle("fruehwarnung-tabelle")
+    ])
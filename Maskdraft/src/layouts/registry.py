@@ -0,0 +1,55 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class LayoutRegistry:
+    """
+    Baut Seitenlayouts erst beim ersten Aufruf der URL. Die zuletzt besuchten
+    max_pages Layouts bleiben im Speicher (LRU), ältere werden beim nächsten
+    Besuch neu gebaut. Die Bauzeit jeder Seite wird protokolliert.
+    """
+
+    def __init__(self, builders, max_pages=8):
+        self.builders = builders
+        self.max_pages = max_pages
+        self.build_times = {}
+        self._pages = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, path):
+        return path in self.builders
+
+    def get(self, path, default=None):
+        builder = self.builders.get(path)
+        if builder is None:
+            return default
+        with self._lock:
+            page = self._pages.get(path)
+            if page is not None:
+                self._pages.move_to_end(path)
+                return page
+
+        start = time.perf_counter()
+        page = builder()
+        elapsed = time.perf_counter() - start
+        logger.info(f"🧱 Layout {path} gebaut in {elapsed * 1000:.1f} ms")
+
+        with self._lock:
+            self.build_times[path] = elapsed
+            self._pages[path] = page
+            self._pages.move_to_end(path)
+            while len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+        return page
+
+    def stats(self):
+        with self._lock:
+            return {
+                "cached": list(self._pages),
+                "max_pages": self.max_pages,
+                "build_times_ms": {path: round(t * 1000, 1) for path, t in self.build_times.items()},
+            }
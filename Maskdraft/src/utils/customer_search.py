@@ -0,0 +1,33 @@
+from bisect import bisect_left, bisect_right
+
+# Treffer, die das Dropdown pro Eingabe höchstens anzeigt
+MAX_MATCHES = 20
+
+
+class CustomerSearch:
+    """
+    Präfixsuche über Kunden-IDs: eine sortierte Liste, in der alle IDs mit
+    demselben Präfix einen zusammenhängenden Bereich bilden. Dessen Grenzen
+    liefert bisect in O(log n), unabhängig von der Anzahl der Kunden.
+    """
+
+    def __init__(self, customer_ids):
+        # Groß/Kleinschreibung spielt bei der Eingabe keine Rolle
+        self.ids = sorted({str(cid) for cid in customer_ids}, key=lambda cid: (cid.upper(), cid))
+        self.keys = [cid.upper() for cid in self.ids]
+        self._known = set(self.ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def search(self, prefix, limit=MAX_MATCHES):
+        """
+        Die ersten `limit` Kunden-IDs, die mit prefix beginnen, sortiert
+        """
+        prefix = (prefix or "").strip().upper()
+        start = bisect_left(self.keys, prefix)
+        end = bisect_right(self.keys, prefix + "\uffff", lo=start)
+        return self.ids[start:min(end, start + limit)]
+
+    def __contains__(self, customer_id):
+        return customer_id in self._known
@@ -0,0 +1,59 @@
+import math
+import operator
+import re
+
+# Serverseitiges Blättern für DataTables mit page_action="custom": der
+# Browser bekommt nur die angezeigte Seite statt aller Zeilen. Sortieren und
+# Filtern müssen dann ebenfalls hier passieren (sort_action/filter_action
+# "custom"), sonst wirkten sie nur auf die aktuelle Seite.
+
+# Eine Bedingung aus filter_query, z. B. {Kunde} scontains C00 oder {Ø Bestellwert} s> 50
+_CONDITION = re.compile(
+    r"^\{(?P<column>[^}]+)\}\s+(?P<case>[si]?)(?P<op>contains|datestartswith|>=|<=|!=|=|<|>|eq|ne|ge|le|gt|lt)"
+    r"\s+(?P<value>.+)$"
+)
+
+_COMPARISONS = {
+    "=": operator.eq, "eq": operator.eq, "!=": operator.ne, "ne": operator.ne,
+    "<": operator.lt, "lt": operator.lt, "<=": operator.le, "le": operator.le,
+    ">": operator.gt, "gt": operator.gt, ">=": operator.ge, "ge": operator.ge,
+}
+
+
+def _condition_mask(df, condition):
+    """
+    Zeilenauswahl für eine Bedingung; unlesbare Bedingungen filtern nichts
+    """
+    match = _CONDITION.match(condition.strip())
+    if match is None or match["column"] not in df:
+        return None
+    series = df[match["column"]]
+    value = match["value"].strip()
+    if len(value) > 1 and value[0] == value[-1] and value[0] in "\"'`":
+        value = value[1:-1]
+    if match["op"] == "contains":
+        return series.astype(str).str.contains(value, case=match["case"] != "i", regex=False)
+    if match["op"] == "datestartswith":
+        return series.astype(str).str.startswith(value)
+    if series.dtype.kind in "iuf":
+        try:
+            value = float(value)
+        except ValueError:
+            return None
+    return _COMPARISONS[match["op"]](series, value)
+
+
+def table_page(df, page_current, page_size, sort_by=None, filter_query=None):
+    """
+    Eine Seite von df als Records plus die Seitenzahl, gefiltert nach
+    filter_query und sortiert nach sort_by der DataTable
+    """
+    for condition in (filter_query or "").split(" && "):
+        mask = _condition_mask(df, condition) if condition else None
+        if mask is not None:
+            df = df[mask]
+    if sort_by:
+        df = df.sort_values([column["column_id"] for column in sort_by],
+                            ascending=[column["direction"] == "asc" for column in sort_by], kind="stable")
+    start = (page_current or 0) * page_size
+    return df.iloc[start:start + page_size].to_dict("records"), max(math.ceil(len(df) / page_size), 1)
@@ -0,0 +1,117 @@
+import json
+import threading
+from functools import lru_cache
+import numpy as np
+import pool
+from db import query_db
+from shared.basket import DEFAULT_MAX_SIZE, Baskets, frequent_itemsets, popcount_rows
+
+# The baskets the miner of shared/basket.py works on, from the basket store
+# build_db.py writes next to app.db or, while that is missing, from
+# order_lines, plus the per-version cache of mined itemsets.
+
+# Upper bound for max_size; beyond that the itemsets are too rare to matter
+MAX_ITEMSET_SIZE = 6
+
+
+class BasketStore:
+    """
+    The per-order arrays build_db.py writes next to app.db, memory-mapped
+    read-only: order_ids, masks, store_codes and days (days since 1970-01-01)
+    are aligned row by row; store_codes index store_ids.
+    """
+
+    def __init__(self, directory):
+        meta = json.loads((directory / "meta.json").read_text())
+        self.data_version = meta["data_version"]
+        self.skus = np.load(directory / "skus.npy").tolist()
+        self.store_ids = np.load(directory / "store_ids.npy").tolist()
+        for name in ("order_ids", "masks", "store_codes", "days"):
+            setattr(self, name, np.load(directory / f"{name}.npy", mmap_mode="r"))
+        self.sku_pos = {sku: i for i, sku in enumerate(self.skus)}
+
+    def mask_of(self, skus):
+        """
+        Bitmask of a list of SKUs; KeyError for an unknown SKU
+        """
+        mask = 0
+        for sku in skus:
+            mask |= 1 << self.sku_pos[sku]
+        return mask
+
+    def containing(self, mask):
+        """
+        Boolean row selector of the orders that contain every SKU of the mask
+        """
+        mask = np.uint64(mask)
+        return (self.masks & mask) == mask
+
+    def basket_sizes(self):
+        return popcount_rows(np.asarray(self.masks)[:, None])
+
+
+def open_store(directory=None):
+    """
+    Map the basket store, or return None if build_db.py has not written one.
+    It lives next to the database the pool currently serves, see
+    project/database/basket_store.py.
+    """
+    try:
+        return BasketStore(directory or pool.DB_PATH.with_suffix(".baskets"))
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+_store = open_store()
+_store_lock = threading.Lock()
+
+
+def get_store(version):
+    """
+    Return the basket store if it belongs to the given data version. After an
+    ingest the files are replaced, so a mismatch triggers one remap.
+    """
+    global _store
+    with _store_lock:
+        if _store is None or _store.data_version != version:
+            store = open_store()
+            _store = store if store is not None and store.data_version == version else None
+        return _store
+
+
+# Fallback source of the baskets while the basket store is missing or outdated
+SKUS_QUERY = "SELECT SKU FROM products ORDER BY SKU"
+ORDER_LINES_QUERY = "SELECT orderID, SKU FROM order_lines"
+
+_baskets = None
+_baskets_version = None
+_baskets_lock = threading.Lock()
+
+
+def get_baskets(version):
+    """
+    Return the baskets for the given data version, from the basket store when
+    it is current and from order_lines otherwise
+    """
+    global _baskets, _baskets_version
+    with _baskets_lock:
+        if _baskets is None or version != _baskets_version:
+            store = get_store(version)
+            if store is not None:
+                _baskets = Baskets(store.skus, store.masks)
+            else:
+                lines = query_db(ORDER_LINES_QUERY)
+                _baskets = Baskets.from_lines([row["SKU"] for row in query_db(SKUS_QUERY)],
+                                              [line["orderID"] for line in lines], [line["SKU"] for line in lines])
+            _baskets_version = version
+        return _baskets
+
+
+@lru_cache(maxsize=32)
+def mine(version, min_support, max_size=DEFAULT_MAX_SIZE):
+    """
+    Frequent itemsets for a data version and threshold, memoized; the version
+    is part of the key, so a new build never sees stale results
+    """
+    baskets = get_baskets(version)
+    return baskets, frequent_itemsets(baskets, baskets.min_count(min_support), max_size)
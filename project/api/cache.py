@@ -0,0 +1,150 @@
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from flask import Response, g, request
+from db import query_db
+
+# Upper bound for all cached response bodies together; override via app.config["RESPONSE_CACHE_MAX_BYTES"]
+RESPONSE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Rebuilt for every response instead of being replayed from the cache entry
+_GENERATED_HEADERS = {"content-type", "content-length", "etag", "x-cache"}
+
+
+class ResponseCache:
+    """
+    LRU cache of finished GET responses keyed on path + query args. All
+    entries belong to one data version; a new version empties the cache.
+    """
+
+    def __init__(self, max_bytes=RESPONSE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.version = None
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def sync_version(self, version):
+        with self._lock:
+            if version != self.version:
+                self._entries.clear()
+                self.size = 0
+                self.version = version
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, version, body, mimetype, headers, etag):
+        # A single body larger than a quarter of the budget would flush everything else
+        if len(body) > self.max_bytes // 4:
+            return
+        with self._lock:
+            if version != self.version:
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old[0])
+            self._entries[key] = (body, mimetype, headers, etag)
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, (old_body, *_) = self._entries.popitem(last=False)
+                self.size -= len(old_body)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "data_version": self.version,
+            }
+
+
+def data_version():
+    """
+    Return the stamp build_db.py writes on every build or ingest
+    """
+    try:
+        row = query_db("SELECT value FROM build_meta WHERE key = 'data_version'", one=True)
+    except (sqlite3.OperationalError, IndexError):
+        return None
+    return row["value"]
+
+
+def exempt(view):
+    """
+    Mark a view whose response must never be served from the cache
+    """
+    view.response_cache_exempt = True
+    return view
+
+
+def _cache_key():
+    return request.path, tuple(sorted(request.args.items(multi=True)))
+
+
+def _cacheable_request(app):
+    if request.method != "GET" or request.endpoint is None:
+        return False
+    view = app.view_functions.get(request.endpoint)
+    return not getattr(view, "response_cache_exempt", False)
+
+
+def init_cache(app):
+    cache = ResponseCache(app.config.get("RESPONSE_CACHE_MAX_BYTES", RESPONSE_CACHE_MAX_BYTES))
+    app.extensions["response_cache"] = cache
+
+    @app.before_request
+    def serve_from_cache():
+        if not _cacheable_request(app):
+            return None
+        # Looked up on every request, hits included: a primary-key read on a
+        # pooled connection costs a few microseconds, next to a few hundred
+        # for serving the hit, and an ingest by build_db.py then shows on
+        # the very next request without any signal to the API
+        version = data_version()
+        if version is None:
+            return None
+        cache.sync_version(version)
+        g.response_cache_key = _cache_key()
+        g.response_cache_version = version
+        entry = cache.get(g.response_cache_key)
+        if entry is None:
+            return None
+        body, mimetype, headers, etag = entry
+        response = Response(body, mimetype=mimetype, headers=headers)
+        response.set_etag(etag)
+        response.headers["X-Cache"] = "HIT"
+        g.response_cache_hit = True
+        return response.make_conditional(request)
+
+    @app.after_request
+    def store_in_cache(response):
+        key = g.get("response_cache_key")
+        if key is None or g.get("response_cache_hit") or response.status_code != 200:
+            return response
+        # Streamed bodies are not buffered; caching them would defeat the streaming
+        if response.is_streamed:
+            return response
+        body = response.get_data()
+        etag = hashlib.sha256(g.response_cache_version.encode() + body).hexdigest()[:32]
+        response.set_etag(etag)
+        response.headers["X-Cache"] = "MISS"
+        headers = [(name, value) for name, value in response.headers
+                   if name.lower() not in _GENERATED_HEADERS]
+        cache.put(key, g.response_cache_version, body, response.mimetype, headers, etag)
+        return response.make_conditional(request)
+
+    return cache
@@ -1,14 +1,33 @@
-import sqlite3
-from pathlib import Path
+from pool import DB_PATH, get_connection
 
-DB_PATH = Path(__file__).resolve().parents[2] / "app.db"
+STREAM_BATCH_SIZE = 1000
 
 def query_db(query, args=(), one=False):
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    cur = conn.cursor()
-    cur.execute(query, args)
-    result = cur.fetchall()
-    conn.close()
+    cur = get_connection().execute(query, args)
+    try:
+        result = cur.fetchall()
+    finally:
+        cur.close()
     result = [dict(row) for row in result]
     return result[0] if one else result
+
+def stream_db(query, args=(), batch_size=STREAM_BATCH_SIZE):
+    """
+    Like query_db, but yield rows as dicts in fetchmany batches instead of
+    materializing the whole result. The query runs immediately, so SQL errors
+    surface before the first row is consumed.
+    """
+    cur = get_connection().execute(query, args)
+
+    def rows():
+        try:
+            while True:
+                batch = cur.fetchmany(batch_size)
+                if not batch:
+                    break
+                for row in batch:
+                    yield dict(row)
+        finally:
+            cur.close()
+
+    return rows()
@@ -0,0 +1,28 @@
+import threading
+from db import query_db
+from shared.grid_index import StoreCustomerIndex
+
+CUSTOMERS_QUERY = "SELECT customerID, latitude, longitude FROM customers WHERE latitude IS NOT NULL"
+STORES_QUERY = "SELECT storeID, latitude, longitude FROM stores"
+
+_index = None
+_index_version = None
+_index_lock = threading.Lock()
+
+
+def get_index(version):
+    """
+    Return the index for the given data version, building it on first use
+    and again whenever build_db.py has stamped a new version
+    """
+    global _index, _index_version
+    with _index_lock:
+        if _index is None or version != _index_version:
+            customers = query_db(CUSTOMERS_QUERY)
+            stores = query_db(STORES_QUERY)
+            _index = StoreCustomerIndex(
+                [c["customerID"] for c in customers], [c["latitude"] for c in customers],
+                [c["longitude"] for c in customers], [s["storeID"] for s in stores],
+                [s["latitude"] for s in stores], [s["longitude"] for s in stores])
+            _index_version = version
+        return _index
@@ -0,0 +1,34 @@
+import threading
+from db import query_db
+from shared.kpis import FIELDS, StoreKpis
+
+# The KPI sums of shared/kpis.py, loaded once per data version from
+# rollup_store_day, which build_db.py keeps up to date on every ingest.
+
+KPI_QUERIES = (
+    "SELECT storeID, day, orders, items, revenue, new_customers FROM rollup_store_day",
+    "SELECT storeID, state, state_abbr FROM stores ORDER BY storeID",
+)
+
+_kpis = None
+_kpis_version = None
+_kpis_lock = threading.Lock()
+
+
+def get_store_kpis(version):
+    """
+    Return the KPI sums for the given data version, loading them on first
+    use and again whenever build_db.py has stamped a new version
+    """
+    global _kpis, _kpis_version
+    with _kpis_lock:
+        if _kpis is None or version != _kpis_version:
+            cells, stores = (query_db(query) for query in KPI_QUERIES)
+            _kpis = StoreKpis(
+                [row["storeID"] for row in stores],
+                [row["state"] for row in stores],
+                [row["state_abbr"] for row in stores],
+                {name: [row[name] for row in cells] for name in ("day", "storeID") + FIELDS},
+            )
+            _kpis_version = version
+        return _kpis
@@ -0,0 +1,236 @@
+import base64
+import json
+import threading
+from collections import OrderedDict
+from flask import current_app, jsonify, request
+from cache import data_version
+from db import query_db, stream_db
+from streaming import stream_json
+
+# Paging is opt-in: without ?limit= and ?cursor= a list endpoint returns its
+# whole result as it did before paging existed. Once a client asks for
+# pages, these sizes apply; both can be overridden per app via
+# app.config["DEFAULT_PAGE_SIZE"] / ["MAX_PAGE_SIZE"]
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Ordered results of aggregated queries (materialize=True) kept for the
+# current data version, so paging through a GROUP BY runs it only once
+MATERIALIZED_MAX_RESULTS = 32
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class PaginationError(ValueError):
+    pass
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token, n_values):
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw)
+    except ValueError:
+        raise PaginationError("invalid cursor")
+    if not isinstance(values, list) or len(values) != n_values:
+        raise PaginationError("invalid cursor")
+    return values
+
+
+def _page_size(default_limit, max_limit):
+    """
+    Rows per page, or None when the client asked for neither ?limit= nor
+    ?cursor= and gets the full result
+    """
+    config = current_app.config
+    max_limit = max_limit or config.get("MAX_PAGE_SIZE", MAX_PAGE_SIZE)
+    default_limit = default_limit or config.get("DEFAULT_PAGE_SIZE", DEFAULT_PAGE_SIZE)
+    limit = request.args.get("limit")
+    if limit is None:
+        if request.args.get("cursor") is None:
+            return None
+        return min(default_limit, max_limit)
+    try:
+        limit = int(limit)
+    except ValueError:
+        raise PaginationError("limit must be an integer")
+    if limit < 1:
+        raise PaginationError("limit must be positive")
+    return min(limit, max_limit)
+
+
+def _seek_clause(order_by):
+    """
+    Build the keyset predicate "row comes after the cursor" for a mixed
+    ASC/DESC ordering: (a > ?) OR (a = ? AND b < ?) OR ...
+    """
+    terms, n_args = [], []
+    for i, (column, direction) in enumerate(order_by):
+        op = "<" if direction == "DESC" else ">"
+        equal = [f"{col} = ?" for col, _ in order_by[:i]]
+        terms.append("(" + " AND ".join(equal + [f"{column} {op} ?"]) + ")")
+        n_args.extend(range(i + 1))
+    return " OR ".join(terms), n_args
+
+
+def page_sql(query, order_by, seek=False):
+    """
+    The SQL paginate() runs for `query`: ordered by `order_by` and, with
+    seek=True, restricted to the rows after a cursor. Returns (sql, value_idx),
+    where value_idx maps the placeholders of the seek clause to cursor values.
+    """
+    sql = f"SELECT * FROM ({query})"
+    value_idx = []
+    if seek:
+        where, value_idx = _seek_clause(order_by)
+        sql += f" WHERE {where}"
+    return sql + " ORDER BY " + ", ".join(f"{column} {direction}" for column, direction in order_by), value_idx
+
+
+def served_sql(query, order_by, args=(), materialize=False):
+    """
+    The statements paginate() runs for `query` as (sql, args): the whole
+    ordered result and, unless materialized, a page after a cursor, with
+    None standing in for the cursor values. Used by the build's query plan
+    report, see project/database/query_plans.py.
+    """
+    args = tuple(args)
+    statements = [(page_sql(query, order_by)[0], args)]
+    if not materialize:
+        sql, value_idx = page_sql(query, order_by, seek=True)
+        statements.append((sql + " LIMIT ?", args + (None,) * len(value_idx) + (DEFAULT_PAGE_SIZE + 1,)))
+    return statements
+
+
+def _precedes(a, b, order_by):
+    """
+    True if sort key a comes before sort key b, comparing like SQLite's
+    ORDER BY (NULL first in ascending order)
+    """
+    for x, y, (_, direction) in zip(a, b, order_by):
+        if x == y:
+            continue
+        less = x is None or (y is not None and x < y)
+        return less != (direction == "DESC")
+    return False
+
+
+class _Materialized:
+    """
+    LRU of ordered query results for one data version
+    """
+
+    def __init__(self, max_results=MATERIALIZED_MAX_RESULTS):
+        self.max_results = max_results
+        self.version = None
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, query, order_by, args):
+        version = data_version()
+        key = (query, tuple(order_by), args)
+        with self._lock:
+            if version != self.version:
+                self._results.clear()
+                self.version = version
+            rows = self._results.get(key)
+            if rows is not None:
+                self._results.move_to_end(key)
+                return rows
+        rows = query_db(page_sql(query, order_by)[0], args)
+        with self._lock:
+            if version == self.version:
+                self._results[key] = rows
+                while len(self._results) > self.max_results:
+                    self._results.popitem(last=False)
+        return rows
+
+
+_materialized = _Materialized()
+
+
+def _materialized_page(query, order_by, args, values, limit):
+    rows = _materialized.get(query, order_by, args)
+    columns = [column for column, _ in order_by]
+    start = 0
+    if values is not None:
+        # First row after the cursor; the rows are sorted, so bisect
+        lo, hi = 0, len(rows)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if _precedes(values, [rows[mid][column] for column in columns], order_by):
+                hi = mid
+            else:
+                lo = mid + 1
+        start = lo
+    if limit is None:
+        return rows[start:], None
+    page = rows[start:start + limit]
+    next_cursor = None
+    if start + limit < len(rows):
+        next_cursor = encode_cursor([page[-1][column] for column in columns])
+    return page, next_cursor
+
+
+def paginate(query, order_by, args=(), default_limit=None, max_limit=None, stream=False, materialize=False):
+    """
+    Run one page of `query` (a SELECT without ORDER BY) ordered by `order_by`,
+    a list of (column, "ASC"|"DESC") whose last entry must be unique per row.
+    The page starts after the ?cursor= token and holds at most ?limit= rows;
+    without either the whole result is returned. Aggregated queries pass
+    materialize=True: their ordered result is computed once per data version
+    and pages are slices of it instead of a new GROUP BY per page. With
+    stream=True the whole result is still streamed from the database rather
+    than held as a list, so only paging materializes it.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    limit = _page_size(default_limit, max_limit)
+    columns = [column for column, _ in order_by]
+    args = tuple(args)
+    token = request.args.get("cursor")
+    values = decode_cursor(token, len(order_by)) if token else None
+
+    if materialize and (limit is not None or not stream):
+        return _materialized_page(query, order_by, args, values, limit)
+
+    sql, value_idx = page_sql(query, order_by, seek=values is not None)
+    if values is not None:
+        args += tuple(values[i] for i in value_idx)
+
+    if limit is None:
+        return (stream_db(sql, args) if stream else query_db(sql, args)), None
+
+    if not stream:
+        rows = query_db(sql + " LIMIT ?", args + (limit + 1,))
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor([rows[-1][column] for column in columns])
+        return rows, next_cursor
+
+    # Headers go out before the body, so look up the page boundary first:
+    # the last row of this page and whether anything follows it
+    boundary = query_db(
+        f"SELECT {', '.join(columns)} FROM ({sql}) LIMIT 2 OFFSET ?", args + (limit - 1,)
+    )
+    next_cursor = None
+    if len(boundary) == 2:
+        next_cursor = encode_cursor([boundary[0][column] for column in columns])
+    return stream_db(sql + " LIMIT ?", args + (limit,)), next_cursor
+
+
+def paginated_response(query, order_by, args=(), default_limit=None, max_limit=None, stream=False,
+                       materialize=False):
+    """
+    Return a JSON list response for one page; the token for the following
+    page travels in the X-Next-Cursor header so the body stays a plain list
+    """
+    rows, next_cursor = paginate(query, order_by, args, default_limit, max_limit, stream, materialize)
+    response = stream_json(rows) if stream else jsonify(rows)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return response
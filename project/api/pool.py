@@ -0,0 +1,103 @@
+import sqlite3
+import threading
+import weakref
+from pathlib import Path
+from shared.sqlfuncs import register_functions
+
+DB_PATH = Path(__file__).resolve().parents[2] / "app.db"
+
+# PRAGMAs applied to every new connection; tune them with configure_pool()
+PRAGMAS = {
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64 * 1024,  # negative = KiB, so 64 MiB page cache
+    "temp_store": "MEMORY",
+    "query_only": 1,
+}
+# Connections kept around after their thread finished, ready for the next one
+MAX_IDLE = 16
+
+_local = threading.local()
+_lock = threading.Lock()
+_idle = []
+_generation = 0
+_stats = {"hits": 0, "misses": 0, "opened": 0}
+
+
+class _Lease:
+    """
+    Binds one connection to one thread. When the thread ends its thread-local
+    storage is dropped and the finalizer hands the connection back to the pool.
+    """
+
+    def __init__(self, conn, generation):
+        self.conn = conn
+        self.generation = generation
+        weakref.finalize(self, _release, conn, generation)
+
+
+def _release(conn, generation):
+    with _lock:
+        if generation == _generation and len(_idle) < MAX_IDLE:
+            _idle.append(conn)
+            return
+    conn.close()
+
+
+def _connect():
+    conn = sqlite3.connect(f"{DB_PATH.as_uri()}?mode=ro", uri=True, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    register_functions(conn)
+    for name, value in PRAGMAS.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+    return conn
+
+
+def get_connection():
+    """
+    Return the connection owned by the current thread. A thread reuses its own
+    connection, then an idle one left behind by a finished thread, and only
+    opens a new connection when the pool is empty.
+    """
+    lease = getattr(_local, "lease", None)
+    with _lock:
+        if lease is not None and lease.generation == _generation:
+            _stats["hits"] += 1
+            return lease.conn
+        generation = _generation
+        conn = _idle.pop() if _idle else None
+        _stats["hits" if conn is not None else "misses"] += 1
+    if conn is None:
+        conn = _connect()
+        with _lock:
+            _stats["opened"] += 1
+    _local.lease = _Lease(conn, generation)
+    return conn
+
+
+def configure_pool(db_path=None, **pragmas):
+    """
+    Change the database path and/or PRAGMAs and retire all pooled connections
+    """
+    global DB_PATH
+    if db_path is not None:
+        DB_PATH = Path(db_path)
+    PRAGMAS.update(pragmas)
+    close_all()
+
+
+def close_all():
+    """
+    Close idle connections and retire busy ones; threads reconnect on their next query
+    """
+    global _generation
+    with _lock:
+        _generation += 1
+        conns = list(_idle)
+        _idle.clear()
+    for conn in conns:
+        conn.close()
+
+
+def pool_stats():
+    with _lock:
+        return {**_stats, "idle": len(_idle), "generation": _generation}
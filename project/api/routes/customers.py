@@ -1,101 +1,117 @@
-from flask import Blueprint, jsonify
-from db import query_db
+from flask import Blueprint
+from pagination import paginated_response
 
 customers_bp = Blueprint("customers", __name__)
 
 # 1. GET /api/customers: Geographic distribution
+CUSTOMERS_QUERY = """
+    SELECT customerID, latitude, longitude FROM customers
+"""
+CUSTOMERS_ORDER = [("customerID", "ASC")]
+
+
 @customers_bp.route("/api/customers")
 def get_customers_geo_distribution():
     """
     Return all customers with their geolocation data
     """
-    data = query_db("""
-        SELECT customerID, latitude, longitude FROM customers
-    """)
-    return jsonify(data)
+    # The map view wants everything at once, so this endpoint allows big pages
+    return paginated_response(CUSTOMERS_QUERY, CUSTOMERS_ORDER, default_limit=50000, max_limit=50000, stream=True)
 
 
 # 2. GET /api/customers/density: Density by state/city
+DENSITY_QUERY = """
+    SELECT 
+    s.state, 
+    s.city, 
+    COUNT(DISTINCT o.customerID) AS count
+    FROM orders o
+    JOIN stores s ON o.storeID = s.storeID
+    GROUP BY s.state, s.city
+"""
+DENSITY_ORDER = [("state", "ASC"), ("city", "ASC")]
+
+
 @customers_bp.route("/api/customers/density")
 def get_customer_density():
     """
     Return number of customers per state/city
     """
-    data = query_db("""
-        SELECT 
-        s.state, 
-        s.city, 
-        COUNT(DISTINCT o.customerID) AS count
-        FROM orders o
-        JOIN stores s ON o.storeID = s.storeID
-        GROUP BY s.state, s.city
-    """)
-    return jsonify(data)
+    return paginated_response(DENSITY_QUERY, DENSITY_ORDER, materialize=True)
 
 
 # 3. GET /api/customers/top: Top customers by purchase frequency
+TOP_QUERY = """
+    SELECT 
+    c.customerID, 
+    COUNT(*) AS order_count
+    FROM customers c
+    JOIN orders o ON o.customerID = c.customerID
+    GROUP BY c.customerID
+"""
+TOP_ORDER = [("order_count", "DESC"), ("customerID", "ASC")]
+
+
 @customers_bp.route("/api/customers/top")
 def get_top_customers():
     """
     Return customers sorted by number of orders
     """
-    data = query_db("""
-        SELECT 
-        c.customerID, 
-        COUNT(*) AS order_count
-        FROM customers c
-        JOIN orders o ON o.customerID = c.customerID
-        GROUP BY c.customerID
-        ORDER BY order_count DESC
-    """)
-    return jsonify(data)
+    return paginated_response(TOP_QUERY, TOP_ORDER, stream=True, materialize=True)
 
 
 # 4. GET /api/customers/avg_order: Average order value per customer
+AVG_ORDER_QUERY = """
+    SELECT customerID, AVG(total) as avg_order_value
+    FROM orders
+    GROUP BY customerID
+"""
+AVG_ORDER_ORDER = [("customerID", "ASC")]
+
+
 @customers_bp.route("/api/customers/avg_order")
 def get_avg_order_value_per_customer():
     """
     Return average order value per customer
     """
-    data = query_db("""
-        SELECT customerID, AVG(total) as avg_order_value
-        FROM orders
-        GROUP BY customerID
-    """)
-    return jsonify(data)
+    return paginated_response(AVG_ORDER_QUERY, AVG_ORDER_ORDER, stream=True, materialize=True)
 
 
 # 5. GET /api/customers/recurring: Recurring customers
+RECURRING_QUERY = """
+    SELECT 
+    customerID, 
+    COUNT(*) AS order_count
+    FROM orders
+    GROUP BY customerID
+    HAVING COUNT(*) > 1
+"""
+RECURRING_ORDER = [("order_count", "ASC"), ("customerID", "ASC")]
+
+
 @customers_bp.route("/api/customers/recurring")
 def get_recurring_customers():
     """
     Return customers with more than one order
     """
-    data = query_db("""
-        SELECT 
+    return paginated_response(RECURRING_QUERY, RECURRING_ORDER, materialize=True)
+
+# 6. GET /api/customers/onetime: One-time customers
+ONETIME_QUERY = """
+    SELECT 
         customerID, 
         COUNT(*) AS order_count
-        FROM orders
-        GROUP BY customerID
-        HAVING COUNT(*) > 1
-        ORDER BY order_count ASC
-    """)
-    return jsonify(data)
+    FROM orders
+    GROUP BY customerID
+    HAVING COUNT(*) = 1
+"""
+ONETIME_ORDER = [("customerID", "ASC")]
+
 
-# 6. GET /api/customers/onetime: One-time customers
 @customers_bp.route("/api/customers/onetime")
 def get_onetime_customers():
     """
     Return customers who placed exactly one order
     """
-    data = query_db("""
-        SELECT 
-            customerID, 
-            COUNT(*) AS order_count
-        FROM orders
-        GROUP BY customerID
-        HAVING COUNT(*) = 1
-        ORDER BY customerID ASC
-    """)
-    return jsonify(data)
+    return paginated_response(ONETIME_QUERY, ONETIME_ORDER, materialize=True)
 #idee auswertungen für one time kunden, die geografische verteilung zeigen + stores, wo das oft passiert
\ No newline at end of file
@@ -0,0 +1,233 @@
+import math
+from flask import Blueprint, jsonify, request
+from cache import data_version
+from db import query_db
+from geo_index import get_index
+from pagination import paginated_response
+from shared.grid_index import MAX_RADIUS_KM
+from shared.whitespots import candidate_sites, growth_cells, whitespot_cells
+from whitespots import MAX_CELL_KM, MIN_CELL_KM, customer_order_counts
+
+geo_bp = Blueprint("geo", __name__)
+
+
+def _not_found(kind, key):
+    return jsonify({"error": f"unknown {kind} {key!r}"}), 404
+
+
+def _number_arg(name, default, type):
+    """
+    Read ?name= as `type`, or `default` when it is missing; None if it is not
+    a number, so a typo is rejected instead of silently replaced
+    """
+    value = request.args.get(name)
+    if value is None:
+        return default
+    try:
+        return type(value)
+    except ValueError:
+        return None
+
+
+def _grid_args():
+    """
+    Read ?cell_km= (default 25) and ?limit= (default 50); None if invalid or
+    out of range
+    """
+    cell_km = _number_arg("cell_km", 25, float)
+    limit = _number_arg("limit", 50, int)
+    if cell_km is None or limit is None or not MIN_CELL_KM <= cell_km <= MAX_CELL_KM or limit < 1:
+        return None, None
+    return cell_km, limit
+
+
+def _bad_grid():
+    return jsonify({"error": f"cell_km must be between {MIN_CELL_KM} and {MAX_CELL_KM}, limit at least 1"}), 400
+
+
+def _radius_arg():
+    """
+    Read ?km= (default 50); None unless finite and within [0, MAX_RADIUS_KM]
+    """
+    radius_km = _number_arg("km", 50, float)
+    if radius_km is None or not math.isfinite(radius_km) or not 0 <= radius_km <= MAX_RADIUS_KM:
+        return None
+    return radius_km
+
+
+def _customers_json(index, positions, dist):
+    return jsonify([
+        {"customerID": cid, "distance_km": round(float(d), 3)}
+        for cid, d in zip(index.customer_ids[positions].tolist(), dist.tolist())
+    ])
+
+
+def _cells_json(cells, limit, digits):
+    """
+    Turn the column arrays of a cell ranking into at most `limit` row dicts
+    """
+    columns = {name: values[:limit].tolist() for name, values in cells.items()}
+    return jsonify([
+        {name: round(value, digits.get(name, 4)) if isinstance(value, float) else value
+         for name, value in zip(columns, row)}
+        for row in zip(*columns.values())
+    ])
+
+
+# 1. GET /api/geo/within_radius: Customers within a radius around a store
+@geo_bp.route("/api/geo/within_radius")
+def get_customers_within_radius():
+    """
+    Return all customers within ?km= (default 50) of ?store=, nearest first
+    """
+    radius_km = _radius_arg()
+    if radius_km is None:
+        return jsonify({"error": f"km must be a number between 0 and {MAX_RADIUS_KM:.0f}"}), 400
+    index = get_index(data_version())
+    store_id = request.args.get("store")
+    if store_id not in index.store_pos:
+        return _not_found("store", store_id)
+    return _customers_json(index, *index.within_radius(store_id, radius_km))
+
+
+# 2. GET /api/geo/nearest_store: Closest store for a customer
+NEAREST_STORE_QUERY = """
+    SELECT customerID, storeID, ROUND(distance_km, 3) AS distance_km
+    FROM customer_assignments
+    WHERE customerID = ?
+"""
+
+
+@geo_bp.route("/api/geo/nearest_store")
+def get_nearest_store():
+    """
+    Return the store closest to ?customer=, precomputed by build_db.py
+    """
+    customer_id = request.args.get("customer")
+    data = query_db(NEAREST_STORE_QUERY, (customer_id,))
+    if not data:
+        return _not_found("customer", customer_id)
+    return jsonify(data[0])
+
+
+# 3. GET /api/geo/k_nearest_customers: The k customers closest to a store
+@geo_bp.route("/api/geo/k_nearest_customers")
+def get_k_nearest_customers():
+    """
+    Return the ?k= (default 10) customers closest to ?store=, nearest first
+    """
+    k = _number_arg("k", 10, int)
+    if k is None or k < 1:
+        return jsonify({"error": "k must be an integer of at least 1"}), 400
+    index = get_index(data_version())
+    store_id = request.args.get("store")
+    if store_id not in index.store_pos:
+        return _not_found("store", store_id)
+    return _customers_json(index, *index.k_nearest_customers(store_id, k))
+
+
+# 4. GET /api/geo/assignments: Nearest-store assignment of every customer
+ASSIGNMENTS_ORDER = [("customerID", "ASC")]
+
+
+def assignments_query(by_store):
+    return f"""
+        SELECT customerID, storeID, ROUND(distance_km, 3) AS distance_km
+        FROM customer_assignments
+        {"WHERE storeID = ?" if by_store else ""}
+    """
+
+
+@geo_bp.route("/api/geo/assignments")
+def get_assignments():
+    """
+    Return customers with their nearest store, optionally only for ?store=
+    """
+    store_id = request.args.get("store")
+    return paginated_response(assignments_query(store_id), ASSIGNMENTS_ORDER, args=(store_id,) if store_id else ())
+
+
+# 5. GET /api/geo/assignments/summary: Assigned customers per store
+ASSIGNMENT_SUMMARY_QUERY = """
+    SELECT s.storeID, s.city, s.state,
+           COUNT(a.customerID) AS customer_count,
+           ROUND(AVG(a.distance_km), 2) AS avg_distance_km,
+           ROUND(MAX(a.distance_km), 2) AS max_distance_km
+    FROM stores s
+    LEFT JOIN customer_assignments a ON a.storeID = s.storeID
+    GROUP BY s.storeID
+"""
+ASSIGNMENT_SUMMARY_ORDER = [("customer_count", "DESC"), ("storeID", "ASC")]
+
+
+@geo_bp.route("/api/geo/assignments/summary")
+def get_assignment_summary():
+    """
+    Return per store the number of customers it is nearest to and their distances
+    """
+    return paginated_response(ASSIGNMENT_SUMMARY_QUERY, ASSIGNMENT_SUMMARY_ORDER, materialize=True)
+
+
+# 6. GET /api/geo/whitespots: Grid cells with many customers far from any store
+@geo_bp.route("/api/geo/whitespots")
+def get_whitespots():
+    """
+    Return the ?limit= most underserved cells of a ?cell_km= grid, ranked by
+    customers x distance of the cell center to the nearest store
+    """
+    cell_km, limit = _grid_args()
+    if cell_km is None:
+        return _bad_grid()
+    index = get_index(data_version())
+    if not len(index.customer_ids) or not len(index.store_ids):
+        return jsonify([])
+    cells = whitespot_cells(index.customers.lats, index.customers.lons,
+                            index.store_lats, index.store_lons, cell_km)
+    return _cells_json(cells, limit, {"distance_km": 2, "score": 1})
+
+
+# 7. GET /api/geo/candidates: Suggested locations for new stores
+@geo_bp.route("/api/geo/candidates")
+def get_candidate_sites():
+    """
+    Return ?n= (default 5) cell centers that, opened one after another, cut
+    the customers' total distance to their nearest store the most
+    """
+    cell_km, _ = _grid_args()
+    if cell_km is None:
+        return _bad_grid()
+    n_sites = _number_arg("n", 5, int)
+    if n_sites is None or n_sites < 1:
+        return jsonify({"error": "n must be an integer of at least 1"}), 400
+    index = get_index(data_version())
+    if not len(index.customer_ids) or not len(index.store_ids):
+        return jsonify([])
+    sites = candidate_sites(index.customers.lats, index.customers.lons,
+                            index.store_lats, index.store_lons, cell_km, n_sites)
+    return jsonify([
+        {**site, "latitude": round(site["latitude"], 4), "longitude": round(site["longitude"], 4),
+         "distance_saved_km": round(site["distance_saved_km"], 1)}
+        for site in sites
+    ])
+
+
+# 8. GET /api/geo/growth: Cells with below-average orders per customer
+@geo_bp.route("/api/geo/growth")
+def get_growth_cells():
+    """
+    Return the ?limit= cells with at least ?min_customers= (default 10)
+    customers whose orders per customer lag the overall average the most
+    """
+    cell_km, limit = _grid_args()
+    if cell_km is None:
+        return _bad_grid()
+    min_customers = _number_arg("min_customers", 10, int)
+    if min_customers is None or min_customers < 0:
+        return jsonify({"error": "min_customers must be a non-negative integer"}), 400
+    version = data_version()
+    index = get_index(version)
+    if not len(index.customer_ids):
+        return jsonify([])
+    cells = growth_cells(index.customers.lats, index.customers.lons,
+                         customer_order_counts(index, version), cell_km, min_customers)
+    return _cells_json(cells, limit, {"orders_per_customer": 2, "missing_orders": 1})
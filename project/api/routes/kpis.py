@@ -0,0 +1,64 @@
+from datetime import date
+from flask import Blueprint, jsonify, request
+from cache import data_version
+from kpis import get_store_kpis
+
+kpis_bp = Blueprint("kpis", __name__)
+
+
+# 1. GET /api/kpis: Headline KPIs for a period
+@kpis_bp.route("/api/kpis")
+def get_kpis():
+    """
+    Return orders, revenue, items, average order value and new customers
+    between ?from= and ?to= (YYYY-MM-DD, both optional), optionally only for
+    ?store= or ?state= (name or abbreviation). With both dates the previous
+    period of the same length and the growth against it are included;
+    both are null when that period would begin before the first order.
+    """
+    try:
+        start = date.fromisoformat(request.args["from"]) if request.args.get("from") else None
+        end = date.fromisoformat(request.args["to"]) if request.args.get("to") else None
+    except ValueError:
+        return jsonify({"error": "?from= and ?to= must be dates like 2023-01-31"}), 400
+    if start and end and start > end:
+        return jsonify({"error": "?from= must not be after ?to="}), 400
+
+    store_id, state = request.args.get("store"), request.args.get("state")
+    kpis = get_store_kpis(data_version())
+    current = _period(kpis.totals(start, end, store_id, state))
+    previous_period = kpis.previous_period(start, end) if start and end else None
+    previous = previous_period and _period(kpis.totals(*previous_period, store_id, state))
+    return jsonify({
+        "from": start.isoformat() if start else None,
+        "to": end.isoformat() if end else None,
+        "store": store_id,
+        "state": state,
+        **current,
+        "customers_to_date": kpis.totals(None, end, store_id, state)["new_customers"],
+        "previous": previous and {
+            "from": str(previous_period[0]),
+            "to": str(previous_period[1]),
+            **previous,
+        },
+        "growth": previous and {key: _growth(current[key], previous[key]) for key in current},
+    })
+
+
+def _period(totals):
+    orders, revenue, items = totals["orders"], totals["revenue"], totals["items"]
+    return {
+        "orders": orders,
+        "revenue": round(revenue, 2),
+        "items": items,
+        "avg_order_value": round(revenue / orders, 2) if orders else None,
+        "avg_items_per_order": round(items / orders, 3) if orders else None,
+        "new_customers": totals["new_customers"],
+    }
+
+
+def _growth(current, previous):
+    # Percent change; undefined without a non-zero previous value
+    if not previous or current is None:
+        return None
+    return round((current - previous) / previous * 100, 2)
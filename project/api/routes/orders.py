@@ -1,66 +1,285 @@
-from flask import Blueprint, jsonify
+import math
+from bisect import bisect_left
+from datetime import date, timedelta
+from flask import Blueprint, jsonify, request
+import numpy as np
+from basket import MAX_ITEMSET_SIZE, get_baskets, get_store, mine
+from cache import data_version
 from db import query_db
+from shared.basket import DEFAULT_MAX_SIZE, association_rules
 
 orders_bp = Blueprint("orders", __name__)
 
+# Per-SKU order counts per bucket, read from the rollups build_db.py maintains.
+# A week is keyed on its Monday so weeks spanning New Year stay whole, a
+# month on its YYYY-MM.
+VOLATILITY_BUCKETS = {
+    "day": ("rollup_sku_day", "day"),
+    "week": ("rollup_sku_day", "date(day, 'weekday 0', '-6 days')"),
+    "month": ("rollup_sku_month", "month"),
+}
+# One pass over the rollup: count, sum and sum of squares per SKU. The sums
+# are exact integers, so the variance has no cancellation error.
+VOLATILITY_QUERY = """
+    SELECT b.SKU, p.Name, MIN(b.bucket) AS first_bucket,
+           SUM(b.orders) AS total_orders, SUM(b.orders * b.orders) AS total_sq
+    FROM (
+        SELECT SKU, {key} AS bucket, SUM(orders) AS orders
+        FROM {table}
+        WHERE {key} <= ?
+        GROUP BY SKU, bucket
+    ) b
+    JOIN products p ON p.SKU = b.SKU
+    GROUP BY b.SKU
+"""
+# First and last day with orders; the buckets in between are generated, so a
+# bucket without any order still counts
+VOLATILITY_RANGE_QUERY = "SELECT MIN(day) AS first_day, MAX(day) AS last_day FROM rollup_sku_day"
+
+
 # 1. GET /api/orders/volatility: Products with high variance in order counts (all-time volatility)
-# How...............
 @orders_bp.route("/api/orders/volatility")
 def get_order_volatility():
     """
-    Return products with high variance in order count across all orders (all-time volatility)
+    Return products ranked by the coefficient of variation of their order
+    count per ?bucket= (day, week or month; default week). Buckets without
+    an order of the product count as zero from its first order on; the
+    bucket still in progress on the last day with orders is left out.
     """
-    data = query_db("""
-        //TODO
-    """)
+    bucket = request.args.get("bucket", "week")
+    if bucket not in VOLATILITY_BUCKETS:
+        return jsonify({"error": f"bucket must be one of {', '.join(VOLATILITY_BUCKETS)}"}), 400
+    table, key = VOLATILITY_BUCKETS[bucket]
+    span = query_db(VOLATILITY_RANGE_QUERY, one=True)
+    if span["first_day"] is None:
+        return jsonify([])
+    buckets = _bucket_range(bucket, date.fromisoformat(span["first_day"]), date.fromisoformat(span["last_day"]))
+    if not buckets:
+        return jsonify([])
+    stats = query_db(VOLATILITY_QUERY.format(table=table, key=key), (buckets[-1],))
+
+    data = []
+    for row in stats:
+        n = len(buckets) - bisect_left(buckets, row["first_bucket"])
+        mean = row["total_orders"] / n
+        # n * sum(x^2) - sum(x)^2 in integer arithmetic, divided only at the end
+        std = math.sqrt((n * row["total_sq"] - row["total_orders"] ** 2) / (n * n))
+        data.append({
+            "SKU": row["SKU"],
+            "Name": row["Name"],
+            "buckets": n,
+            "mean_orders": round(mean, 3),
+            "std_orders": round(std, 3),
+            "cv": round(std / mean, 4) if mean else None,
+        })
+    data.sort(key=lambda r: (r["cv"] is None, -(r["cv"] or 0), r["SKU"]))
     return jsonify(data)
 
 
+def _bucket_range(bucket, first_day, last_day):
+    """
+    Keys of every bucket from the one holding first_day up to the last one
+    that is complete on last_day, oldest first
+    """
+    if bucket == "day":
+        return [(first_day + timedelta(days=i)).isoformat() for i in range((last_day - first_day).days + 1)]
+    if bucket == "week":
+        monday = first_day - timedelta(days=first_day.weekday())
+        # Complete up to the last Sunday on or before last_day
+        sunday = last_day - timedelta(days=(last_day.weekday() + 1) % 7)
+        return [(monday + timedelta(days=i)).isoformat() for i in range(0, (sunday - monday).days + 1, 7)]
+    first = first_day.year * 12 + first_day.month - 1
+    last = last_day.year * 12 + last_day.month - 1
+    if (last_day + timedelta(days=1)).day != 1:
+        last -= 1
+    return [f"{m // 12:04d}-{m % 12 + 1:02d}" for m in range(first, last + 1)]
+
+
 # 2. GET /api/orders/avg_items: Average items per order
+AVG_ITEMS_QUERY = """
+    SELECT ROUND(AVG(total_items), 2) AS avg_items
+    FROM (
+        SELECT orderID, SUM(quantity) AS total_items
+        FROM orderItems
+        GROUP BY orderID
+    )
+"""
+
+
 @orders_bp.route("/api/orders/avg_items")
 def get_avg_items_per_order():
     """
     Return average number of items per order
     """
-    data = query_db("""
-        SELECT ROUND(AVG(total_items), 2) AS avg_items
-        FROM (
-            SELECT orderID, SUM(quantity) AS total_items
-            FROM orderItems
-            GROUP BY orderID
-        )
-    """)
+    data = query_db(AVG_ITEMS_QUERY)
     return jsonify(data)
 
 
 # 3. GET /api/orders/avg_value: Average order value
+AVG_VALUE_QUERY = """
+    SELECT ROUND(AVG(order_total), 2) AS avg_order_value
+    FROM (
+        SELECT orderID, SUM(revenue) AS order_total
+        FROM order_lines
+        GROUP BY orderID
+    )
+"""
+
+
 @orders_bp.route("/api/orders/avg_value")
 def get_avg_order_value():
     """
     Return average value per order
     """
-    data = query_db("""
-        SELECT ROUND(AVG(order_total), 2) AS avg_order_value
-        FROM (
-            SELECT o.orderID, SUM(p.Price * oi.quantity) AS order_total
-            FROM orders o
-            JOIN orderItems oi ON o.orderID = oi.orderID
-            JOIN products p ON oi.SKU = p.SKU
-            GROUP BY o.orderID
-        )
-    """)
+    data = query_db(AVG_VALUE_QUERY)
     return jsonify(data)
 
 
 # 4. GET /api/orders/basket: Frequently bought together
-# Was difficult because how do i query all subsets and sum them up?
-#"We want to see how often one or more products are bought together in orders, including all smaller groups, but counting all possible combinations is complex and hard to do efficiently with SQL alone."
+# Counting every SKU combination in SQL needs one self-join per item, so the
+# combinations are mined from per-order SKU bitmasks in basket.py instead.
 @orders_bp.route("/api/orders/basket")
 def get_frequently_bought_together():
     """
-    Return most common product pairs bought together
+    Return the ?limit= (default 50) most common product combinations of two
+    up to ?max_size= (default 3) products bought in at least ?min_support=
+    (default 0.01) of all orders
     """
-    data = query_db("""
-        //TODO
-    """)
-    return jsonify(data)
+    params = _basket_params()
+    if params is None:
+        return _bad_basket_params()
+    min_support, max_size, limit = params
+    baskets, frequent = mine(data_version(), min_support, max_size)
+    itemsets = sorted(((count, mask) for mask, count in frequent.items() if mask & (mask - 1)),
+                      key=lambda item: (-item[0], item[1]))
+    return jsonify([
+        {"SKUs": baskets.decode(mask), "orders": count, "support": round(count / baskets.n_orders, 5)}
+        for count, mask in itemsets[:limit]
+    ])
+
+
+# 5. GET /api/orders/basket/rules: Association rules between product combinations
+@orders_bp.route("/api/orders/basket/rules")
+def get_basket_rules():
+    """
+    Return rules "who buys these also buys those" from the same itemsets as
+    /api/orders/basket with at least ?min_confidence= (default 0.1) and
+    ?min_lift= (default 1), strongest lift first
+    """
+    params = _basket_params()
+    if params is None:
+        return _bad_basket_params()
+    min_support, max_size, limit = params
+    min_confidence = request.args.get("min_confidence", 0.1, type=float)
+    min_lift = request.args.get("min_lift", 1.0, type=float)
+    baskets, frequent = mine(data_version(), min_support, max_size)
+    rules = [rule for rule in association_rules(frequent, baskets.n_orders)
+             if rule[3] >= min_confidence and rule[4] >= min_lift]
+    rules.sort(key=lambda rule: (-rule[4], -rule[2], rule[0], rule[1]))
+    return jsonify([
+        {"antecedent": baskets.decode(antecedent), "consequent": baskets.decode(consequent),
+         "support": round(support, 5), "confidence": round(confidence, 4), "lift": round(lift, 4)}
+        for antecedent, consequent, support, confidence, lift in rules[:limit]
+    ])
+
+
+# 6. GET /api/orders/basket/containing: Orders that contain a set of products
+@orders_bp.route("/api/orders/basket/containing")
+def get_orders_containing():
+    """
+    Return how many orders contain all of ?skus= (comma-separated), overall
+    and per store, optionally only between ?from= and ?to= (YYYY-MM-DD)
+    """
+    store = get_store(data_version())
+    if store is None:
+        return _no_basket_store()
+    skus = [sku for sku in request.args.get("skus", "").split(",") if sku]
+    unknown = [sku for sku in skus if sku not in store.sku_pos]
+    if not skus or unknown:
+        return jsonify({"error": f"?skus= needs known SKUs, unknown: {unknown}"}), 400
+    rows = _date_rows(store)
+    if rows is None:
+        return jsonify({"error": "?from= and ?to= must be dates like 2023-01-31"}), 400
+    hits = store.containing(store.mask_of(skus)) & rows
+    per_store = np.bincount(store.store_codes[hits], minlength=len(store.store_ids))
+    n_orders = int(rows.sum())
+    return jsonify({
+        "skus": skus,
+        "orders": int(hits.sum()),
+        "share": round(int(hits.sum()) / n_orders, 5) if n_orders else None,
+        "by_store": [{"storeID": sid, "orders": int(n)}
+                     for sid, n in zip(store.store_ids, per_store.tolist()) if n],
+    })
+
+
+# 7. GET /api/orders/basket/pairs: Co-occurrence matrix of all products
+@orders_bp.route("/api/orders/basket/pairs")
+def get_pair_matrix():
+    """
+    Return for every pair of products the number of orders containing both;
+    the diagonal holds the orders per product
+    """
+    baskets = get_baskets(data_version())
+    return jsonify({"skus": baskets.skus, "counts": baskets.co_occurrence().tolist()})
+
+
+# 8. GET /api/orders/basket/stores: Basket statistics per store
+@orders_bp.route("/api/orders/basket/stores")
+def get_store_basket_stats():
+    """
+    Return per store the number of orders, the average number of distinct
+    products per order and the share of orders with more than one product,
+    optionally only between ?from= and ?to= (YYYY-MM-DD)
+    """
+    store = get_store(data_version())
+    if store is None:
+        return _no_basket_store()
+    rows = _date_rows(store)
+    if rows is None:
+        return jsonify({"error": "?from= and ?to= must be dates like 2023-01-31"}), 400
+    codes = store.store_codes[rows]
+    sizes = store.basket_sizes()[rows]
+    n_stores = len(store.store_ids)
+    orders = np.bincount(codes, minlength=n_stores)
+    products = np.bincount(codes, weights=sizes, minlength=n_stores)
+    multi = np.bincount(codes, weights=sizes > 1, minlength=n_stores)
+    return jsonify([
+        {"storeID": sid, "orders": int(n), "avg_products": round(p / n, 3), "multi_product_share": round(m / n, 4)}
+        for sid, n, p, m in zip(store.store_ids, orders.tolist(), products.tolist(), multi.tolist()) if n
+    ])
+
+
+def _date_rows(store):
+    """
+    Boolean selector of the orders within ?from= / ?to=; None for a bad date
+    """
+    rows = np.ones(len(store.days), dtype=bool)
+    try:
+        if request.args.get("from"):
+            rows &= store.days >= np.datetime64(request.args["from"], "D").astype(np.int64)
+        if request.args.get("to"):
+            rows &= store.days <= np.datetime64(request.args["to"], "D").astype(np.int64)
+    except ValueError:
+        return None
+    return rows
+
+
+def _no_basket_store():
+    return jsonify({"error": "basket store missing or outdated, rerun build_db.py"}), 503
+
+
+def _basket_params():
+    """
+    Read ?min_support=, ?max_size= and ?limit=; None if out of range
+    """
+    min_support = request.args.get("min_support", 0.01, type=float)
+    max_size = request.args.get("max_size", DEFAULT_MAX_SIZE, type=int)
+    limit = request.args.get("limit", 50, type=int)
+    if not 0 < min_support <= 1 or not 2 <= max_size <= MAX_ITEMSET_SIZE or limit < 1:
+        return None
+    return min_support, max_size, limit
+
+
+def _bad_basket_params():
+    return jsonify({"error": f"min_support must be in (0, 1], max_size between 2 and {MAX_ITEMSET_SIZE}, "
+                             "limit at least 1"}), 400
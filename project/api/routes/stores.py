@@ -1,99 +1,91 @@
-from flask import Blueprint, jsonify
-from db import query_db
+from flask import Blueprint, request
+from pagination import paginated_response
 
 stores_bp = Blueprint("stores", __name__)
 
 #Does this say anything? Because obviously stores that have opened longer have the advantage here!
+REVENUE_QUERY = """
+    SELECT s.storeID, s.city, s.state, ROUND(r.revenue, 2) AS total_revenue
+    FROM (
+        SELECT storeID, SUM(revenue) AS revenue
+        FROM rollup_store_month
+        GROUP BY storeID
+    ) r
+    JOIN stores s ON s.storeID = r.storeID
+"""
+REVENUE_ORDER = [("total_revenue", "DESC"), ("storeID", "ASC")]
+
 @stores_bp.route("/api/stores/revenue")
 def get_revenue_per_store():
-    data = query_db("""
-        SELECT s.storeID, s.city, s.state,
-               ROUND(SUM(oi.quantity * p.Price), 2) AS total_revenue
-        FROM stores s
-        JOIN orders o ON s.storeID = o.storeID
-        JOIN orderItems oi ON o.orderID = oi.orderID
-        JOIN products p ON oi.SKU = p.SKU
-        GROUP BY s.storeID
-        ORDER BY total_revenue DESC
-    """)
-    return jsonify(data)
+    return paginated_response(REVENUE_QUERY, REVENUE_ORDER, materialize=True)
+
+REVENUE_TREND_QUERY = """
+    SELECT storeID, month, ROUND(revenue, 2) AS monthly_revenue
+    FROM rollup_store_month
+"""
+REVENUE_TREND_ORDER = [("storeID", "ASC"), ("month", "ASC")]
 
 @stores_bp.route("/api/stores/revenue_trend")
 def get_revenue_trend():
-    data = query_db("""
-        SELECT s.storeID, strftime('%Y-%m', o.orderDate) AS month,
-               ROUND(SUM(oi.quantity * p.Price), 2) AS monthly_revenue
-        FROM stores s
-        JOIN orders o ON s.storeID = o.storeID
-        JOIN orderItems oi ON o.orderID = oi.orderID
-        JOIN products p ON oi.SKU = p.SKU
-        GROUP BY s.storeID, month
-        ORDER BY s.storeID, month
-    """)
-    return jsonify(data)
+    return paginated_response(REVENUE_TREND_QUERY, REVENUE_TREND_ORDER)
+
+STATE_MONTHLY_QUERY = """
+    SELECT state, month, ROUND(revenue, 2) AS monthly_revenue
+    FROM rollup_state_month
+"""
+STATE_MONTHLY_ORDER = [("state", "ASC"), ("month", "ASC")]
 
 @stores_bp.route("/api/stores/revenue_by_state_monthly")
 def get_revenue_by_state_monthly():
-    data = query_db("""
-        SELECT s.state,
-               strftime('%Y-%m', o.orderDate) AS month,
-               ROUND(SUM(oi.quantity * p.Price), 2) AS monthly_revenue
-        FROM stores s
-        JOIN orders o ON s.storeID = o.storeID
-        JOIN orderItems oi ON o.orderID = oi.orderID
-        JOIN products p ON oi.SKU = p.SKU
-        GROUP BY s.state, month
-        ORDER BY s.state, month
-    """)
-    return jsonify(data)
+    return paginated_response(STATE_MONTHLY_QUERY, STATE_MONTHLY_ORDER)
 
 #Does this approach also work? Latitude and longitude probably make more sense
+CUSTOMER_REACH_QUERY = """
+    SELECT s.storeID, s.city, s.state,
+           COUNT(DISTINCT o.customerID) AS customer_count
+    FROM stores s
+    JOIN orders o ON s.storeID = o.storeID
+    GROUP BY s.storeID
+"""
+CUSTOMER_REACH_ORDER = [("customer_count", "DESC"), ("storeID", "ASC")]
+
 @stores_bp.route("/api/stores/customer_reach")
 def get_customer_reach():
-    data = query_db("""
-        SELECT s.storeID, s.city, s.state,
-               COUNT(DISTINCT o.customerID) AS customer_count
-        FROM stores s
-        JOIN orders o ON s.storeID = o.storeID
-        GROUP BY s.storeID
-        ORDER BY customer_count DESC
-    """)
-    return jsonify(data)
+    return paginated_response(CUSTOMER_REACH_QUERY, CUSTOMER_REACH_ORDER, materialize=True)
+
+PRODUCT_SALES_ORDER = [("storeID", "ASC"), ("total_quantity", "DESC"), ("SKU", "ASC")]
+
+def product_sales_query(by_store):
+    return f"""
+        SELECT ol.storeID, ol.SKU, p.Name, ol.total_quantity
+        FROM (
+            SELECT storeID, SKU, SUM(quantity) AS total_quantity
+            FROM order_lines
+            {"WHERE storeID = ?" if by_store else ""}
+            GROUP BY storeID, SKU
+        ) ol
+        JOIN products p ON ol.SKU = p.SKU
+    """
 
 @stores_bp.route("/api/stores/product_sales")
 def get_product_sales_per_store():
-    data = query_db("""
-        SELECT s.storeID, oi.SKU, p.Name,
-               SUM(oi.quantity) AS total_quantity
-        FROM stores s
-        JOIN orders o ON s.storeID = o.storeID
-        JOIN orderItems oi ON o.orderID = oi.orderID
-        JOIN products p ON oi.SKU = p.SKU
-        GROUP BY s.storeID, oi.SKU
-        ORDER BY s.storeID, total_quantity DESC
-    """)
-    return jsonify(data)
+    store_id = request.args.get("store")
+    return paginated_response(product_sales_query(store_id), PRODUCT_SALES_ORDER,
+                              args=(store_id,) if store_id else (), materialize=True)
+
+AVG_DISTANCE_QUERY = """
+    SELECT s.storeID, s.city, s.state,
+           ROUND(SUM(p.orders * p.distance_km) / SUM(p.orders), 2) AS avg_distance_km
+    FROM store_customer_pairs p
+    JOIN stores s ON s.storeID = p.storeID
+    GROUP BY s.storeID
+"""
+AVG_DISTANCE_ORDER = [("avg_distance_km", "ASC"), ("storeID", "ASC")]
 
 @stores_bp.route("/api/stores/avg_distance")
 def get_avg_distance():
-    data = query_db("""
-        SELECT s.storeID, s.city, s.state,
-               ROUND(AVG(
-                   6371 * 2 * 
-                   ASIN(
-                       SQRT(
-                           POWER(SIN(RADIANS((c.latitude - s.latitude) / 2)), 2) +
-                           COS(RADIANS(s.latitude)) * COS(RADIANS(c.latitude)) *
-                           POWER(SIN(RADIANS((c.longitude - s.longitude) / 2)), 2)
-                       )
-                   )
-               ), 2) AS avg_distance_km
-        FROM stores s
-        JOIN orders o ON s.storeID = o.storeID
-        JOIN customers c ON o.customerID = c.customerID
-        GROUP BY s.storeID
-        ORDER BY avg_distance_km
-    """)
-    return jsonify(data)
+    # Distances are measured once per (store, customer) pair by build_db.py
+    # and weighted by the pair's number of orders
+    return paginated_response(AVG_DISTANCE_QUERY, AVG_DISTANCE_ORDER, materialize=True)
 #test
 
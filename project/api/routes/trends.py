@@ -0,0 +1,171 @@
+from datetime import date
+import numpy as np
+from flask import Blueprint, jsonify, request
+from cache import data_version
+from pagination import paginated_response
+from shared.trends import (
+    DEFAULT_PEAK_WINDOW, DEFAULT_PEAK_Z, GROUPINGS, METRICS, SEASONS,
+    detect_peaks, season_labels, seasonal_indices, yoy_growth,
+)
+from trends import MAX_PEAK_WINDOW, MIN_PEAK_WINDOW, TrendArgsError, get_cube
+
+trends_bp = Blueprint("trends", __name__)
+
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+ALERT_KINDS = ("store", "sku")
+
+
+def _trend_args(grouped=True):
+    """
+    Read the filters shared by all trend endpoints: ?metric=, ?by= (unless
+    not grouped), ?from=, ?to=, ?category= (comma-separated), ?store= and
+    ?state=. Returns (cube, daily values, group labels, day window, metric).
+    """
+    metric = request.args.get("metric", "revenue")
+    by = request.args.get("by", "total") if grouped else "total"
+    if metric not in METRICS or by not in GROUPINGS:
+        raise TrendArgsError(f"metric must be one of {', '.join(METRICS)}, by one of {', '.join(GROUPINGS)}")
+    try:
+        start = date.fromisoformat(request.args["from"]) if request.args.get("from") else None
+        end = date.fromisoformat(request.args["to"]) if request.args.get("to") else None
+    except ValueError:
+        raise TrendArgsError("?from= and ?to= must be dates like 2023-01-31") from None
+
+    cube = get_cube(data_version())
+    categories = None
+    if request.args.get("category"):
+        wanted = request.args["category"].split(",")
+        unknown = sorted(set(wanted) - set(cube.categories))
+        if unknown:
+            raise TrendArgsError(f"unknown categories: {unknown}")
+        categories = np.isin(cube.categories, wanted)
+    stores = cube.store_mask(request.args.get("store"), request.args.get("state"))
+    if not stores.any():
+        raise TrendArgsError("no store matches ?store= / ?state=")
+    values, labels = cube.series(metric, by, categories, stores)
+    return cube, values, labels, cube.day_slice(start, end), metric
+
+
+def _rounded(values, digits):
+    return [None if np.isnan(v) else round(v, digits) for v in values.tolist()]
+
+
+# 1. GET /api/trends/yoy: Monthly year-over-year growth
+@trends_bp.route("/api/trends/yoy")
+def get_yoy_growth():
+    """
+    Return per month in ?from= .. ?to= the metric, the same calendar days a
+    year earlier and the growth against them, as a whole or ?by=category /
+    store. Growth is null where there is no previous-year data.
+    """
+    cube, values, labels, window, metric = _trend_args()
+    months, current, previous, growth = yoy_growth(cube.days, values, window)
+    return jsonify({
+        "metric": metric,
+        "months": [str(m) for m in months],
+        "series": [
+            {"group": label, "current": _rounded(current[:, i], 2), "previous": _rounded(previous[:, i], 2),
+             "growth": _rounded(growth[:, i], 4)}
+            for i, label in enumerate(labels)
+        ],
+    })
+
+
+# 2. GET /api/trends/seasonal: Seasonal indices per month of the year or weekday
+@trends_bp.route("/api/trends/seasonal")
+def get_seasonal_indices():
+    """
+    Return for ?season=month (default) or weekday how the average day of
+    each season compares to the average day in ?from= .. ?to= (1.0 = equal)
+    """
+    season = request.args.get("season", "month")
+    if season not in SEASONS:
+        raise TrendArgsError(f"season must be one of {', '.join(SEASONS)}")
+    cube, values, labels, window, metric = _trend_args()
+    indices, days_per_season = seasonal_indices(cube.days[window], values[window], season)
+    names = WEEKDAYS if season == "weekday" else [f"{m:02d}" for m in range(1, 13)]
+    return jsonify({
+        "metric": metric,
+        "season": season,
+        "seasons": names,
+        "days": days_per_season.tolist(),
+        "series": [{"group": label, "index": _rounded(indices[:, i], 4)} for i, label in enumerate(labels)],
+    })
+
+
+# 3. GET /api/trends/peaks: Days far above their recent average
+@trends_bp.route("/api/trends/peaks")
+def get_peak_days():
+    """
+    Return the days in ?from= .. ?to= whose total lies at least ?z= (default
+    2.5) standard deviations above the ?window= (default 28) days before,
+    strongest first, at most ?limit= (default 20)
+    """
+    window_days = request.args.get("window", DEFAULT_PEAK_WINDOW, type=int)
+    threshold = request.args.get("z", DEFAULT_PEAK_Z, type=float)
+    limit = request.args.get("limit", 20, type=int)
+    if not MIN_PEAK_WINDOW <= window_days <= MAX_PEAK_WINDOW or threshold <= 0 or limit < 1:
+        raise TrendArgsError(f"window must be between {MIN_PEAK_WINDOW} and {MAX_PEAK_WINDOW}, "
+                             "z positive, limit at least 1")
+    cube, values, _, window, metric = _trend_args(grouped=False)
+    # The baseline may reach back before ?from=, so detect on the whole series
+    totals = values[:, 0]
+    days, expected, z = detect_peaks(totals, window_days, threshold)
+    inside = (days >= window.start) & (days < window.stop)
+    days, expected, z = days[inside][:limit], expected[inside][:limit], z[inside][:limit]
+    weekdays = season_labels(cube.days[days], "weekday")
+    return jsonify([
+        {"day": str(cube.days[d]), "weekday": WEEKDAYS[w], metric: round(float(totals[d]), 2),
+         "expected": round(e, 2), "z": round(score, 2)}
+        for d, w, e, score in zip(days.tolist(), weekdays.tolist(), expected.tolist(), z.tolist())
+    ])
+
+
+# 4. GET /api/trends/alerts: Days on which a store or product left its baseline
+ALERTS_QUERY = """
+    SELECT a.day, a.kind, a.key, COALESCE(s.city, p.Name) AS name, a.metric,
+           ROUND(a.value, 2) AS value, ROUND(a.expected, 2) AS expected,
+           ROUND(a.std, 2) AS std, ROUND(a.z, 2) AS z
+    FROM anomaly_alerts a
+    LEFT JOIN stores s ON a.kind = 'store' AND s.storeID = a.key
+    LEFT JOIN products p ON a.kind = 'sku' AND p.SKU = a.key
+    WHERE {filters}
+"""
+ALERTS_ORDER = [("day", "DESC"), ("kind", "ASC"), ("key", "ASC"), ("metric", "ASC")]
+
+
+@trends_bp.route("/api/trends/alerts")
+def get_alerts():
+    """
+    Return the anomaly alerts build_db.py raised against the EWMA baselines
+    of daily revenue and orders, newest first. Filters: ?kind=store|sku,
+    ?metric=, ?key= (storeID or SKU), ?from= / ?to=, ?min_z= and
+    ?direction=up|down.
+    """
+    kind, metric, key = request.args.get("kind"), request.args.get("metric"), request.args.get("key")
+    direction = request.args.get("direction")
+    min_z = request.args.get("min_z", 0, type=float)
+    if kind and kind not in ALERT_KINDS or metric and metric not in METRICS \
+            or direction and direction not in ("up", "down"):
+        raise TrendArgsError(f"kind must be one of {', '.join(ALERT_KINDS)}, metric one of {', '.join(METRICS)}, "
+                             "direction up or down")
+    try:
+        start = date.fromisoformat(request.args["from"]).isoformat() if request.args.get("from") else None
+        end = date.fromisoformat(request.args["to"]).isoformat() if request.args.get("to") else None
+    except ValueError:
+        raise TrendArgsError("?from= and ?to= must be dates like 2023-01-31") from None
+
+    filters, args = ["ABS(a.z) >= ?"], [min_z]
+    for column, value in (("a.kind", kind), ("a.metric", metric), ("a.key", key)):
+        if value:
+            filters.append(f"{column} = ?")
+            args.append(value)
+    if start:
+        filters.append("a.day >= ?")
+        args.append(start)
+    if end:
+        filters.append("a.day <= ?")
+        args.append(end)
+    if direction:
+        filters.append("a.z > 0" if direction == "up" else "a.z < 0")
+    return paginated_response(ALERTS_QUERY.format(filters=" AND ".join(filters)), ALERTS_ORDER, args=args)
@@ -1,12 +1,51 @@
-from flask import Flask
+import sys
+from pathlib import Path
+
+# project/shared holds the code the API shares with the build and Maskdraft
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from flask import Flask, jsonify
+from cache import exempt, init_cache
+from pagination import PaginationError
+from pool import pool_stats
 from routes.customers import customers_bp
+from routes.geo import geo_bp
+from routes.kpis import kpis_bp
 from routes.orders import orders_bp
 from routes.stores import stores_bp
+from routes.trends import trends_bp
+from trends import TrendArgsError
 
 app = Flask(__name__)
 app.register_blueprint(customers_bp)
+app.register_blueprint(geo_bp)
+app.register_blueprint(kpis_bp)
 app.register_blueprint(orders_bp)
 app.register_blueprint(stores_bp)
+app.register_blueprint(trends_bp)
+response_cache = init_cache(app)
+
+
+@app.errorhandler(PaginationError)
+def handle_pagination_error(error):
+    return jsonify({"error": str(error)}), 400
+
+
+@app.errorhandler(TrendArgsError)
+def handle_trend_args_error(error):
+    return jsonify({"error": str(error)}), 400
+
+
+@app.route("/api/pool/stats")
+@exempt
+def get_pool_stats():
+    return jsonify(pool_stats())
+
+
+@app.route("/api/cache/stats")
+@exempt
+def get_cache_stats():
+    return jsonify(response_cache.stats())
 
 
 if __name__ == "__main__":
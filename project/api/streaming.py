@@ -0,0 +1,30 @@
+import json
+from flask import Response, request
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+def _wants_ndjson():
+    if request.args.get("format") == "ndjson":
+        return True
+    return request.accept_mimetypes.best == NDJSON_MIMETYPE
+
+def _json_array(rows):
+    yield "["
+    first = True
+    for row in rows:
+        yield ("" if first else ",") + json.dumps(row, separators=(",", ":"))
+        first = False
+    yield "]\n"
+
+def _ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, separators=(",", ":")) + "\n"
+
+def stream_json(rows):
+    """
+    Return a chunked response for an iterable of rows: a JSON array by default,
+    NDJSON if the client asks for it with ?format=ndjson or its Accept header
+    """
+    if _wants_ndjson():
+        return Response(_ndjson(rows), mimetype=NDJSON_MIMETYPE)
+    return Response(_json_array(rows), mimetype="application/json")
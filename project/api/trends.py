@@ -0,0 +1,50 @@
+import threading
+from db import query_db
+from shared.trends import TrendCube
+
+# The trend cube of shared/trends.py, loaded once per data version from the
+# rollups build_db.py maintains, plus the request limits of the endpoints.
+
+MIN_PEAK_WINDOW, MAX_PEAK_WINDOW = 7, 365
+
+
+# Raised for invalid trend filters; server.py answers it with 400
+class TrendArgsError(ValueError):
+    pass
+
+
+def _columns(rows, names):
+    return {name: [row[name] for row in rows] for name in names}
+
+
+# Category revenue, store orders and the store list the cube is built from
+CUBE_QUERIES = (
+    "SELECT Category, storeID, day, orders, revenue FROM rollup_category_store_day",
+    "SELECT storeID, day, orders FROM rollup_store_day",
+    "SELECT storeID, state, state_abbr FROM stores ORDER BY storeID",
+)
+
+_cube = None
+_cube_version = None
+_cube_lock = threading.Lock()
+
+
+def get_cube(version):
+    """
+    Return the trend cube for the given data version, loading it on first
+    use and again whenever build_db.py has stamped a new version
+    """
+    global _cube, _cube_version
+    with _cube_lock:
+        if _cube is None or version != _cube_version:
+            category_rows, store_rows, stores = (query_db(query) for query in CUBE_QUERIES)
+            _cube = TrendCube(
+                {row["Category"] for row in category_rows},
+                [row["storeID"] for row in stores],
+                [row["state"] for row in stores],
+                [row["state_abbr"] for row in stores],
+                _columns(category_rows, ("day", "Category", "storeID", "revenue", "orders")),
+                _columns(store_rows, ("day", "storeID", "orders")),
+            )
+            _cube_version = version
+        return _cube
@@ -0,0 +1,34 @@
+import threading
+import numpy as np
+from db import query_db
+
+# Request limits and the per-customer order counts behind the grid
+# endpoints; the analysis itself is in shared/whitespots.py.
+
+# Accepted range for ?cell_km=; below 1 km the grid is finer than the data
+MIN_CELL_KM, MAX_CELL_KM = 1, 500
+
+ORDER_COUNTS_QUERY = "SELECT customerID, COUNT(*) AS n FROM orders GROUP BY customerID"
+
+
+_order_counts = None
+_order_counts_version = None
+_order_counts_lock = threading.Lock()
+
+
+def customer_order_counts(index, version):
+    """
+    Orders per customer aligned with the customers of the spatial index,
+    cached per data version so changing the grid size does not rescan orders
+    """
+    global _order_counts, _order_counts_version
+    with _order_counts_lock:
+        if _order_counts is None or version != _order_counts_version:
+            counts = np.zeros(len(index.customer_ids), dtype=np.int64)
+            for row in query_db(ORDER_COUNTS_QUERY):
+                pos = index.customer_pos.get(row["customerID"])
+                if pos is not None:
+                    counts[pos] = row["n"]
+            _order_counts = counts
+            _order_counts_version = version
+        return _order_counts
@@ -0,0 +1,127 @@
+import numpy as np
+
+# Early-warning baselines: an exponentially weighted mean and variance of
+# daily revenue and orders per store and per SKU, fed from the daily
+# rollups. Each ingest folds in only the days since the last run and
+# records the days that lie more than ALERT_Z standard deviations off.
+
+# Weight of the newest day; 2 / (span + 1) for a span of four weeks
+EWMA_ALPHA = 2 / (28 + 1)
+ALERT_Z = 3.0
+# Days of history a baseline needs before it may raise alerts
+MIN_HISTORY_DAYS = 14
+
+METRICS = ("revenue", "orders")
+SOURCES = {"store": ("rollup_store_day", "storeID"), "sku": ("rollup_sku_day", "SKU")}
+
+ANOMALY_TABLES = ["ewma_baselines", "anomaly_alerts"]
+
+ANOMALY_SCHEMA = """
+-- day is the last day folded in; days counts the days since the first sale
+CREATE TABLE IF NOT EXISTS ewma_baselines (
+    kind TEXT,
+    key TEXT,
+    metric TEXT,
+    day TEXT,
+    days INTEGER,
+    mean REAL,
+    var REAL,
+    PRIMARY KEY (kind, key, metric)
+) WITHOUT ROWID;
+
+-- expected and std are the baseline before the day was folded in
+CREATE TABLE IF NOT EXISTS anomaly_alerts (
+    kind TEXT,
+    key TEXT,
+    metric TEXT,
+    day TEXT,
+    value REAL,
+    expected REAL,
+    std REAL,
+    z REAL,
+    PRIMARY KEY (kind, key, metric, day)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_anomaly_alerts_day ON anomaly_alerts(day, kind, metric);
+"""
+
+
+def _update_kind(conn, kind):
+    table, key_column = SOURCES[kind]
+    last_day = conn.execute("SELECT MAX(day) FROM ewma_baselines WHERE kind = ?", (kind,)).fetchone()[0]
+    newest = conn.execute(f"SELECT MAX(day) FROM {table}").fetchone()[0]
+    # The newest day may still receive orders, so it waits for the next ingest
+    rows = conn.execute(f"""
+        SELECT {key_column}, day, revenue, orders FROM {table}
+        WHERE day > ? AND day < ?
+    """, (last_day or "", newest or "")).fetchall()
+    if not rows:
+        return 0
+
+    start = np.datetime64(last_day, "D") + 1 if last_day else np.datetime64(min(row[1] for row in rows), "D")
+    n_days = int((np.datetime64(newest, "D") - start).astype(int))
+    keys = sorted({row[0] for row in rows} | {row[0] for row in conn.execute(
+        "SELECT DISTINCT key FROM ewma_baselines WHERE kind = ?", (kind,))})
+    key_pos = {key: i for i, key in enumerate(keys)}
+
+    # metrics x keys x days, zero where a key sold nothing that day
+    values = np.zeros((len(METRICS), len(keys), n_days))
+    k = np.array([key_pos[row[0]] for row in rows])
+    d = (np.array([row[1] for row in rows], dtype="datetime64[D]") - start).astype(np.int64)
+    values[0, k, d] = [row[2] for row in rows]
+    values[1, k, d] = [row[3] for row in rows]
+
+    mean = np.zeros((len(METRICS), len(keys)))
+    var = np.zeros((len(METRICS), len(keys)))
+    days = np.zeros(len(keys), dtype=np.int64)
+    metric_pos = {metric: i for i, metric in enumerate(METRICS)}
+    for key, metric, n, m, v in conn.execute(
+            "SELECT key, metric, days, mean, var FROM ewma_baselines WHERE kind = ?", (kind,)):
+        mean[metric_pos[metric], key_pos[key]] = m
+        var[metric_pos[metric], key_pos[key]] = v
+        days[key_pos[key]] = n
+
+    alerts = []
+    for t in range(n_days):
+        x = values[:, :, t]
+        std = np.sqrt(var)
+        checked = (days >= MIN_HISTORY_DAYS) & (std > 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            z = np.where(checked, (x - mean) / std, 0.0)
+        day = str(start + t)
+        for mi, ki in zip(*np.nonzero(np.abs(z) >= ALERT_Z)):
+            alerts.append((kind, keys[ki], METRICS[mi], day, x[mi, ki], mean[mi, ki], std[mi, ki], z[mi, ki]))
+        # A key's baseline starts on its first day with orders
+        started = days > 0
+        first = ~started & (x[1] > 0)
+        diff = x - mean
+        incr = EWMA_ALPHA * diff
+        mean = np.where(started, mean + incr, np.where(first, x, mean))
+        var = np.where(started, (1 - EWMA_ALPHA) * (var + diff * incr), var)
+        days += started | first
+
+    last = str(start + n_days - 1)
+    conn.executemany("""
+        INSERT OR REPLACE INTO ewma_baselines (kind, key, metric, day, days, mean, var)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, ((kind, key, metric, last, int(days[ki]), float(mean[mi, ki]), float(var[mi, ki]))
+          for ki, key in enumerate(keys) for mi, metric in enumerate(METRICS)))
+    conn.executemany("""
+        INSERT OR REPLACE INTO anomaly_alerts (kind, key, metric, day, value, expected, std, z)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, [(kind, key, metric, day, float(x), float(m), float(s), float(z))
+          for kind, key, metric, day, x, m, s, z in alerts])
+    return len(alerts)
+
+
+def update_baselines(conn):
+    """
+    Fold every complete day since the last run into the per-store and
+    per-SKU baselines and record the alerts among them; call after
+    refresh_rollups(). Work grows with the new days, not with the history.
+    Orders dated before the last folded day are not picked up; a full
+    build recomputes the baselines from scratch. Returns the new alerts.
+    The tables come from ANOMALY_SCHEMA, which build_db.py creates before
+    the load.
+    """
+    return sum(_update_kind(conn, kind) for kind in SOURCES)
@@ -0,0 +1,75 @@
+import hashlib
+import numpy as np
+from shared.geo import nearest_points
+
+# Nearest-store assignment of every customer, kept in customer_assignments.
+# Only customers that are new or moved are recomputed, unless the store set
+# itself changed, which invalidates every assignment.
+
+ASSIGNMENTS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS customer_assignments (
+    customerID TEXT PRIMARY KEY,
+    storeID TEXT,
+    distance_km REAL,
+    latitude REAL,
+    longitude REAL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_customer_assignments_store
+    ON customer_assignments(storeID, distance_km);
+"""
+
+# Customers per distance-matrix block: 50k x 32 stores x 8 bytes is ~13 MB
+BLOCK_SIZE = 50_000
+
+
+def _stores_signature(stores):
+    return hashlib.sha256(repr(stores).encode()).hexdigest()
+
+
+def refresh_assignments(conn):
+    """
+    Bring customer_assignments (ASSIGNMENTS_SCHEMA, created by build_db.py)
+    up to date and return how many customers were (re)assigned
+    """
+    stores = conn.execute("""
+        SELECT storeID, latitude, longitude FROM stores
+        WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+        ORDER BY storeID
+    """).fetchall()
+    signature = _stores_signature(stores)
+    row = conn.execute("SELECT value FROM build_meta WHERE key = 'assignment_stores'").fetchone()
+    if row is None or row[0] != signature:
+        conn.execute("DELETE FROM customer_assignments")
+    if not stores:
+        return 0
+
+    # New customers and customers whose coordinates changed since their assignment
+    pending = conn.execute("""
+        SELECT c.customerID, c.latitude, c.longitude
+        FROM customers c
+        LEFT JOIN customer_assignments a ON a.customerID = c.customerID
+        WHERE c.latitude IS NOT NULL AND c.longitude IS NOT NULL
+          AND (a.customerID IS NULL OR a.latitude != c.latitude OR a.longitude != c.longitude)
+    """).fetchall()
+
+    store_ids = [s[0] for s in stores]
+    store_lats = np.array([s[1] for s in stores], dtype=np.float64)
+    store_lons = np.array([s[2] for s in stores], dtype=np.float64)
+    for start in range(0, len(pending), BLOCK_SIZE):
+        block = pending[start:start + BLOCK_SIZE]
+        lats = np.array([c[1] for c in block], dtype=np.float64)
+        lons = np.array([c[2] for c in block], dtype=np.float64)
+        best, dist = nearest_points(lats, lons, store_lats, store_lons)
+        conn.executemany("""
+            INSERT INTO customer_assignments (customerID, storeID, distance_km, latitude, longitude)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(customerID) DO UPDATE SET
+                storeID = excluded.storeID, distance_km = excluded.distance_km,
+                latitude = excluded.latitude, longitude = excluded.longitude
+        """, ((c[0], store_ids[b], float(d), c[1], c[2]) for c, b, d in zip(block, best.tolist(), dist.tolist())))
+
+    conn.execute("""
+        INSERT INTO build_meta (key, value) VALUES ('assignment_stores', ?)
+        ON CONFLICT(key) DO UPDATE SET value = excluded.value
+    """, (signature,))
+    return len(pending)
@@ -0,0 +1,95 @@
+import json
+import os
+from pathlib import Path
+import numpy as np
+
+# Columnar basket store next to app.db: one row per order with its SKU set
+# as a uint64 bitmask, aligned with orderID, store and day arrays. Saved as
+# plain .npy files so the API can memory-map them instead of querying
+# order_lines. Bit i of a mask stands for skus.npy[i].
+
+ARRAYS = ("order_ids", "masks", "store_codes", "days")
+
+
+def store_dir(db_path):
+    return Path(db_path).with_suffix(".baskets")
+
+
+def _save(directory, name, array):
+    # Write beside the target and rename, so a reader never maps a half-written file
+    tmp = directory / f"{name}.tmp.npy"
+    np.save(tmp, array)
+    os.replace(tmp, directory / f"{name}.npy")
+
+
+def _load_existing(directory, skus, store_ids):
+    try:
+        old_skus = np.load(directory / "skus.npy").tolist()
+        old_store_ids = np.load(directory / "store_ids.npy").tolist()
+        arrays = {name: np.load(directory / f"{name}.npy") for name in ARRAYS}
+    except (OSError, ValueError):
+        return None
+    # Appending only works while every bit and store code still means the
+    # same: the SKUs are unchanged and any new stores sort after the old ones
+    if old_skus != skus or old_store_ids != store_ids[:len(old_store_ids)]:
+        return None
+    return arrays
+
+
+def write_basket_store(conn, db_path, data_version, min_order_id=None):
+    """
+    Build the basket store from order_lines. With min_order_id the existing
+    store is kept up to that order and only newer orders are appended; if
+    the SKU list changed or a new store sorts before an existing one it is
+    rebuilt completely. Returns the order count.
+    """
+    directory = store_dir(db_path)
+    directory.mkdir(exist_ok=True)
+    skus = [row[0] for row in conn.execute("SELECT SKU FROM products ORDER BY SKU")]
+    if len(skus) > 64:
+        raise ValueError(f"{len(skus)} products do not fit into a 64-bit basket")
+    store_ids = [row[0] for row in conn.execute("SELECT storeID FROM stores ORDER BY storeID")]
+    existing = _load_existing(directory, skus, store_ids) if min_order_id is not None else None
+    if existing is not None:
+        keep = existing["order_ids"] < min_order_id
+        existing = {name: array[keep] for name, array in existing.items()}
+    else:
+        min_order_id = None
+
+    lines = conn.execute(f"""
+        SELECT orderID, SKU, storeID, substr(orderDate, 1, 10)
+        FROM order_lines
+        {"WHERE orderID >= ?" if min_order_id is not None else ""}
+        ORDER BY orderID
+    """, (min_order_id,) if min_order_id is not None else ()).fetchall()
+    if lines:
+        order_ids, line_skus, line_stores, line_days = (np.array(col) for col in zip(*lines))
+        order_ids = order_ids.astype(np.int64)
+        bits = np.left_shift(np.uint64(1), np.searchsorted(skus, line_skus).astype(np.uint64))
+        starts = np.flatnonzero(np.r_[True, order_ids[1:] != order_ids[:-1]])
+        store_pos = {sid: i for i, sid in enumerate(store_ids)}
+        arrays = {
+            "order_ids": order_ids[starts],
+            "masks": np.bitwise_or.reduceat(bits, starts),
+            "store_codes": np.array([store_pos.get(s, -1) for s in line_stores[starts]], dtype=np.int32),
+            "days": line_days[starts].astype("datetime64[D]").astype(np.int32),
+        }
+    else:
+        arrays = {
+            "order_ids": np.empty(0, dtype=np.int64),
+            "masks": np.empty(0, dtype=np.uint64),
+            "store_codes": np.empty(0, dtype=np.int32),
+            "days": np.empty(0, dtype=np.int32),
+        }
+    if existing is not None:
+        arrays = {name: np.concatenate([existing[name], arrays[name]]) for name in ARRAYS}
+
+    _save(directory, "skus", np.array(skus))
+    _save(directory, "store_ids", np.array(store_ids))
+    for name in ARRAYS:
+        _save(directory, name, arrays[name])
+    # Written last: the API only trusts the arrays if this matches app.db
+    tmp = directory / "meta.tmp.json"
+    tmp.write_text(json.dumps({"data_version": data_version, "orders": len(arrays["order_ids"])}))
+    os.replace(tmp, directory / "meta.json")
+    return len(arrays["order_ids"])
@@ -1,20 +1,34 @@
+import argparse
 import sqlite3
-import pandas as pd
+import sys
+import uuid
+from collections import Counter
 from pathlib import Path
 
-# Connect and enable foreign keys
-conn = sqlite3.connect("app.db")
-conn.execute("PRAGMA foreign_keys = ON;")
-cursor = conn.cursor()
+# project/shared holds the code the build shares with the API and Maskdraft
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-def load_csv(table, csv_file, drop_cols=None):
-    df = pd.read_csv(csv_file)
-    if drop_cols:
-        df.drop(columns=drop_cols, inplace=True)
-    df.to_sql(table, conn, if_exists="append", index=False)
+from anomalies import ANOMALY_SCHEMA, ANOMALY_TABLES, update_baselines
+from assignments import ASSIGNMENTS_SCHEMA, refresh_assignments
+from basket_store import write_basket_store
+from bulk_loader import build_pragmas, bulk_load, iter_csv_chunks
+from distances import PAIRS_SCHEMA, invalidate_moved, refresh_pairs, refresh_trig_columns
+from facts import ORDER_LINES_SCHEMA, refresh_order_lines
+from query_plans import create_indexes, explain_all
+from rollups import ROLLUPS_SCHEMA, ROLLUP_TABLES, refresh_rollups
+from snapshot import write_snapshot
+from shared.sqlfuncs import register_functions
 
-# === CREATE TABLES ===
-cursor.executescript("""
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+DB_FILE = Path("app.db")
+# Arrow snapshot of the dashboard tables, memory-mapped by Maskdraft
+SNAPSHOT_DIR = DATA_DIR / "snapshot"
+
+SCHEMA = "".join(f"DROP TABLE IF EXISTS {table};\n" for table in ROLLUP_TABLES + ANOMALY_TABLES) + """
+DROP TABLE IF EXISTS build_meta;
+DROP TABLE IF EXISTS store_customer_pairs;
+DROP TABLE IF EXISTS customer_assignments;
+DROP TABLE IF EXISTS order_lines;
 DROP TABLE IF EXISTS orderItems;
 DROP TABLE IF EXISTS orderItems_raw;
 DROP TABLE IF EXISTS productingredients;
@@ -24,10 +38,15 @@ DROP TABLE IF EXISTS products;
 DROP TABLE IF EXISTS ingredients;
 DROP TABLE IF EXISTS stores;
 
+-- lat_rad, lon_rad and cos_lat are derived from latitude/longitude by
+-- refresh_trig_columns() so distance queries skip the per-row trig setup
 CREATE TABLE customers (
     customerID TEXT PRIMARY KEY,
     latitude REAL,
-    longitude REAL
+    longitude REAL,
+    lat_rad REAL,
+    lon_rad REAL,
+    cos_lat REAL
 );
 
 CREATE TABLE stores (
@@ -38,7 +57,10 @@ CREATE TABLE stores (
     longitude REAL,
     city TEXT,
     state TEXT,
-    distance REAL
+    distance REAL,
+    lat_rad REAL,
+    lon_rad REAL,
+    cos_lat REAL
 );
 
 CREATE TABLE products (
@@ -78,21 +100,7 @@ CREATE TABLE orderItems_raw (
     SKU TEXT,
     orderID INTEGER
 );
-""")
-
-# === LOAD DATA ===
-data_dir = Path(__file__).resolve().parent.parent / "data"
 
-load_csv("customers", data_dir / "customers.csv")
-load_csv("stores", data_dir / "stores.csv")
-load_csv("products", data_dir / "products.csv", drop_cols=["Ingredients"])
-load_csv("ingredients", data_dir / "ingredients.csv")
-load_csv("orders", data_dir / "orders.csv")
-load_csv("productingredients", data_dir / "productingredients.csv")
-load_csv("orderItems_raw", data_dir / "orderItems.csv")
-
-# === PROCESS orderItems_raw INTO orderItems ===
-cursor.executescript("""
 CREATE TABLE orderItems (
     SKU TEXT,
     orderID INTEGER,
@@ -102,14 +110,195 @@ CREATE TABLE orderItems (
     FOREIGN KEY (orderID) REFERENCES orders(orderID)
 );
 
-INSERT INTO orderItems (SKU, orderID, quantity)
-SELECT SKU, orderID, COUNT(*) AS quantity
-FROM orderItems_raw
-GROUP BY SKU, orderID;
+-- Key/value bookkeeping of the build, e.g. the ingest high-water mark
+CREATE TABLE build_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# The tables derived from the ones above. executescript() commits first, so
+# all of it runs before any data is written: the refresh functions only
+# delete and insert and both builds stay in a single transaction.
+DERIVED_SCHEMA = ORDER_LINES_SCHEMA + ROLLUPS_SCHEMA + ANOMALY_SCHEMA + PAIRS_SCHEMA + ASSIGNMENTS_SCHEMA
+
+
+def newer_than(hwm_id):
+    def keep(columns, row):
+        return int(row[columns.index("orderID")]) > hwm_id
+    return keep
+
+
+def set_meta(conn, key, value):
+    conn.execute("""
+        INSERT INTO build_meta (key, value) VALUES (?, ?)
+        ON CONFLICT(key) DO UPDATE SET value = excluded.value
+    """, (key, str(value)))
+
+
+def get_meta(conn, key, default=None):
+    row = conn.execute("SELECT value FROM build_meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else default
+
+
+def stamp_data_version(conn):
+    # The API drops its response cache whenever this stamp changes
+    version = uuid.uuid4().hex
+    set_meta(conn, "data_version", version)
+    return version
+
+
+def record_high_water_mark(conn):
+    max_id, max_date = conn.execute("SELECT MAX(orderID), MAX(orderDate) FROM orders").fetchone()
+    set_meta(conn, "orders_hwm_id", max_id if max_id is not None else 0)
+    set_meta(conn, "orders_hwm_date", max_date or "")
+
+
+def report_snapshot(counts):
+    if counts is None:
+        print("⚠️  pyarrow is not installed, skipped the dashboard snapshot (the dashboard needs pyarrow)")
+    else:
+        print(f"📦 Wrote dashboard snapshot of {len(counts)} tables to {SNAPSHOT_DIR}")
+
+
+def full_build(conn):
+    conn.executescript(SCHEMA + DERIVED_SCHEMA)
+
+    # === LOAD DATA ===
+    bulk_load(conn, "customers", DATA_DIR / "customers.csv")
+    bulk_load(conn, "stores", DATA_DIR / "stores.csv")
+    bulk_load(conn, "products", DATA_DIR / "products.csv", drop_cols=["Ingredients"])
+    bulk_load(conn, "ingredients", DATA_DIR / "ingredients.csv")
+    bulk_load(conn, "orders", DATA_DIR / "orders.csv")
+    bulk_load(conn, "productingredients", DATA_DIR / "productingredients.csv")
+    bulk_load(conn, "orderItems_raw", DATA_DIR / "orderItems.csv")
+    refresh_trig_columns(conn, "customers")
+    refresh_trig_columns(conn, "stores")
+
+    # === PROCESS orderItems_raw INTO orderItems ===
+    conn.execute("""
+        INSERT INTO orderItems (SKU, orderID, quantity)
+        SELECT SKU, orderID, COUNT(*) AS quantity
+        FROM orderItems_raw
+        GROUP BY SKU, orderID
+    """)
+    conn.execute("DROP TABLE orderItems_raw")
+
+    # === DENORMALIZED FACT TABLE order_lines ===
+    refresh_order_lines(conn)
+
+    # === MONTHLY / DAILY ROLLUPS ===
+    refresh_rollups(conn)
+
+    # === EARLY-WARNING BASELINES ===
+    update_baselines(conn)
+
+    # === NEAREST-STORE ASSIGNMENT ===
+    refresh_assignments(conn)
+
+    # === STORE-CUSTOMER DISTANCES ===
+    refresh_pairs(conn)
+
+    # === INDEXES ===
+    create_indexes(conn)
+    record_high_water_mark(conn)
+    version = stamp_data_version(conn)
+
+    # === BASKET STORE (memory-mapped by the API) ===
+    write_basket_store(conn, DB_FILE, version)
+    conn.commit()
+
+    # === DASHBOARD SNAPSHOT ===
+    report_snapshot(write_snapshot(conn, SNAPSHOT_DIR, version))
+
+
+def incremental_ingest(conn):
+    """
+    Append only orders above the stored high-water mark (and their items)
+    and bring the derived tables up to date for just those orders. Order
+    lines that arrive for orders at or below the mark are not picked up;
+    run a full build for corrections to history. Everything up to the
+    basket store is one transaction: a failed ingest leaves app.db as it was.
+    """
+    hwm_id = int(get_meta(conn, "orders_hwm_id", 0))
+    hwm_date = get_meta(conn, "orders_hwm_date", "")
+    # Creates the derived tables an older app.db does not have yet
+    conn.executescript(DERIVED_SCHEMA)
+
+    with conn:
+        # Dimension tables are small: upsert them so new orders find their keys
+        bulk_load(conn, "customers", DATA_DIR / "customers.csv", upsert_key="customerID")
+        bulk_load(conn, "stores", DATA_DIR / "stores.csv", upsert_key="storeID")
+        bulk_load(conn, "products", DATA_DIR / "products.csv", drop_cols=["Ingredients"], upsert_key="SKU")
+        invalidate_moved(conn)
+        refresh_trig_columns(conn, "customers")
+        refresh_trig_columns(conn, "stores")
+
+        if hwm_date:
+            print(f"ℹ️  Ingesting orders above orderID {hwm_id} (last order date {hwm_date})")
+        new_orders = bulk_load(conn, "orders", DATA_DIR / "orders.csv", row_filter=newer_than(hwm_id))
+
+        # Only items of orders this run inserted; items of orders that are
+        # not in orders.csv (yet) would point at no order
+        inserted = {row[0] for row in conn.execute("SELECT orderID FROM orders WHERE orderID > ?", (hwm_id,))}
+        new_lines = 0
+        for columns, rows in iter_csv_chunks(DATA_DIR / "orderItems.csv"):
+            sku_idx, order_idx = columns.index("SKU"), columns.index("orderID")
+            # A (SKU, orderID) pair can straddle two chunks, so add up instead of overwrite
+            counts = Counter((row[sku_idx], row[order_idx]) for row in rows if int(row[order_idx]) in inserted)
+            conn.executemany("""
+                INSERT INTO orderItems (SKU, orderID, quantity) VALUES (?, ?, ?)
+                ON CONFLICT(SKU, orderID) DO UPDATE SET quantity = quantity + excluded.quantity
+            """, ((sku, order_id, n) for (sku, order_id), n in counts.items()))
+            new_lines += sum(counts.values())
+
+        refresh_order_lines(conn, min_order_id=hwm_id + 1)
+        since = conn.execute("SELECT MIN(orderDate) FROM orders WHERE orderID > ?", (hwm_id,)).fetchone()[0]
+        if since:
+            refresh_rollups(conn, since)
+        alerts = update_baselines(conn)
+        reassigned = refresh_assignments(conn)
+        measured = refresh_pairs(conn, min_order_id=hwm_id + 1)
+        record_high_water_mark(conn)
+        version = stamp_data_version(conn)
+        write_basket_store(conn, DB_FILE, version, min_order_id=hwm_id + 1)
+
+    report_snapshot(write_snapshot(conn, SNAPSHOT_DIR, version))
+    print(f"➕ Ingested {new_orders} new orders and {new_lines} order items above orderID {hwm_id}")
+    print(f"📍 Reassigned {reassigned} customers to their nearest store")
+    print(f"📏 Measured {measured} new or moved store-customer pairs")
+    print(f"🚨 Raised {alerts} new anomaly alerts")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build app.db from the CSVs in data/")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only ingest orders newer than the last build instead of rebuilding")
+    args = parser.parse_args()
+
+    # Connect and enable foreign keys
+    conn = sqlite3.connect(DB_FILE)
+    conn.execute("PRAGMA foreign_keys = ON;")
+    register_functions(conn)
+
+    if args.incremental:
+        incremental_ingest(conn)
+        conn.execute("PRAGMA optimize")
+        conn.close()
+        print("✅ Database updated incrementally in app.db")
+        return
+
+    with build_pragmas(conn):
+        full_build(conn)
+
+    # === QUERY PLAN REPORT ===
+    print("=== EXPLAIN QUERY PLAN per endpoint ===")
+    full_scans = explain_all(conn)
+    conn.close()
+    print("✅ Database built successfully as app.db")
+    for endpoint, scans in full_scans.items():
+        print(f"⚠️  {endpoint} still scans without an index: {'; '.join(scans)}")
 
-DROP TABLE orderItems_raw;
-""")
 
-conn.commit()
-conn.close()
-print("✅ Database built successfully as app.db")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import csv
+import time
+from contextlib import contextmanager
+
+CHUNK_SIZE = 50_000
+
+
+@contextmanager
+def build_pragmas(conn):
+    """
+    Trade crash safety for speed while the build runs: no rollback journal and
+    no fsync. A crashed build leaves a broken app.db, which a rebuild replaces
+    anyway. The safe settings come back afterwards for incremental ingests.
+    """
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    try:
+        yield conn
+    finally:
+        conn.execute("PRAGMA journal_mode = DELETE")
+        conn.execute("PRAGMA synchronous = FULL")
+
+
+def iter_csv_chunks(csv_file, chunk_size=CHUNK_SIZE, drop_cols=None):
+    """
+    Yield (columns, rows) per chunk of at most chunk_size rows. Empty fields
+    become NULL; everything else stays text and is converted by the column
+    affinity of the target table.
+    """
+    with open(csv_file, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        keep = [i for i, col in enumerate(header) if col not in (drop_cols or ())]
+        columns = [header[i] for i in keep]
+        chunk = []
+        for record in reader:
+            chunk.append(tuple(record[i] if record[i] != "" else None for i in keep))
+            if len(chunk) >= chunk_size:
+                yield columns, chunk
+                chunk = []
+        if chunk:
+            yield columns, chunk
+
+
+def bulk_load(conn, table, csv_file, drop_cols=None, row_filter=None,
+              upsert_key=None, chunk_size=CHUNK_SIZE):
+    """
+    Stream a CSV into `table` with one executemany per chunk, so memory stays
+    bounded by chunk_size. Chunks used to be committed one by one; now
+    nothing is committed here, and all chunks of all tables share the one
+    transaction of the full build or ingest, so a failed load leaves no
+    partial table behind. row_filter gets the column list and a row and
+    decides whether to keep it. With upsert_key, rows whose key already
+    exists update the stored row instead. Returns the number of rows
+    written and prints the throughput.
+    """
+    start = time.perf_counter()
+    total = 0
+    for columns, rows in iter_csv_chunks(csv_file, chunk_size, drop_cols):
+        if row_filter is not None:
+            rows = [row for row in rows if row_filter(columns, row)]
+        if not rows:
+            continue
+        sql = f"""
+            INSERT INTO {table} ({", ".join(columns)})
+            VALUES ({", ".join("?" * len(columns))})
+            {upsert_clause(upsert_key, columns) if upsert_key else ""}
+        """
+        conn.executemany(sql, rows)
+        total += len(rows)
+    elapsed = time.perf_counter() - start
+    rate = total / elapsed if elapsed else float("inf")
+    print(f"📥 {table}: {total:,} rows in {elapsed:.2f}s ({rate:,.0f} rows/s)")
+    return total
+
+
+def upsert_clause(key, columns):
+    updates = ", ".join(f"{col} = excluded.{col}" for col in columns if col != key)
+    return f"ON CONFLICT({key}) DO UPDATE SET {updates}"
@@ -0,0 +1,79 @@
+import math
+
+# Orders per (store, customer) pair with the distance between the two,
+# measured once per pair instead of once per order. /api/stores/avg_distance
+# is a weighted average over this table.
+
+PAIRS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS store_customer_pairs (
+    storeID TEXT,
+    customerID TEXT,
+    orders INTEGER,
+    distance_km REAL,
+    PRIMARY KEY (storeID, customerID)
+) WITHOUT ROWID;
+"""
+
+_DEG = repr(math.pi / 180)
+
+
+def refresh_trig_columns(conn, table):
+    """
+    Fill lat_rad, lon_rad and cos_lat of customers/stores for rows that are
+    new or whose coordinates changed since the last refresh
+    """
+    conn.create_function("_cos", 1, lambda x: None if x is None else math.cos(x), deterministic=True)
+    return conn.execute(f"""
+        UPDATE {table}
+        SET lat_rad = latitude * {_DEG},
+            lon_rad = longitude * {_DEG},
+            cos_lat = _cos(latitude * {_DEG})
+        WHERE lat_rad IS NULL
+           OR lat_rad != latitude * {_DEG}
+           OR lon_rad != longitude * {_DEG}
+    """).rowcount
+
+
+def invalidate_moved(conn):
+    """
+    Forget the distances of pairs whose customer or store coordinates changed
+    since their trig columns were last refreshed; call before
+    refresh_trig_columns(). store_customer_pairs (PAIRS_SCHEMA) is created
+    by build_db.py before the load.
+    """
+    for table, key in (("customers", "customerID"), ("stores", "storeID")):
+        conn.execute(f"""
+            UPDATE store_customer_pairs SET distance_km = NULL
+            WHERE {key} IN (
+                SELECT {key} FROM {table}
+                WHERE lat_rad IS NULL OR lat_rad != latitude * {_DEG} OR lon_rad != longitude * {_DEG}
+            )
+        """)
+
+
+def refresh_pairs(conn, min_order_id=None):
+    """
+    Add the orders with orderID >= min_order_id (all orders without it) to
+    their pairs and measure every pair that has no distance yet. Needs the
+    haversine_km function from shared.sqlfuncs.register_functions().
+    """
+    if min_order_id is None:
+        conn.execute("DELETE FROM store_customer_pairs")
+    conn.execute("""
+        INSERT INTO store_customer_pairs (storeID, customerID, orders)
+        SELECT storeID, customerID, COUNT(*)
+        FROM orders
+        WHERE orderID >= ?
+        GROUP BY storeID, customerID
+        ON CONFLICT(storeID, customerID) DO UPDATE SET orders = orders + excluded.orders
+    """, (min_order_id or 0,))
+    return conn.execute("""
+        UPDATE store_customer_pairs
+        SET distance_km = (
+            SELECT haversine_km(c.lat_rad, c.lon_rad, c.cos_lat, s.lat_rad, s.lon_rad, s.cos_lat)
+            FROM stores s, customers c
+            WHERE s.storeID = store_customer_pairs.storeID
+              AND c.customerID = store_customer_pairs.customerID
+        )
+        WHERE distance_km IS NULL
+    """).rowcount
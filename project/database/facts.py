@@ -0,0 +1,40 @@
+# Denormalized order-line fact table: one row per (order, SKU) with the line
+# revenue already multiplied out, so revenue endpoints never join
+# orders -> orderItems -> products at request time.
+
+ORDER_LINES_SCHEMA = """
+CREATE TABLE IF NOT EXISTS order_lines (
+    orderID INTEGER,
+    SKU TEXT,
+    storeID TEXT,
+    customerID TEXT,
+    orderDate TEXT,
+    month TEXT,
+    quantity INTEGER,
+    revenue REAL,
+    PRIMARY KEY (orderID, SKU)
+) WITHOUT ROWID;
+"""
+
+
+def refresh_order_lines(conn, min_order_id=None):
+    """
+    (Re)build order_lines from orders, orderItems and products. With
+    min_order_id only the lines of orders with orderID >= min_order_id are
+    rewritten. build_db.py creates the table (ORDER_LINES_SCHEMA) up front.
+    """
+    where, args = "", ()
+    if min_order_id is not None:
+        conn.execute("DELETE FROM order_lines WHERE orderID >= ?", (min_order_id,))
+        where, args = "WHERE o.orderID >= ?", (min_order_id,)
+    else:
+        conn.execute("DELETE FROM order_lines")
+    conn.execute(f"""
+        INSERT INTO order_lines (orderID, SKU, storeID, customerID, orderDate, month, quantity, revenue)
+        SELECT o.orderID, oi.SKU, o.storeID, o.customerID, o.orderDate,
+               strftime('%Y-%m', o.orderDate), oi.quantity, oi.quantity * p.Price
+        FROM orders o
+        JOIN orderItems oi ON o.orderID = oi.orderID
+        JOIN products p ON oi.SKU = p.SKU
+        {where}
+    """, args)
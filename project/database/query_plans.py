@@ -0,0 +1,138 @@
+import re
+import sys
+from pathlib import Path
+
+# Secondary and covering indexes for the join / group-by patterns of the API,
+# plus an EXPLAIN QUERY PLAN check of every endpoint query after the build.
+
+INDEXES = {
+    # customers.py: per-customer counts and averages (covers customerID + total)
+    "idx_orders_customer_total": "orders(customerID, total)",
+    # stores.py / customers.py: store joins, COUNT(DISTINCT customerID) per store
+    "idx_orders_store_customer": "orders(storeID, customerID)",
+    # stores.py: monthly revenue per store / state
+    "idx_orders_store_date": "orders(storeID, orderDate)",
+    "idx_orders_date": "orders(orderDate)",
+    # every orders -> orderItems join; the PK is (SKU, orderID) and cannot serve it
+    "idx_orderitems_order": "orderItems(orderID, SKU, quantity)",
+    # revenue endpoints read the order_lines fact table (see facts.py)
+    "idx_order_lines_store_month": "order_lines(storeID, month, revenue)",
+    "idx_order_lines_store_sku": "order_lines(storeID, SKU, quantity)",
+    # incremental rollup refreshes (see rollups.py) re-aggregate from a date on
+    "idx_order_lines_date": "order_lines(orderDate)",
+}
+
+# Big tables where an unindexed SCAN is worth a warning
+LARGE_TABLES = {"orders", "orderItems", "order_lines"}
+
+API_DIR = Path(__file__).resolve().parent.parent / "api"
+
+
+def endpoint_queries():
+    """
+    endpoint -> [(sql, args)] for every statement the API runs, taken from
+    the route modules and wrapped the way pagination.py wraps it. The args
+    only stand in for request values. Queries behind a per-version cache are
+    listed once, under the first endpoint that loads them.
+    """
+    if str(API_DIR) not in sys.path:
+        sys.path.insert(0, str(API_DIR))
+    import basket
+    import geo_index
+    import kpis
+    import trends
+    import whitespots
+    from pagination import served_sql
+    from routes import customers, geo, orders, stores
+    from routes import trends as trend_routes
+
+    return {
+        "/api/customers": served_sql(customers.CUSTOMERS_QUERY, customers.CUSTOMERS_ORDER),
+        "/api/customers/density": served_sql(customers.DENSITY_QUERY, customers.DENSITY_ORDER, materialize=True),
+        "/api/customers/top": served_sql(customers.TOP_QUERY, customers.TOP_ORDER, materialize=True),
+        "/api/customers/avg_order": served_sql(customers.AVG_ORDER_QUERY, customers.AVG_ORDER_ORDER,
+                                               materialize=True),
+        "/api/customers/recurring": served_sql(customers.RECURRING_QUERY, customers.RECURRING_ORDER,
+                                               materialize=True),
+        "/api/customers/onetime": served_sql(customers.ONETIME_QUERY, customers.ONETIME_ORDER, materialize=True),
+        "/api/orders/volatility": [(orders.VOLATILITY_RANGE_QUERY, ())] + [
+            (orders.VOLATILITY_QUERY.format(table=table, key=key), ("2022-01-01",))
+            for table, key in orders.VOLATILITY_BUCKETS.values()
+        ],
+        "/api/orders/avg_items": [(orders.AVG_ITEMS_QUERY, ())],
+        "/api/orders/avg_value": [(orders.AVG_VALUE_QUERY, ())],
+        # Only while the basket store is missing or outdated
+        "/api/orders/basket": [(basket.SKUS_QUERY, ()), (basket.ORDER_LINES_QUERY, ())],
+        "/api/stores/revenue": served_sql(stores.REVENUE_QUERY, stores.REVENUE_ORDER, materialize=True),
+        "/api/stores/revenue_trend": served_sql(stores.REVENUE_TREND_QUERY, stores.REVENUE_TREND_ORDER),
+        "/api/stores/revenue_by_state_monthly": served_sql(stores.STATE_MONTHLY_QUERY, stores.STATE_MONTHLY_ORDER),
+        "/api/stores/customer_reach": served_sql(stores.CUSTOMER_REACH_QUERY, stores.CUSTOMER_REACH_ORDER,
+                                                 materialize=True),
+        "/api/stores/product_sales": (
+            served_sql(stores.product_sales_query(False), stores.PRODUCT_SALES_ORDER, materialize=True)
+            + served_sql(stores.product_sales_query(True), stores.PRODUCT_SALES_ORDER, ("S100001",),
+                         materialize=True)
+        ),
+        "/api/stores/avg_distance": served_sql(stores.AVG_DISTANCE_QUERY, stores.AVG_DISTANCE_ORDER,
+                                               materialize=True),
+        "/api/kpis": [(query, ()) for query in kpis.KPI_QUERIES],
+        "/api/geo/within_radius": [(geo_index.CUSTOMERS_QUERY, ()), (geo_index.STORES_QUERY, ())],
+        "/api/geo/nearest_store": [(geo.NEAREST_STORE_QUERY, ("C000001",))],
+        "/api/geo/assignments": (
+            served_sql(geo.assignments_query(False), geo.ASSIGNMENTS_ORDER)
+            + served_sql(geo.assignments_query(True), geo.ASSIGNMENTS_ORDER, ("S100001",))
+        ),
+        "/api/geo/assignments/summary": served_sql(geo.ASSIGNMENT_SUMMARY_QUERY, geo.ASSIGNMENT_SUMMARY_ORDER,
+                                                   materialize=True),
+        "/api/geo/whitespots": [(whitespots.ORDER_COUNTS_QUERY, ())],
+        "/api/trends/yoy": [(query, ()) for query in trends.CUBE_QUERIES],
+        "/api/trends/alerts": served_sql(trend_routes.ALERTS_QUERY.format(filters="ABS(a.z) >= ? AND a.day >= ?"),
+                                         trend_routes.ALERTS_ORDER, (0, "2022-01-01")),
+    }
+
+
+def create_indexes(conn):
+    for name, target in INDEXES.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
+    conn.execute("ANALYZE")
+
+
+def _table_aliases(query):
+    aliases = {}
+    for table, alias in re.findall(r"(?:FROM|JOIN)\s+(\w+)(?:\s+(?!ON\b|JOIN\b|WHERE\b|GROUP\b|ORDER\b)(\w+))?", query):
+        aliases[alias or table] = table
+    return aliases
+
+
+def full_scans(query, plan_rows):
+    """
+    Return the plan details that scan a large table without any index
+    """
+    aliases = _table_aliases(query)
+    flagged = []
+    for row in plan_rows:
+        detail = row[3]
+        if not detail.startswith("SCAN ") or "USING" in detail:
+            continue
+        name = detail.split()[1]
+        if aliases.get(name, name) in LARGE_TABLES:
+            flagged.append(detail)
+    return flagged
+
+
+def explain_all(conn):
+    """
+    Print the query plan of every endpoint query and return the endpoints
+    that still do a full scan of a large table
+    """
+    flagged = {}
+    for endpoint, statements in endpoint_queries().items():
+        print(f"\n{endpoint}")
+        for query, args in statements:
+            plan = conn.execute(f"EXPLAIN QUERY PLAN {query}", args).fetchall()
+            for row in plan:
+                print(f"    {row[3]}")
+            scans = full_scans(query, plan)
+            if scans:
+                flagged.setdefault(endpoint, []).extend(scans)
+    return flagged
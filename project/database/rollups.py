@@ -0,0 +1,150 @@
+# Precomputed aggregate cubes over order_lines at (store, month),
+# (state, month), (SKU, month), (SKU, day) and (category, store, day) grain,
+# plus the headline KPIs per (store, day) from orders. Time-series endpoints read these instead of
+# grouping the raw fact tables on every request.
+
+ROLLUPS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollup_store_month (
+    storeID TEXT,
+    month TEXT,
+    orders INTEGER,
+    quantity INTEGER,
+    revenue REAL,
+    PRIMARY KEY (storeID, month)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS rollup_state_month (
+    state TEXT,
+    month TEXT,
+    orders INTEGER,
+    quantity INTEGER,
+    revenue REAL,
+    PRIMARY KEY (state, month)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS rollup_sku_month (
+    SKU TEXT,
+    month TEXT,
+    orders INTEGER,
+    quantity INTEGER,
+    revenue REAL,
+    PRIMARY KEY (SKU, month)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS rollup_sku_day (
+    SKU TEXT,
+    day TEXT,
+    orders INTEGER,
+    quantity INTEGER,
+    revenue REAL,
+    PRIMARY KEY (SKU, day)
+) WITHOUT ROWID;
+
+-- orders counts the orders with at least one product of the category
+CREATE TABLE IF NOT EXISTS rollup_category_store_day (
+    Category TEXT,
+    storeID TEXT,
+    day TEXT,
+    orders INTEGER,
+    quantity INTEGER,
+    revenue REAL,
+    PRIMARY KEY (Category, storeID, day)
+) WITHOUT ROWID;
+
+-- new_customers counts customers whose first order ever was on this day at this store
+CREATE TABLE IF NOT EXISTS rollup_store_day (
+    storeID TEXT,
+    day TEXT,
+    orders INTEGER,
+    items INTEGER,
+    revenue REAL,
+    new_customers INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (storeID, day)
+) WITHOUT ROWID;
+"""
+
+ROLLUP_TABLES = ["rollup_store_month", "rollup_state_month", "rollup_sku_month", "rollup_sku_day",
+                 "rollup_category_store_day", "rollup_store_day"]
+
+
+def refresh_rollups(conn, since=None):
+    """
+    Recompute the rollups from order_lines. With `since` (an orderDate string)
+    only the periods that can contain orders from that date on are rebuilt:
+    whole months from the start of since's month, days from since's day.
+    The tables come from ROLLUPS_SCHEMA, which build_db.py runs before loading.
+    """
+    month_from = day_from = ""
+    if since:
+        month_from = since[:7]
+        day_from = since[:10]
+        for table in ROLLUP_TABLES:
+            column = "day" if table.endswith("_day") else "month"
+            conn.execute(f"DELETE FROM {table} WHERE {column} >= ?",
+                         (day_from if column == "day" else month_from,))
+    else:
+        for table in ROLLUP_TABLES:
+            conn.execute(f"DELETE FROM {table}")
+
+    # month >= '' and day >= '' are always true, so a full refresh needs no special case
+    conn.execute("""
+        INSERT INTO rollup_store_month (storeID, month, orders, quantity, revenue)
+        SELECT storeID, month, COUNT(DISTINCT orderID), SUM(quantity), SUM(revenue)
+        FROM order_lines
+        WHERE orderDate >= ?
+        GROUP BY storeID, month
+    """, (month_from,))
+    conn.execute("""
+        INSERT INTO rollup_state_month (state, month, orders, quantity, revenue)
+        SELECT s.state, r.month, SUM(r.orders), SUM(r.quantity), SUM(r.revenue)
+        FROM rollup_store_month r
+        JOIN stores s ON s.storeID = r.storeID
+        WHERE r.month >= ?
+        GROUP BY s.state, r.month
+    """, (month_from,))
+    conn.execute("""
+        INSERT INTO rollup_sku_day (SKU, day, orders, quantity, revenue)
+        SELECT SKU, substr(orderDate, 1, 10), COUNT(*), SUM(quantity), SUM(revenue)
+        FROM order_lines
+        WHERE orderDate >= ?
+        GROUP BY SKU, substr(orderDate, 1, 10)
+    """, (day_from,))
+    conn.execute("""
+        INSERT INTO rollup_sku_month (SKU, month, orders, quantity, revenue)
+        SELECT SKU, substr(day, 1, 7), SUM(orders), SUM(quantity), SUM(revenue)
+        FROM rollup_sku_day
+        WHERE day >= ?
+        GROUP BY SKU, substr(day, 1, 7)
+    """, (month_from,))
+    conn.execute("""
+        INSERT INTO rollup_category_store_day (Category, storeID, day, orders, quantity, revenue)
+        SELECT p.Category, l.storeID, substr(l.orderDate, 1, 10),
+               COUNT(DISTINCT l.orderID), SUM(l.quantity), SUM(l.revenue)
+        FROM order_lines l
+        JOIN products p ON p.SKU = l.SKU
+        WHERE l.orderDate >= ?
+        GROUP BY p.Category, l.storeID, substr(l.orderDate, 1, 10)
+    """, (day_from,))
+    conn.execute("""
+        INSERT INTO rollup_store_day (storeID, day, orders, items, revenue)
+        SELECT storeID, substr(orderDate, 1, 10), COUNT(*), SUM(nItems), SUM(total)
+        FROM orders
+        WHERE orderDate >= ?
+        GROUP BY storeID, substr(orderDate, 1, 10)
+    """, (day_from,))
+    # New orders all date from `since` on, so a customer's first order can only
+    # move to a day that is being rebuilt; only their customers need a look.
+    # MIN() makes SQLite take storeID from the first order's row.
+    conn.execute(f"""
+        INSERT INTO rollup_store_day (storeID, day, new_customers)
+        SELECT storeID, substr(first_order, 1, 10), COUNT(*)
+        FROM (
+            SELECT customerID, storeID, MIN(orderDate) AS first_order
+            FROM orders
+            {"WHERE customerID IN (SELECT customerID FROM orders WHERE orderDate >= ?)" if since else ""}
+            GROUP BY customerID
+        )
+        WHERE first_order >= ?
+        GROUP BY storeID, substr(first_order, 1, 10)
+        ON CONFLICT (storeID, day) DO UPDATE SET new_customers = excluded.new_customers
+    """, (day_from, day_from) if since else (day_from,))
@@ -0,0 +1,48 @@
+import itertools
+import json
+import os
+from pathlib import Path
+from shared.snapshot import SNAPSHOT_TABLES, id_dictionaries, pa, record_batches
+
+# Columnar snapshot of the tables the dashboard loads (see shared/snapshot.py),
+# one uncompressed Arrow IPC stream per table, so Maskdraft can memory-map
+# it instead of querying app.db row by row. Tables are written batch by
+# batch and never held in memory as a whole.
+
+
+def write_snapshot(conn, directory, data_version):
+    """
+    Export SNAPSHOT_TABLES from app.db into `directory`. Returns the row
+    count per table, or None when pyarrow is not installed. Only the build
+    and the API run without it; the dashboard requires pyarrow (see
+    Maskdraft/requirements.txt) for the snapshot and for reading app.db
+    when there is none.
+    """
+    if pa is None:
+        return None
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    dictionaries = id_dictionaries(conn)
+    # Mixing old and new streams must not look like a complete snapshot
+    (directory / "meta.json").unlink(missing_ok=True)
+
+    counts = {}
+    for name in SNAPSHOT_TABLES:
+        # A running dashboard may still have the old stream mapped; it keeps
+        # its mapping when the finished file replaces it under the same name
+        tmp = directory / f"{name}.tmp.arrows"
+        batches = record_batches(conn, name, dictionaries)
+        first = next(batches)
+        counts[name] = 0
+        with pa.OSFile(str(tmp), "wb") as sink, pa.ipc.new_stream(sink, first.schema) as writer:
+            for batch in itertools.chain([first], batches):
+                writer.write_batch(batch)
+                counts[name] += batch.num_rows
+        os.replace(tmp, directory / f"{name}.arrows")
+
+    # meta.json names the data version of the streams above; the dashboard
+    # ignores the directory until it is there, so it must come after them
+    tmp = directory / "meta.tmp.json"
+    tmp.write_text(json.dumps({"data_version": data_version, "tables": counts}))
+    os.replace(tmp, directory / "meta.json")
+    return counts
@@ -0,0 +1,131 @@
+import numpy as np
+
+# Market-basket mining over SKU bitsets, used by the API (api/basket.py, fed
+# from the basket store or order_lines) and by Maskdraft (the Kombikauf page,
+# fed from the loaded order items). Every order's basket is one uint64 mask
+# (at most 64 products); for mining, every SKU additionally gets a packed
+# bitmap over all orders, so the support of an itemset is the popcount of
+# the AND of its SKUs' bitmaps.
+
+# Largest itemset the miner grows to unless asked otherwise
+DEFAULT_MAX_SIZE = 3
+
+# Set bits per byte value, for NumPy versions without np.bitwise_count
+_POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def popcount_rows(words):
+    """
+    Number of set bits in each row of a 2-d uint64 array
+    """
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words).sum(axis=-1, dtype=np.int64)
+    return _POPCOUNT_TABLE[words.view(np.uint8)].sum(axis=-1, dtype=np.int64)
+
+
+class Baskets:
+    """
+    One SKU bitmask per order plus one order bitmap per SKU
+    """
+
+    def __init__(self, skus, masks):
+        if len(skus) > 64:
+            raise ValueError(f"{len(skus)} products do not fit into a 64-bit basket")
+        self.skus = list(skus)
+        self.masks = np.asarray(masks, dtype=np.uint64)
+        self.n_orders = len(self.masks)
+        # Row i has bit j set when order j contains SKU i, padded to whole words
+        n_words = -(-self.n_orders // 64)
+        self.sku_bits = np.zeros((len(self.skus), n_words), dtype=np.uint64)
+        row = np.zeros(n_words * 64, dtype=bool)
+        for i in range(len(self.skus)):
+            row[:self.n_orders] = (self.masks >> np.uint64(i)) & np.uint64(1)
+            self.sku_bits[i] = np.packbits(row).view(np.uint64)
+
+    @classmethod
+    def from_lines(cls, skus, order_ids, line_skus):
+        """
+        Baskets of order lines given as parallel orderID / SKU sequences, one
+        mask per distinct orderID; KeyError for a SKU not in skus
+        """
+        positions = {sku: i for i, sku in enumerate(skus)}
+        order_ids = np.asarray(order_ids)
+        bit_pos = np.fromiter((positions[sku] for sku in line_skus), dtype=np.uint64, count=len(order_ids))
+        by_order = np.argsort(order_ids, kind="stable")
+        order_ids, bits = order_ids[by_order], np.left_shift(np.uint64(1), bit_pos[by_order])
+        if not len(bits):
+            return cls(skus, np.empty(0, dtype=np.uint64))
+        starts = np.flatnonzero(np.r_[True, order_ids[1:] != order_ids[:-1]])
+        return cls(skus, np.bitwise_or.reduceat(bits, starts))
+
+    def decode(self, mask):
+        return [sku for i, sku in enumerate(self.skus) if mask >> i & 1]
+
+    def co_occurrence(self):
+        """
+        Square matrix of the number of orders containing both SKU i and SKU j;
+        the diagonal holds the orders per SKU
+        """
+        return np.stack([popcount_rows(self.sku_bits & row) for row in self.sku_bits])
+
+    def positions(self, mask):
+        return [i for i in range(len(self.skus)) if mask >> i & 1]
+
+    def support_count(self, mask):
+        """
+        Number of orders containing every SKU of the mask
+        """
+        rows = self.positions(mask)
+        if not rows:
+            return self.n_orders
+        return int(popcount_rows(np.bitwise_and.reduce(self.sku_bits[rows], axis=0)[None, :])[0])
+
+    def min_count(self, min_support):
+        """
+        Orders an itemset needs to reach the share min_support, at least one
+        """
+        return max(int(np.ceil(min_support * self.n_orders)), 1)
+
+
+def frequent_itemsets(baskets, min_count, max_size=DEFAULT_MAX_SIZE):
+    """
+    Return {mask: order count} of all itemsets bought in at least min_count
+    orders, up to max_size SKUs. Depth-first over the SKU order: an itemset
+    is only extended by SKUs that were frequent together with its parent
+    (the Apriori property), and each child costs one AND plus a popcount.
+    """
+    counts = popcount_rows(baskets.sku_bits)
+    items = [i for i in range(len(baskets.skus)) if counts[i] >= min_count]
+    frequent = {1 << i: int(counts[i]) for i in items}
+
+    def extend(mask, bits, candidates, size):
+        if size == max_size or not candidates:
+            return
+        joint = bits & baskets.sku_bits[candidates]
+        support = popcount_rows(joint)
+        kept = [j for j in range(len(candidates)) if support[j] >= min_count]
+        for n, j in enumerate(kept):
+            child = mask | 1 << candidates[j]
+            frequent[child] = int(support[j])
+            extend(child, joint[j], [candidates[k] for k in kept[n + 1:]], size + 1)
+
+    for n, i in enumerate(items):
+        extend(1 << i, baskets.sku_bits[i], items[n + 1:], 1)
+    return frequent
+
+
+def association_rules(frequent, n_orders):
+    """
+    Yield (antecedent, consequent, support, confidence, lift) for every split
+    of every frequent itemset with two or more SKUs
+    """
+    for mask, count in frequent.items():
+        if mask & (mask - 1) == 0:
+            continue
+        antecedent = (mask - 1) & mask
+        while antecedent:
+            consequent = mask ^ antecedent
+            confidence = count / frequent[antecedent]
+            lift = confidence / (frequent[consequent] / n_orders)
+            yield antecedent, consequent, count / n_orders, confidence, lift
+            antecedent = (antecedent - 1) & mask
@@ -0,0 +1,58 @@
+import math
+import numpy as np
+
+# Great-circle distances, shared by the database build, the API and the
+# Maskdraft dashboard: vectorized for NumPy arrays and scalar for the
+# SQLite functions in sqlfuncs.py.
+
+EARTH_RADIUS_KM = 6371
+KM_PER_DEGREE = np.pi * EARTH_RADIUS_KM / 180
+
+
+def haversine_np(lat1, lon1, lat2, lon2, dtype=np.float64):
+    """
+    Vectorized haversine distance in km; arguments broadcast like NumPy
+    arrays, so scalars and arrays can be mixed
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(x, dtype=dtype)) for x in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return (2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))).astype(dtype, copy=False)
+
+
+def distance_matrix(lats_a, lons_a, lats_b, lons_b, dtype=np.float64):
+    """
+    Many-to-many distances as a (len(a), len(b)) matrix
+    """
+    lats_a = np.asarray(lats_a, dtype=dtype)[:, None]
+    lons_a = np.asarray(lons_a, dtype=dtype)[:, None]
+    return haversine_np(lats_a, lons_a, lats_b, lons_b, dtype=dtype)
+
+
+def nearest_points(lats, lons, target_lats, target_lons):
+    """
+    Return (target positions, distances_km) of the nearest target per point
+    """
+    dist = distance_matrix(lats, lons, target_lats, target_lons)
+    best = np.argmin(dist, axis=1)
+    return best, dist[np.arange(len(best)), best]
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """
+    Great-circle distance in km between two points given in degrees
+    """
+    if None in (lat1, lon1, lat2, lon2):
+        return None
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    return haversine_km_rad(lat1, lon1, math.cos(lat1), lat2, lon2, math.cos(lat2))
+
+
+def haversine_km_rad(lat1, lon1, cos_lat1, lat2, lon2, cos_lat2):
+    """
+    Same distance from precomputed radians and cos(latitude): two sines, a
+    square root and an arcsine per call
+    """
+    if None in (lat1, lon1, cos_lat1, lat2, lon2, cos_lat2):
+        return None
+    a = math.sin((lat2 - lat1) / 2) ** 2 + cos_lat1 * cos_lat2 * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0)))
@@ -0,0 +1,118 @@
+import numpy as np
+from shared.geo import EARTH_RADIUS_KM, KM_PER_DEGREE, haversine_np, nearest_points
+
+# Grid spatial index for store-customer proximity queries, used by the API
+# (geo_index.py) and by Maskdraft (src/data/aggregates.py, spatial_index()).
+
+# Half the Earth's circumference: every point lies within this radius
+MAX_RADIUS_KM = np.pi * EARTH_RADIUS_KM
+
+
+class GridIndex:
+    """
+    Fixed lat/lon grid over a point set. Points are sorted by cell so every
+    cell is a contiguous slice; a radius query only measures the points in
+    the cells overlapping the query's bounding box.
+    """
+
+    def __init__(self, lats, lons, cell_deg=0.5):
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+        self.cell_deg = cell_deg
+        self.n_rows = int(np.floor(180 / cell_deg)) + 1
+        self.n_cols = int(np.ceil(360 / cell_deg))
+        keys = self._cell_keys(self.lats, self.lons)
+        self.order = np.argsort(keys, kind="stable")
+        self.sorted_keys = keys[self.order]
+
+    def _cell_keys(self, lats, lons):
+        rows = np.floor((np.asarray(lats) + 90) / self.cell_deg).astype(np.int64)
+        cols = np.floor((np.asarray(lons) + 180) / self.cell_deg).astype(np.int64)
+        return rows * self.n_cols + cols
+
+    def _candidates(self, lat, lon, radius_km):
+        # The bounding box never needs more than the whole globe: at most
+        # 180 degrees of latitude either way, and every column once the
+        # longitude span reaches 180 degrees or the box touches a pole
+        dlat = min(radius_km / KM_PER_DEGREE, 180)
+        max_lat = abs(lat) + dlat
+        row0, row1 = (int(np.floor((x + 90) / self.cell_deg)) for x in (max(lat - dlat, -90), min(lat + dlat, 90)))
+        rows = np.arange(max(row0, 0), min(row1, self.n_rows - 1) + 1)
+        dlon = 180 if max_lat >= 89.9 else radius_km / (KM_PER_DEGREE * np.cos(np.radians(max_lat)))
+        if dlon >= 180:
+            cols = np.arange(self.n_cols)
+        else:
+            col0, col1 = (int(np.floor((x + 180) / self.cell_deg)) for x in (lon - dlon, lon + dlon))
+            cols = np.arange(col0, col1 + 1) % self.n_cols
+        cell_keys = np.unique(rows[:, None] * self.n_cols + cols[None, :])
+        starts = np.searchsorted(self.sorted_keys, cell_keys, side="left")
+        ends = np.searchsorted(self.sorted_keys, cell_keys, side="right")
+        slices = [self.order[s:e] for s, e in zip(starts, ends) if e > s]
+        return np.concatenate(slices) if slices else np.empty(0, dtype=np.int64)
+
+    def within_radius(self, lat, lon, radius_km):
+        """
+        Return (indices, distances_km) of all points within radius_km, nearest
+        first. Raises ValueError for a negative or non-finite radius.
+        """
+        if not np.isfinite(radius_km) or radius_km < 0:
+            raise ValueError(f"radius must be a finite, non-negative number of km, got {radius_km!r}")
+        idx = self._candidates(lat, lon, min(radius_km, MAX_RADIUS_KM))
+        dist = haversine_np(self.lats[idx], self.lons[idx], lat, lon)
+        keep = dist <= radius_km
+        idx, dist = idx[keep], dist[keep]
+        order = np.argsort(dist, kind="stable")
+        return idx[order], dist[order]
+
+    def k_nearest(self, lat, lon, k):
+        """
+        Return (indices, distances_km) of the k nearest points. The search
+        radius doubles until it holds k points; every point within that radius
+        was measured, so the k smallest are exact.
+        """
+        k = min(k, len(self.lats))
+        radius = self.cell_deg * KM_PER_DEGREE
+        while True:
+            idx, dist = self.within_radius(lat, lon, min(radius, MAX_RADIUS_KM))
+            if len(idx) >= k or radius >= MAX_RADIUS_KM:
+                return idx[:k], dist[:k]
+            radius *= 2
+
+
+class StoreCustomerIndex:
+    """
+    Spatial lookups between stores and customers. Customer lookups return
+    positions into the customer arrays the index was built from.
+    """
+
+    def __init__(self, customer_ids, customer_lats, customer_lons,
+                 store_ids, store_lats, store_lons, cell_deg=0.5):
+        self.customer_ids = np.asarray(customer_ids)
+        self.customer_pos = {cid: i for i, cid in enumerate(self.customer_ids)}
+        self.customers = GridIndex(customer_lats, customer_lons, cell_deg)
+        self.store_ids = np.asarray(store_ids)
+        self.store_pos = {sid: i for i, sid in enumerate(self.store_ids)}
+        self.store_lats = np.asarray(store_lats, dtype=np.float64)
+        self.store_lons = np.asarray(store_lons, dtype=np.float64)
+
+    def store_location(self, store_id):
+        i = self.store_pos[store_id]
+        return self.store_lats[i], self.store_lons[i]
+
+    def within_radius(self, store_id, radius_km):
+        return self.customers.within_radius(*self.store_location(store_id), radius_km)
+
+    def k_nearest_customers(self, store_id, k):
+        return self.customers.k_nearest(*self.store_location(store_id), k)
+
+    def nearest_stores(self, lats, lons):
+        """
+        Nearest store for many points at once: (store_ids, distances_km)
+        """
+        best, dist = nearest_points(lats, lons, self.store_lats, self.store_lons)
+        return self.store_ids[best], dist
+
+    def nearest_store(self, customer_id):
+        i = self.customer_pos[customer_id]
+        store_ids, dist = self.nearest_stores(self.customers.lats[i:i + 1], self.customers.lons[i:i + 1])
+        return store_ids[0], dist[0]
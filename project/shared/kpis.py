@@ -0,0 +1,90 @@
+import numpy as np
+
+# Headline KPIs per store and day as cumulative sums, used by the API
+# (api/kpis.py, filled from rollup_store_day) and by the Maskdraft start page
+# (src/data/kpis.py, filled from the loaded orders). The total of any period
+# is the difference of two cumulative columns, so a new period, store or
+# state filter never rescans orders.
+
+FIELDS = ("orders", "items", "revenue", "new_customers")
+COUNT_FIELDS = ("orders", "items", "new_customers")
+
+
+class StoreKpis:
+    """
+    Cumulative orders, items, revenue and new customers per (store, day).
+
+    `cells` has the columns day, storeID, orders, items, revenue and
+    new_customers (dicts of sequences or DataFrames), at store-day grain or
+    finer; rows of unknown stores are dropped. The day axis runs from the
+    first to the last day of `cells`.
+    """
+
+    def __init__(self, store_ids, states, state_abbrs, cells):
+        self.store_ids = np.asarray(store_ids)
+        self.states = np.asarray(states)
+        self.state_abbrs = np.asarray(state_abbrs)
+        days = np.asarray(cells["day"], dtype="datetime64[D]")
+        self.first_day = days.min() if len(days) else np.datetime64("today", "D")
+        self.last_day = days.max() if len(days) else self.first_day
+        n_days = int((self.last_day - self.first_day).astype(int)) + 1
+
+        pos = {store_id: i for i, store_id in enumerate(self.store_ids)}
+        store_idx = np.fromiter((pos.get(s, -1) for s in cells["storeID"]), dtype=np.int64, count=len(days))
+        known = store_idx >= 0
+        flat = store_idx[known] * n_days + (days[known] - self.first_day).astype(np.int64)
+        size = len(self.store_ids) * n_days
+        self.cumulative = {}
+        for field in FIELDS:
+            weights = np.nan_to_num(np.asarray(cells[field], dtype=np.float64))[known]
+            daily = np.bincount(flat, weights=weights, minlength=size).reshape(len(self.store_ids), n_days)
+            self.cumulative[field] = np.concatenate(
+                [np.zeros((len(self.store_ids), 1)), daily.cumsum(axis=1)], axis=1)
+
+    def _offset(self, day):
+        # Days outside the data are clamped to its edges
+        offset = int((np.datetime64(day, "D") - self.first_day).astype(int))
+        return min(max(offset, 0), self.cumulative["orders"].shape[1] - 1)
+
+    def store_mask(self, store_id=None, state=None):
+        mask = np.ones(len(self.store_ids), dtype=bool)
+        if store_id:
+            mask &= self.store_ids == store_id
+        if state:
+            mask &= (self.states == state) | (self.state_abbrs == state)
+        return mask
+
+    def totals(self, start=None, end=None, store_id=None, state=None):
+        """
+        Every KPI from start to end inclusive (None = open), optionally for
+        one store or one state (name or abbreviation)
+        """
+        rows = self.store_mask(store_id, state)
+        i = 0 if start is None else self._offset(start)
+        j = self.cumulative["orders"].shape[1] - 1 if end is None else self._offset(np.datetime64(end, "D") + 1)
+        totals = {field: float((cum[rows, j] - cum[rows, i]).sum()) for field, cum in self.cumulative.items()}
+        for field in COUNT_FIELDS:
+            totals[field] = int(round(totals[field]))
+        totals["avg_order_value"] = totals["revenue"] / totals["orders"] if totals["orders"] else None
+        totals["avg_items"] = totals["items"] / totals["orders"] if totals["orders"] else None
+        return totals
+
+    def previous_period(self, start, end):
+        """
+        (start, end) of the period of the same length right before start..end,
+        or None if it would begin before the first day with orders: a
+        partial period would make any growth against it meaningless
+        """
+        start, end = np.datetime64(start, "D"), np.datetime64(end, "D")
+        length = end - start + 1
+        if start - length < self.first_day:
+            return None
+        return start - length, start - 1
+
+    def compare(self, start, end, store_id=None, state=None):
+        """
+        (totals of start..end, totals of the previous period or None)
+        """
+        previous = self.previous_period(start, end)
+        return (self.totals(start, end, store_id, state),
+                previous and self.totals(*previous, store_id, state))
@@ -0,0 +1,94 @@
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = None
+
+# The tables the dashboard loads, read from app.db as Arrow record batches:
+# build_db.py streams them into the snapshot (database/snapshot.py), and
+# Maskdraft reads them from app.db itself while there is no snapshot. IDs
+# are dictionary-encoded against one shared dictionary per ID column (so
+# they come back as matching pandas categoricals), dates are timestamps
+# and coordinates float32. The anomaly alerts are the ones build_db.py
+# raised (database/anomalies.py), named after their store or product.
+
+SNAPSHOT_TABLES = {
+    "customers": "SELECT customerID, latitude, longitude FROM customers",
+    "orders": "SELECT orderID, customerID, storeID, orderDate, nItems, total FROM orders",
+    "orderitems": "SELECT SKU, orderID, quantity FROM orderItems",
+    "products": "SELECT SKU, Name, Price, Category, Size, Launch FROM products",
+    "ingredients": "SELECT IngredientID, Name FROM ingredients",
+    "productingredients": "SELECT SKU, IngredientID FROM productingredients",
+    "stores": "SELECT storeID, zipcode, state_abbr, latitude, longitude, city, state, distance FROM stores",
+    "anomaly_alerts": """
+        SELECT a.day, a.kind, a.key, COALESCE(s.city, p.Name) AS name,
+               a.metric, a.value, a.expected, a.std, a.z
+        FROM anomaly_alerts a
+        LEFT JOIN stores s ON a.kind = 'store' AND s.storeID = a.key
+        LEFT JOIN products p ON a.kind = 'sku' AND p.SKU = a.key
+        ORDER BY a.day DESC, a.kind, a.key, a.metric
+    """,
+}
+
+# ID column -> every table that has it; the dictionary is the union
+ID_COLUMNS = {
+    "customerID": ("customers", "orders"),
+    "storeID": ("stores", "orders"),
+    "SKU": ("products", "orderItems", "productingredients"),
+}
+TIMESTAMP_COLUMNS = {"orderDate", "Launch", "day"}
+FLOAT32_COLUMNS = {"latitude", "longitude"}
+
+# Rows fetched from SQLite per record batch
+BATCH_ROWS = 100_000
+
+
+def id_dictionaries(conn):
+    """
+    ID column -> sorted Arrow array of every value it takes in any table
+    """
+    return {
+        column: pa.array([row[0] for row in conn.execute(
+            " UNION ".join(f"SELECT {column} FROM {table}" for table in tables) + " ORDER BY 1"
+        ) if row[0] is not None], type=pa.string())
+        for column, tables in ID_COLUMNS.items()
+    }
+
+
+def _column(name, values, dictionaries, type=None):
+    if name in dictionaries:
+        indices = pc.index_in(pa.array(values, type=pa.string()), value_set=dictionaries[name])
+        return pa.DictionaryArray.from_arrays(indices, dictionaries[name])
+    if name in TIMESTAMP_COLUMNS:
+        # SQLite keeps 'YYYY-MM-DD HH:MM:SS' text; Arrow parses ISO with a T
+        strings = pa.array([v.replace(" ", "T") if v else None for v in values], type=pa.string())
+        return strings.cast(pa.timestamp("ns"))
+    if name in FLOAT32_COLUMNS:
+        return pa.array(values, type=pa.float32())
+    return pa.array(values, type=type)
+
+
+def record_batches(conn, name, dictionaries):
+    """
+    Yield SNAPSHOT_TABLES[name] as record batches of at most BATCH_ROWS rows.
+    Every batch has the schema of the first; an empty table yields one
+    empty batch, so there always is a schema.
+    """
+    cursor = conn.execute(SNAPSHOT_TABLES[name])
+    columns = [d[0] for d in cursor.description]
+    rows = cursor.fetchmany(BATCH_ROWS)
+    schema = None
+    while True:
+        arrays = [_column(column, [row[i] for row in rows], dictionaries, schema and schema.field(i).type)
+                  for i, column in enumerate(columns)]
+        batch = pa.RecordBatch.from_arrays(arrays, names=columns) if schema is None \
+            else pa.RecordBatch.from_arrays(arrays, schema=schema)
+        schema = batch.schema
+        yield batch
+        rows = cursor.fetchmany(BATCH_ROWS)
+        if not rows:
+            return
+
+
+def read_table(conn, name, dictionaries):
+    return pa.Table.from_batches(list(record_batches(conn, name, dictionaries)))
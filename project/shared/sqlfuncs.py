@@ -0,0 +1,11 @@
+from shared.geo import haversine_km, haversine_km_rad
+
+# Scalar SQL functions registered on every build and API connection, so
+# queries do not depend on the math functions a particular SQLite build
+# was compiled with.
+
+
+def register_functions(conn):
+    # SQLite picks the implementation by argument count
+    conn.create_function("haversine_km", 4, haversine_km, deterministic=True)
+    conn.create_function("haversine_km", 6, haversine_km_rad, deterministic=True)
@@ -0,0 +1,183 @@
+import numpy as np
+
+# Dense revenue / order cube day x category x store and the trend math on
+# top of it, used by the API (api/trends.py, filled from the rollups) and by
+# Maskdraft (src/data/trends.py, filled from the loaded tables). Every trend
+# view only slices and sums the cube, so a new filter never rescans orders.
+
+METRICS = ("revenue", "orders")
+GROUPINGS = ("total", "category", "store")
+SEASONS = {"month": 12, "weekday": 7}
+# Trailing window and z-score threshold of the peak detection
+DEFAULT_PEAK_WINDOW = 28
+DEFAULT_PEAK_Z = 2.5
+
+
+def _positions(labels, values):
+    # Position of every value in labels, -1 for unknown ones
+    pos = {label: i for i, label in enumerate(labels)}
+    return np.fromiter((pos.get(v, -1) for v in values), dtype=np.int64, count=len(values))
+
+
+class TrendCube:
+    """
+    revenue and orders per (day, category, store) as NumPy arrays, plus the
+    distinct orders per (day, store): an order with products of two
+    categories counts once per category but only once in store_orders.
+
+    `cells` has the columns day, Category, storeID, revenue and orders,
+    `store_cells` day, storeID and orders (dicts of sequences or DataFrames).
+    The day axis runs from the first to the last day of store_cells; cells
+    of unknown categories or stores are dropped.
+    """
+
+    def __init__(self, categories, store_ids, states, state_abbrs, cells, store_cells):
+        self.categories = sorted(categories)
+        self.store_ids = list(store_ids)
+        self.states = np.asarray(states)
+        self.state_abbrs = np.asarray(state_abbrs)
+        days = np.asarray(store_cells["day"], dtype="datetime64[D]")
+        self.first_day = days.min() if len(days) else np.datetime64("today", "D")
+        n_days = int((days.max() - self.first_day).astype(int)) + 1 if len(days) else 1
+        self.days = self.first_day + np.arange(n_days)
+
+        shape = (n_days, len(self.categories), len(self.store_ids))
+        at = (self._offsets(cells["day"]), _positions(self.categories, cells["Category"]),
+              _positions(self.store_ids, cells["storeID"]))
+        keep = np.all([(axis >= 0) & (axis < size) for axis, size in zip(at, shape)], axis=0)
+        flat = np.ravel_multi_index(tuple(axis[keep] for axis in at), shape)
+        self.revenue = np.bincount(flat, weights=np.asarray(cells["revenue"], dtype=np.float64)[keep],
+                                   minlength=int(np.prod(shape))).reshape(shape)
+        self.orders = np.bincount(flat, weights=np.asarray(cells["orders"], dtype=np.float64)[keep],
+                                  minlength=int(np.prod(shape))).reshape(shape)
+
+        at = (self._offsets(store_cells["day"]), _positions(self.store_ids, store_cells["storeID"]))
+        keep = (at[0] >= 0) & (at[0] < n_days) & (at[1] >= 0)
+        flat = np.ravel_multi_index((at[0][keep], at[1][keep]), shape[::2])
+        self.store_orders = np.bincount(flat, weights=np.asarray(store_cells["orders"], dtype=np.float64)[keep],
+                                        minlength=n_days * len(self.store_ids)).reshape(shape[::2])
+
+    def _offsets(self, days):
+        return (np.asarray(days, dtype="datetime64[D]") - self.first_day).astype(np.int64)
+
+    def day_slice(self, start=None, end=None):
+        """
+        Slice of the day axis for start..end (inclusive, None = open)
+        """
+        lo = 0 if start is None else int(np.clip((np.datetime64(start, "D") - self.first_day).astype(int), 0, len(self.days)))
+        hi = len(self.days) if end is None else int(np.clip((np.datetime64(end, "D") - self.first_day).astype(int) + 1, 0, len(self.days)))
+        return slice(lo, max(lo, hi))
+
+    def store_mask(self, store_id=None, state=None):
+        mask = np.ones(len(self.store_ids), dtype=bool)
+        if store_id:
+            mask &= np.array(self.store_ids) == store_id
+        if state:
+            mask &= (self.states == state) | (self.state_abbrs == state)
+        return mask
+
+    def series(self, metric, by="total", categories=None, stores=None, total_label="total"):
+        """
+        Daily values over the whole day axis as (days x groups, group labels).
+        categories / stores are boolean masks; None keeps all.
+        """
+        cats = np.ones(len(self.categories), dtype=bool) if categories is None else categories
+        stores = np.ones(len(self.store_ids), dtype=bool) if stores is None else stores
+        store_labels = [s for s, keep in zip(self.store_ids, stores) if keep]
+        if metric == "orders" and by != "category" and cats.all():
+            # Orders across all categories: every order counts once
+            per_store = self.store_orders[:, stores]
+            if by == "store":
+                return per_store, store_labels
+            return per_store.sum(axis=1)[:, None], [total_label]
+        cube = (self.revenue if metric == "revenue" else self.orders)[:, cats][:, :, stores]
+        if by == "category":
+            return cube.sum(axis=2), [c for c, keep in zip(self.categories, cats) if keep]
+        if by == "store":
+            return cube.sum(axis=1), store_labels
+        return cube.sum(axis=(1, 2))[:, None], [total_label]
+
+
+def _month_starts(days):
+    months = days.astype("datetime64[M]")
+    return np.flatnonzero(np.r_[True, months[1:] != months[:-1]])
+
+
+def yoy_growth(days, values, window):
+    """
+    Monthly sums of `values` (days x groups) for the months of days[window]
+    next to the same calendar days one year earlier. Growth only compares
+    days that have a counterpart in the previous year, so a partial month
+    at either end is compared like for like. Returns (months, current,
+    previous, growth); previous and growth are NaN without previous-year data.
+    """
+    months = days.astype("datetime64[M]")
+    # Same calendar day a year earlier; 29 February maps to 1 March
+    prior = (months - 12).astype("datetime64[D]") + (days - months.astype("datetime64[D]"))
+    prior_idx = (prior - days[0]).astype(np.int64)
+    has_prior = prior_idx >= 0
+    previous = np.where(has_prior[:, None], values[np.maximum(prior_idx, 0)], 0.0)
+    compared = np.where(has_prior[:, None], values, 0.0)
+
+    sel_days = days[window]
+    if not len(sel_days):
+        empty = np.empty((0, values.shape[1]))
+        return np.empty(0, dtype="datetime64[M]"), empty, empty, empty
+    starts = _month_starts(sel_days)
+    current = np.add.reduceat(values[window], starts, axis=0)
+    compared = np.add.reduceat(compared[window], starts, axis=0)
+    previous = np.add.reduceat(previous[window], starts, axis=0)
+    previous[np.add.reduceat(has_prior[window].astype(np.int64), starts) == 0] = np.nan
+    with np.errstate(divide="ignore", invalid="ignore"):
+        growth = np.where(previous > 0, compared / previous - 1, np.nan)
+    return sel_days[starts].astype("datetime64[M]"), current, previous, growth
+
+
+def season_labels(days, kind):
+    if kind == "month":
+        return (days.astype("datetime64[M]").astype(np.int64) % 12)
+    # 1970-01-01 was a Thursday; 0 = Monday
+    return (days.astype(np.int64) + 3) % 7
+
+
+def seasonal_indices(days, values, kind):
+    """
+    Average daily value per month of the year or weekday divided by the
+    overall daily average (1.0 = an ordinary day). Returns (indices as
+    seasons x groups, days per season); seasons without days are NaN.
+    """
+    n_seasons = SEASONS[kind]
+    labels = season_labels(days, kind)
+    counts = np.bincount(labels, minlength=n_seasons)
+    onehot = np.zeros((len(days), n_seasons))
+    onehot[np.arange(len(days)), labels] = 1
+    sums = onehot.T @ values
+    overall = values.mean(axis=0) if len(days) else np.zeros(values.shape[1])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        indices = np.where((counts[:, None] > 0) & (overall > 0), sums / counts[:, None] / overall, np.nan)
+    return indices, counts
+
+
+def detect_peaks(values, window=DEFAULT_PEAK_WINDOW, threshold=DEFAULT_PEAK_Z):
+    """
+    Days whose value lies at least `threshold` standard deviations above
+    the mean of the `window` days before and is not lower than either
+    neighbour. Returns (indices sorted by z-score, expected, z) for a 1-d
+    series; the first `window` days have no baseline and are skipped.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) <= window:
+        return np.empty(0, dtype=np.int64), np.empty(0), np.empty(0)
+    csum = np.r_[0.0, np.cumsum(values)]
+    csq = np.r_[0.0, np.cumsum(values * values)]
+    idx = np.arange(window, len(values))
+    mean = (csum[idx] - csum[idx - window]) / window
+    var = np.maximum((csq[idx] - csq[idx - window]) / window - mean * mean, 0.0)
+    std = np.sqrt(var)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = np.where(std > 0, (values[idx] - mean) / std, 0.0)
+    padded = np.r_[-np.inf, values, -np.inf]
+    local_max = (values[idx] >= padded[idx]) & (values[idx] >= padded[idx + 2])
+    hits = np.flatnonzero((z >= threshold) & local_max)
+    order = hits[np.argsort(-z[hits], kind="stable")]
+    return idx[order], mean[order], z[order]
@@ -0,0 +1,102 @@
+import numpy as np
+from shared.geo import KM_PER_DEGREE, distance_matrix
+
+# Grid-based density analysis: customers are binned into square-ish cells of
+# cell_km (np.histogram2d), and every occupied cell is scored against the
+# store network. All functions work on plain coordinate arrays; the API
+# (routes/geo.py) and Maskdraft (callbacks/geoanalyse.py) both use them.
+
+# Cells considered as new-site candidates in the greedy placement
+MAX_CANDIDATE_CELLS = 500
+
+
+def density_grid(lats, lons, cell_km, weights=None):
+    """
+    Bin points into a lat/lon grid of roughly cell_km x cell_km. Returns
+    (counts, center_lats, center_lons) for the occupied cells, plus the
+    weighted sums of `weights` over the same cells when given.
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    dlat = cell_km / KM_PER_DEGREE
+    dlon = cell_km / (KM_PER_DEGREE * np.cos(np.radians(lats.mean())))
+    # One extra edge so the maximum falls inside the last cell
+    lat_edges = lats.min() + dlat * np.arange(int((lats.max() - lats.min()) // dlat) + 2)
+    lon_edges = lons.min() + dlon * np.arange(int((lons.max() - lons.min()) // dlon) + 2)
+    counts, _, _ = np.histogram2d(lats, lons, bins=[lat_edges, lon_edges])
+    rows, cols = np.nonzero(counts)
+    center_lats = (lat_edges[rows] + lat_edges[rows + 1]) / 2
+    center_lons = (lon_edges[cols] + lon_edges[cols + 1]) / 2
+    if weights is None:
+        return counts[rows, cols], center_lats, center_lons
+    sums, _, _ = np.histogram2d(lats, lons, bins=[lat_edges, lon_edges], weights=weights)
+    return counts[rows, cols], center_lats, center_lons, sums[rows, cols]
+
+
+def whitespot_cells(customer_lats, customer_lons, store_lats, store_lons, cell_km=25):
+    """
+    Occupied cells with their customer count and the distance from the cell
+    center to the nearest store, ranked by customers x distance (how much
+    travel the cell's customers have to make) descending
+    """
+    customers, lats, lons = density_grid(customer_lats, customer_lons, cell_km)
+    distance = distance_matrix(lats, lons, store_lats, store_lons).min(axis=1)
+    score = customers * distance
+    order = np.argsort(-score, kind="stable")
+    return {
+        "latitude": lats[order],
+        "longitude": lons[order],
+        "customers": customers[order].astype(np.int64),
+        "distance_km": distance[order],
+        "score": score[order],
+    }
+
+
+def candidate_sites(customer_lats, customer_lons, store_lats, store_lons, cell_km=25, n_sites=5):
+    """
+    Greedy placement of n_sites new stores on cell centers: each round picks
+    the candidate that cuts the customer-weighted distance to the nearest
+    store the most, then treats it as an existing store
+    """
+    customers, lats, lons = density_grid(customer_lats, customer_lons, cell_km)
+    current = distance_matrix(lats, lons, store_lats, store_lons).min(axis=1)
+    # Only the worst-served cells are worth considering as sites
+    candidates = np.argsort(-(customers * current), kind="stable")[:MAX_CANDIDATE_CELLS]
+    site_dist = distance_matrix(lats[candidates], lons[candidates], lats, lons, dtype=np.float32)
+
+    sites = []
+    for _ in range(min(n_sites, len(candidates))):
+        savings = (customers * np.maximum(current - site_dist, 0)).sum(axis=1)
+        best = int(np.argmax(savings))
+        if savings[best] <= 0:
+            break
+        served = site_dist[best] < current
+        sites.append({
+            "latitude": float(lats[candidates[best]]),
+            "longitude": float(lons[candidates[best]]),
+            "customers_served": int(customers[served].sum()),
+            "distance_saved_km": float(savings[best]),
+        })
+        current = np.minimum(current, site_dist[best])
+    return sites
+
+
+def growth_cells(customer_lats, customer_lons, customer_orders, cell_km=25, min_customers=10):
+    """
+    Cells with below-average orders per customer. Ranked by the orders that
+    are missing to reach the overall average, i.e. the growth potential.
+    """
+    customer_orders = np.asarray(customer_orders, dtype=np.float64)
+    customers, lats, lons, orders = density_grid(customer_lats, customer_lons, cell_km, customer_orders)
+    average = customer_orders.sum() / len(customer_orders) if len(customer_orders) else 0.0
+    penetration = orders / customers
+    potential = (average - penetration) * customers
+    keep = (customers >= min_customers) & (potential > 0)
+    order = np.argsort(-potential[keep], kind="stable")
+    return {
+        "latitude": lats[keep][order],
+        "longitude": lons[keep][order],
+        "customers": customers[keep][order].astype(np.int64),
+        "orders_per_customer": penetration[keep][order],
+        "missing_orders": potential[keep][order],
+    }
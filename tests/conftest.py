@@ -0,0 +1,117 @@
+import csv
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+for path in ("project", "project/api", "project/database", "Maskdraft"):
+    sys.path.insert(0, str(ROOT / path))
+
+import build_db  # noqa: E402
+from bulk_loader import build_pragmas  # noqa: E402
+from shared.sqlfuncs import register_functions  # noqa: E402
+
+STORES = [
+    ("S100001", 95814, "CA", 38.58, -121.49, "Sacramento", "California", 0.0),
+    ("S100002", 94103, "CA", 37.77, -122.41, "San Francisco", "California", 0.0),
+    ("S100003", 89501, "NV", 39.53, -119.81, "Reno", "Nevada", 0.0),
+]
+PRODUCTS = [
+    ("PZ001", "Margherita Pizza", 10.99, "Classic", "Small", "Tomato, Mozzarella", "2018-01-01"),
+    ("PZ002", "Margherita Pizza", 14.99, "Classic", "Large", "Tomato, Mozzarella", "2018-01-01"),
+    ("PZ003", "Pepperoni Pizza", 12.99, "Classic", "Small", "Tomato, Pepperoni", "2018-01-01"),
+    ("PZ004", "Veggie Pizza", 13.49, "Vegetarian", "Small", "Tomato, Peppers", "2020-06-01"),
+    ("PZ005", "Veggie Pizza", 16.49, "Vegetarian", "Large", "Tomato, Peppers", "2020-06-01"),
+]
+INGREDIENTS = [(1, "Tomato"), (2, "Mozzarella"), (3, "Pepperoni"), (4, "Peppers")]
+PRODUCT_INGREDIENTS = [("PZ001", 1), ("PZ001", 2), ("PZ002", 1), ("PZ002", 2), ("PZ003", 1),
+                       ("PZ003", 3), ("PZ004", 1), ("PZ004", 4), ("PZ005", 1), ("PZ005", 4)]
+FIRST_ORDER = datetime(2020, 1, 1, 11, 0)
+
+
+def _write(path, header, rows):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def write_sample_csvs(directory, n_orders=3000, n_customers=300, seed=7):
+    """
+    Write the seven CSVs build_db.py reads. Orders are spread over two years
+    so the daily rollups, trends and baselines have something to work on;
+    the first n orders are the same for every n, so a prefix can be built
+    first and the rest ingested incrementally.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    store = rng.integers(len(STORES), size=n_customers)
+    customers = [
+        (f"C{i:06d}", STORES[s][3] + rng.normal(0, 0.4), STORES[s][4] + rng.normal(0, 0.4))
+        for i, s in enumerate(store)
+    ]
+    _write(directory / "customers.csv", ["customerID", "latitude", "longitude"], customers)
+    _write(directory / "stores.csv",
+           ["storeID", "zipcode", "state_abbr", "latitude", "longitude", "city", "state", "distance"], STORES)
+    _write(directory / "products.csv",
+           ["SKU", "Name", "Price", "Category", "Size", "Ingredients", "Launch"], PRODUCTS)
+    _write(directory / "ingredients.csv", ["IngredientID", "Name"], INGREDIENTS)
+    _write(directory / "productingredients.csv", ["SKU", "IngredientID"], PRODUCT_INGREDIENTS)
+
+    # Drawn order by order, so n_orders only decides where the list stops
+    rng = np.random.default_rng(seed + 1)
+    mean_gap = 2 * 365 * 24 * 60 // 3000
+    minute = 0
+    orders, items = [], []
+    for order_id in range(1, n_orders + 1):
+        minute += int(rng.integers(0, 2 * mean_gap + 1))
+        customer = int(rng.integers(n_customers))
+        skus = rng.choice(len(PRODUCTS), size=int(rng.integers(1, 4)))
+        total = round(sum(PRODUCTS[k][2] for k in skus), 2)
+        when = FIRST_ORDER + timedelta(minutes=int(minute))
+        orders.append((order_id, customers[customer][0], STORES[store[customer]][0],
+                       when.strftime("%Y-%m-%d %H:%M:%S"), len(skus), total))
+        items.extend((PRODUCTS[k][0], order_id) for k in skus)
+    _write(directory / "orders.csv", ["orderID", "customerID", "storeID", "orderDate", "nItems", "total"], orders)
+    _write(directory / "orderItems.csv", ["SKU", "orderID"], items)
+
+
+def build_database(data_dir, db_file, incremental=False):
+    """
+    Run build_db.py against data_dir, writing db_file and its side files
+    (basket store, dashboard snapshot) next to it
+    """
+    db_file = Path(db_file)
+    with mock.patch.multiple(build_db, DATA_DIR=Path(data_dir), DB_FILE=db_file,
+                             SNAPSHOT_DIR=db_file.parent / "snapshot"):
+        conn = sqlite3.connect(db_file)
+        conn.execute("PRAGMA foreign_keys = ON;")
+        register_functions(conn)
+        if incremental:
+            build_db.incremental_ingest(conn)
+        else:
+            with build_pragmas(conn):
+                build_db.full_build(conn)
+        conn.close()
+    return db_file
+
+
+@pytest.fixture(scope="session")
+def sample_db(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("sample")
+    write_sample_csvs(directory / "data")
+    return build_database(directory / "data", directory / "app.db")
+
+
+@pytest.fixture(scope="session")
+def api_client(sample_db):
+    import pool
+    from server import app
+    pool.configure_pool(db_path=sample_db)
+    return app.test_client()
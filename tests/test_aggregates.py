@@ -0,0 +1,36 @@
+import basket
+from cache import data_version
+from src.data.data_loader import load_all_data
+
+
+def test_cubes_are_built_on_first_use_and_cached(sample_db):
+    data = load_all_data(sample_db.parent / "snapshot", sample_db)
+    aggregates = data["aggregates"]
+    assert aggregates.stats()["entries"] == {}
+
+    cube = aggregates.trend_cube()
+    assert aggregates.trend_cube() is cube
+    stats = aggregates.stats()
+    assert list(stats["entries"]) == ["trend_cube"]
+    assert stats["entries"]["trend_cube"] >= cube.revenue.nbytes
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+    # The assignments build the spatial index they need on the way
+    assignments = aggregates.assignments()
+    assert set(aggregates.stats()["entries"]) == {"trend_cube", "spatial_index", "assignments"}
+    assert assignments["storeID"].isin(data["stores_df"]["storeID"]).all()
+
+    data["data_version"] = "next"
+    assert aggregates.trend_cube() is not cube
+
+
+def test_mined_itemsets_follow_the_data_version(sample_db, api_client):
+    data = load_all_data(sample_db.parent / "snapshot", sample_db)
+    aggregates = data["aggregates"]
+    frequent = aggregates.frequent_itemsets(0.02, 3)
+    assert aggregates.frequent_itemsets(0.02, 3) is frequent
+    assert frequent == basket.mine(data_version(), 0.02, 3)[1]
+    assert aggregates.baskets().skus == basket.get_baskets(data_version()).skus
+
+    data["data_version"] = "next"
+    assert aggregates.frequent_itemsets(0.02, 3) is not frequent
@@ -0,0 +1,113 @@
+import math
+import sqlite3
+
+import numpy as np
+import pytest
+
+from anomalies import ALERT_Z, ANOMALY_SCHEMA, EWMA_ALPHA, MIN_HISTORY_DAYS, update_baselines
+from rollups import ROLLUPS_SCHEMA
+
+START = np.datetime64("2022-03-01")
+SPIKE_DAY = 25
+
+
+def store_days():
+    # S1 alternates between two levels and spikes once; S2 opens on day 10.
+    # The last day (30) is still open and must not be folded in.
+    rows = []
+    for t in range(31):
+        revenue = 500.0 if t == SPIKE_DAY else 100.0 + 10 * (t % 2)
+        rows.append(("S1", str(START + t), 10 + t % 2, revenue))
+        if t >= 10:
+            rows.append(("S2", str(START + t), 3, 30.0))
+    return rows
+
+
+def load(conn, rows):
+    conn.executemany("INSERT INTO rollup_store_day (storeID, day, orders, revenue) VALUES (?, ?, ?, ?)", rows)
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.executescript(ROLLUPS_SCHEMA + ANOMALY_SCHEMA)
+    yield conn
+    conn.close()
+
+
+def reference(values):
+    """
+    The EWMA recurrence and alert rule written out day by day
+    """
+    mean = var = 0.0
+    days = 0
+    alerts = []
+    for t, x in enumerate(values):
+        std = math.sqrt(var)
+        if days >= MIN_HISTORY_DAYS and std > 0 and abs(x - mean) / std >= ALERT_Z:
+            alerts.append((t, x, mean, std, (x - mean) / std))
+        if days:
+            diff = x - mean
+            mean += EWMA_ALPHA * diff
+            var = (1 - EWMA_ALPHA) * (var + diff * EWMA_ALPHA * diff)
+            days += 1
+        elif x > 0:
+            mean, days = x, 1
+    return mean, var, days, alerts
+
+
+def test_baselines_follow_the_ewma_recurrence(conn):
+    load(conn, store_days())
+    assert update_baselines(conn) == 1
+
+    revenue = [row[3] for row in store_days() if row[0] == "S1"][:-1]
+    mean, var, days, alerts = reference(revenue)
+    assert conn.execute("""
+        SELECT day, days, mean, var FROM ewma_baselines
+        WHERE kind = 'store' AND key = 'S1' AND metric = 'revenue'
+    """).fetchone() == (str(START + 29), days, pytest.approx(mean), pytest.approx(var))
+    assert days == 30
+    # S2's baseline starts on its first day with orders
+    assert conn.execute("""
+        SELECT days FROM ewma_baselines WHERE key = 'S2' AND metric = 'orders'
+    """).fetchone()[0] == 20
+
+    [(t, x, expected, std, z)] = alerts
+    assert t == SPIKE_DAY
+    assert conn.execute("SELECT kind, key, metric, day, value, expected, std, z FROM anomaly_alerts").fetchall() == [
+        ("store", "S1", "revenue", str(START + SPIKE_DAY), x,
+         pytest.approx(expected), pytest.approx(std), pytest.approx(z))
+    ]
+
+
+def test_folding_in_two_runs_matches_one(conn):
+    load(conn, store_days())
+    update_baselines(conn)
+    once = conn.execute("SELECT * FROM ewma_baselines ORDER BY kind, key, metric").fetchall()
+
+    with sqlite3.connect(":memory:") as split:
+        split.executescript(ROLLUPS_SCHEMA + ANOMALY_SCHEMA)
+        rows = store_days()
+        cut = str(START + 18)
+        load(split, [row for row in rows if row[1] <= cut])
+        update_baselines(split)
+        load(split, [row for row in rows if row[1] > cut])
+        assert update_baselines(split) == 1
+        twice = split.execute("SELECT * FROM ewma_baselines ORDER BY kind, key, metric").fetchall()
+        assert split.execute("SELECT key, day FROM anomaly_alerts").fetchall() == [("S1", str(START + SPIKE_DAY))]
+
+    assert [row[:5] for row in twice] == [row[:5] for row in once]
+    assert np.allclose([row[5:] for row in twice], [row[5:] for row in once])
+
+
+def test_dashboard_reads_the_alerts_of_the_build(sample_db):
+    from src.data.data_loader import load_tables
+    tables, _ = load_tables(sample_db.parent / "snapshot", sample_db)
+    alerts = tables["anomaly_alerts"]
+    with sqlite3.connect(sample_db) as conn:
+        assert len(alerts) == conn.execute("SELECT COUNT(*) FROM anomaly_alerts").fetchone()[0]
+        stores = dict(conn.execute("SELECT storeID, city FROM stores"))
+    assert alerts["day"].is_monotonic_decreasing
+    assert alerts["day"].dtype == "datetime64[ns]"
+    store_alerts = alerts[alerts["kind"] == "store"]
+    assert (store_alerts["name"] == store_alerts["key"].map(stores)).all()
@@ -0,0 +1,136 @@
+import sqlite3
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import basket
+from cache import data_version
+from shared.basket import Baskets, association_rules, frequent_itemsets
+
+# Five orders over three products: A in 4, B in 4, C in 2, AB in 3, AC in 1,
+# BC in 2 and ABC in 1 of them
+FIXTURE = Baskets(["A", "B", "C"], [0b011, 0b111, 0b001, 0b110, 0b011])
+A, B, C = 0b001, 0b010, 0b100
+
+
+def test_frequent_itemsets_count_the_orders_of_every_combination():
+    assert frequent_itemsets(FIXTURE, 1) == {A: 4, B: 4, C: 2, A | B: 3, A | C: 1, B | C: 2, A | B | C: 1}
+    assert frequent_itemsets(FIXTURE, 2) == {A: 4, B: 4, C: 2, A | B: 3, B | C: 2}
+    assert frequent_itemsets(FIXTURE, 1, max_size=2) == {A: 4, B: 4, C: 2, A | B: 3, A | C: 1, B | C: 2}
+    assert FIXTURE.min_count(0.4) == 2 and FIXTURE.min_count(0.41) == 3 and FIXTURE.min_count(0.0001) == 1
+
+
+def test_association_rules_have_support_confidence_and_lift():
+    rules = {(a, c): rule for a, c, *rule in association_rules(frequent_itemsets(FIXTURE, 2), FIXTURE.n_orders)}
+    assert set(rules) == {(A, B), (B, A), (B, C), (C, B)}
+    assert rules[A, B] == pytest.approx((0.6, 0.75, 0.9375))
+    assert rules[C, B] == pytest.approx((0.4, 1.0, 1.25))
+    assert rules[B, C] == pytest.approx((0.4, 0.5, 1.25))
+    rules = {(a, c): rule for a, c, *rule in association_rules(frequent_itemsets(FIXTURE, 1), FIXTURE.n_orders)}
+    assert rules[A | B, C] == pytest.approx((0.2, 1 / 3, 5 / 6))
+
+
+def test_baskets_from_lines_merge_the_lines_of_an_order():
+    baskets = Baskets.from_lines(["A", "B", "C"], [7, 3, 7, 3, 9, 3], ["B", "A", "A", "A", "C", "C"])
+    assert baskets.masks.tolist() == [A | C, A | B, C]
+    assert baskets.co_occurrence().tolist() == [[2, 1, 1], [1, 1, 0], [1, 0, 2]]
+    assert baskets.support_count(A | C) == 1 and baskets.support_count(0) == 3
+    with pytest.raises(KeyError):
+        Baskets.from_lines(["A"], [1], ["Z"])
+
+
+@pytest.fixture(scope="module")
+def lines(sample_db):
+    with sqlite3.connect(sample_db) as conn:
+        return pd.read_sql("SELECT orderID, SKU, storeID, substr(orderDate, 1, 10) AS day FROM order_lines", conn)
+
+
+def test_basket_store_matches_the_order_lines(api_client, lines):
+    store = basket.get_store(data_version())
+    assert store is not None
+    expected = Baskets.from_lines(store.skus, lines["orderID"], lines["SKU"])
+    assert store.order_ids.tolist() == sorted(lines["orderID"].unique())
+    assert np.array_equal(store.masks, expected.masks)
+
+
+def test_fallback_baskets_match_the_store(api_client, monkeypatch):
+    version = data_version()
+    from_store = basket.get_baskets(version)
+    monkeypatch.setattr(basket, "get_store", lambda version: None)
+    monkeypatch.setattr(basket, "_baskets", None)
+    from_lines = basket.get_baskets(version)
+    assert from_lines.skus == from_store.skus
+    assert sorted(from_lines.masks.tolist()) == sorted(from_store.masks.tolist())
+
+
+def test_basket_route_counts_the_orders_per_combination(api_client, lines):
+    rows = api_client.get("/api/orders/basket?min_support=0.02&max_size=3&limit=500").get_json()
+    per_order = lines.groupby("orderID")["SKU"].agg(lambda skus: frozenset(skus))
+    n_orders = len(per_order)
+    expected = {}
+    for skus in per_order:
+        for size in (2, 3):
+            for combo in combinations(sorted(skus), size):
+                expected[combo] = expected.get(combo, 0) + 1
+    expected = {combo: n for combo, n in expected.items() if n >= 0.02 * n_orders}
+    assert {tuple(row["SKUs"]): row["orders"] for row in rows} == expected
+    assert [row["orders"] for row in rows] == sorted(expected.values(), reverse=True)
+    assert all(row["support"] == round(row["orders"] / n_orders, 5) for row in rows)
+
+
+def test_rules_route_derives_confidence_and_lift(api_client, lines):
+    rules = api_client.get("/api/orders/basket/rules?min_confidence=0&min_lift=0&max_size=2&limit=500").get_json()
+    per_order = lines.groupby("orderID")["SKU"].agg(set)
+    n_orders = len(per_order)
+    for rule in rules:
+        (a,), (c,) = rule["antecedent"], rule["consequent"]
+        both = sum(a in skus and c in skus for skus in per_order)
+        with_a = sum(a in skus for skus in per_order)
+        with_c = sum(c in skus for skus in per_order)
+        assert rule["support"] == pytest.approx(both / n_orders, abs=1e-5)
+        assert rule["confidence"] == pytest.approx(both / with_a, abs=1e-4)
+        assert rule["lift"] == pytest.approx(both / with_a / (with_c / n_orders), abs=1e-4)
+    assert len(rules) == 2 * len(api_client.get("/api/orders/basket?max_size=2&limit=500").get_json())
+    assert [rule["lift"] for rule in rules] == sorted((rule["lift"] for rule in rules), reverse=True)
+
+
+def test_pairs_route_is_the_co_occurrence_matrix(api_client, lines):
+    body = api_client.get("/api/orders/basket/pairs").get_json()
+    per_order = lines.groupby("orderID")["SKU"].agg(set)
+    for i, a in enumerate(body["skus"]):
+        for j, b in enumerate(body["skus"]):
+            assert body["counts"][i][j] == sum(a in skus and b in skus for skus in per_order)
+
+
+def test_containing_and_stores_routes_filter_by_date(api_client, lines):
+    orders = lines.groupby("orderID").agg(skus=("SKU", set), storeID=("storeID", "first"), day=("day", "first"))
+    orders = orders[(orders["day"] >= "2021-01-01") & (orders["day"] <= "2021-06-30")]
+    window = "from=2021-01-01&to=2021-06-30"
+
+    body = api_client.get(f"/api/orders/basket/containing?skus=PZ001,PZ003&{window}").get_json()
+    hits = orders[orders["skus"].map(lambda skus: {"PZ001", "PZ003"} <= skus)]
+    assert body["orders"] == len(hits)
+    assert body["share"] == round(len(hits) / len(orders), 5)
+    assert {row["storeID"]: row["orders"] for row in body["by_store"]} == hits["storeID"].value_counts().to_dict()
+
+    rows = api_client.get(f"/api/orders/basket/stores?{window}").get_json()
+    sizes = orders["skus"].map(len)
+    for row in rows:
+        in_store = sizes[orders["storeID"] == row["storeID"]]
+        assert row["orders"] == len(in_store)
+        assert row["avg_products"] == round(in_store.mean(), 3)
+        assert row["multi_product_share"] == round((in_store > 1).mean(), 4)
+
+
+@pytest.mark.parametrize("url", [
+    "/api/orders/basket?min_support=0",
+    "/api/orders/basket?max_size=1",
+    "/api/orders/basket/rules?limit=0",
+    "/api/orders/basket/containing?skus=PZ999",
+    "/api/orders/basket/containing",
+    "/api/orders/basket/stores?from=2021-13-01",
+])
+def test_basket_routes_reject_bad_parameters(api_client, url):
+    assert api_client.get(url).status_code == 400
@@ -0,0 +1,57 @@
+import pytest
+
+import cache
+from cache import ResponseCache
+
+URL = "/api/customers/density"
+
+
+@pytest.fixture
+def response_cache(api_client):
+    response_cache = api_client.application.extensions["response_cache"]
+    response_cache.sync_version(None)
+    return response_cache
+
+
+def test_etag_answers_if_none_match_with_304(api_client, response_cache):
+    first = api_client.get(URL)
+    assert first.headers["X-Cache"] == "MISS" and first.headers["ETag"]
+    second = api_client.get(URL)
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert second.get_data() == first.get_data()
+
+    unchanged = api_client.get(URL, headers={"If-None-Match": first.headers["ETag"]})
+    assert unchanged.status_code == 304 and unchanged.get_data() == b""
+    assert api_client.get(URL, headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+def test_new_data_version_empties_the_cache(api_client, response_cache, monkeypatch):
+    first = api_client.get(URL)
+    assert api_client.get(URL).headers["X-Cache"] == "HIT"
+    monkeypatch.setattr(cache, "data_version", lambda: "next")
+    again = api_client.get(URL)
+    assert again.headers["X-Cache"] == "MISS"
+    assert again.headers["ETag"] != first.headers["ETag"]
+    assert response_cache.stats()["data_version"] == "next"
+    assert api_client.get(URL, headers={"If-None-Match": first.headers["ETag"]}).status_code == 200
+
+
+def test_lru_stays_within_the_byte_budget():
+    lru = ResponseCache(max_bytes=100)
+    lru.sync_version("v1")
+    for key in "abc":
+        lru.put(key, "v1", b"x" * 25, "application/json", [], key)
+    assert lru.get("a") is not None
+    lru.put("d", "v1", b"x" * 25, "application/json", [], "d")
+    lru.put("e", "v1", b"x" * 25, "application/json", [], "e")
+    # b was the least recently used; a was read after c was stored
+    assert lru.get("b") is None
+    assert all(lru.get(key) is not None for key in "acde")
+    assert lru.stats()["bytes"] == 100
+
+    lru.put("big", "v1", b"x" * 26, "application/json", [], "big")
+    lru.put("old", "v0", b"x", "application/json", [], "old")
+    assert lru.get("big") is None and lru.get("old") is None
+    lru.sync_version("v2")
+    assert lru.stats()["entries"] == 0 and lru.stats()["bytes"] == 0
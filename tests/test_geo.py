@@ -0,0 +1,92 @@
+import time
+
+import numpy as np
+import pytest
+
+from shared.geo import haversine_np
+from shared.grid_index import MAX_RADIUS_KM, GridIndex
+
+
+@pytest.fixture(scope="module")
+def points():
+    rng = np.random.default_rng(3)
+    # A dense cluster plus points near both poles and the date line
+    lats = np.concatenate([rng.normal(38, 2, 2000), rng.uniform(85, 90, 50), rng.uniform(-90, -85, 50),
+                           rng.uniform(-60, 60, 100)])
+    lons = np.concatenate([rng.normal(-120, 2, 2000), rng.uniform(-180, 180, 100),
+                           rng.choice([-179.9, 179.9], 100)])
+    return lats, lons
+
+
+@pytest.mark.parametrize("lat, lon, radius_km", [
+    (38, -120, 0), (38, -120, 50), (38, -120, 800), (89.5, 10, 300), (-89.9, 0, 50),
+    (0, 179.95, 500), (0, -179.95, 500), (38, -120, 15000), (38, -120, MAX_RADIUS_KM),
+])
+def test_within_radius_matches_brute_force(points, lat, lon, radius_km):
+    lats, lons = points
+    index = GridIndex(lats, lons)
+    idx, dist = index.within_radius(lat, lon, radius_km)
+    expected = np.flatnonzero(haversine_np(lats, lons, lat, lon) <= radius_km)
+    assert sorted(idx.tolist()) == expected.tolist()
+    assert np.all(np.diff(dist) >= 0)
+
+
+def test_radius_beyond_half_circumference_is_cheap(points):
+    lats, lons = points
+    index = GridIndex(lats, lons)
+    start = time.perf_counter()
+    idx, _ = index.within_radius(38, -120, 200_000)
+    assert len(idx) == len(lats)
+    assert time.perf_counter() - start < 1
+
+
+@pytest.mark.parametrize("radius_km", [float("inf"), float("nan"), -1])
+def test_within_radius_rejects_invalid_radius(points, radius_km):
+    with pytest.raises(ValueError):
+        GridIndex(*points).within_radius(38, -120, radius_km)
+
+
+def test_k_nearest_is_exact(points):
+    lats, lons = points
+    idx, dist = GridIndex(lats, lons).k_nearest(89.9, 0, 25)
+    expected = np.sort(haversine_np(lats, lons, 89.9, 0))[:25]
+    assert np.allclose(dist, expected)
+
+
+@pytest.mark.parametrize("km", ["inf", "nan", "-1", "200000", "1e309"])
+def test_within_radius_endpoint_rejects_bad_km(api_client, km):
+    response = api_client.get(f"/api/geo/within_radius?store=S100001&km={km}")
+    assert response.status_code == 400
+
+
+def test_within_radius_endpoint(api_client):
+    response = api_client.get("/api/geo/within_radius?store=S100001&km=30")
+    assert response.status_code == 200
+    rows = response.get_json()
+    assert rows and all(row["distance_km"] <= 30 for row in rows)
+    assert [row["distance_km"] for row in rows] == sorted(row["distance_km"] for row in rows)
+    assert api_client.get("/api/geo/within_radius?store=nope").status_code == 404
+
+
+@pytest.mark.parametrize("url", [
+    "/api/geo/within_radius?store=S100001&km=abc",
+    "/api/geo/k_nearest_customers?store=S100001&k=ten",
+    "/api/geo/k_nearest_customers?store=S100001&k=0",
+    "/api/geo/k_nearest_customers?store=S100001&k=2.5",
+    "/api/geo/whitespots?cell_km=abc",
+    "/api/geo/whitespots?limit=x",
+    "/api/geo/candidates?cell_km=nan",
+    "/api/geo/candidates?n=five",
+    "/api/geo/candidates?n=-1",
+    "/api/geo/growth?min_customers=many",
+])
+def test_geo_endpoints_reject_bad_numbers(api_client, url):
+    response = api_client.get(url)
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+def test_geo_endpoints_accept_explicit_numbers(api_client):
+    assert len(api_client.get("/api/geo/k_nearest_customers?store=S100001&k=3").get_json()) == 3
+    assert len(api_client.get("/api/geo/candidates?cell_km=50&n=2").get_json()) <= 2
+    assert api_client.get("/api/geo/whitespots?cell_km=10.5&limit=4").status_code == 200
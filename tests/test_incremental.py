@@ -0,0 +1,86 @@
+import csv
+import sqlite3
+
+import numpy as np
+import pytest
+
+from basket_store import ARRAYS, store_dir
+from conftest import build_database, write_sample_csvs
+
+PREFIX_ORDERS = 2000
+
+COMPARED = {
+    "customers": "customerID",
+    "orders": "orderID",
+    "orderItems": "orderID, SKU",
+    "order_lines": "orderID, SKU",
+    "rollup_store_month": "storeID, month",
+    "rollup_state_month": "state, month",
+    "rollup_sku_month": "SKU, month",
+    "rollup_sku_day": "SKU, day",
+    "rollup_category_store_day": "Category, storeID, day",
+    "rollup_store_day": "storeID, day",
+    "ewma_baselines": "kind, key, metric",
+    "anomaly_alerts": "kind, key, metric, day",
+    "store_customer_pairs": "storeID, customerID",
+    "customer_assignments": "customerID",
+    "build_meta": "key",
+}
+
+
+def rows(db_file, table, order_by):
+    with sqlite3.connect(db_file) as conn:
+        return conn.execute(f"SELECT * FROM {table} ORDER BY {order_by}").fetchall()
+
+
+@pytest.fixture(scope="module")
+def builds(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("incremental")
+    write_sample_csvs(directory / "prefix", n_orders=PREFIX_ORDERS)
+    write_sample_csvs(directory / "data")
+    incremental = build_database(directory / "prefix", directory / "incremental.db")
+    build_database(directory / "data", incremental, incremental=True)
+    full = build_database(directory / "data", directory / "full.db")
+    return incremental, full
+
+
+@pytest.mark.parametrize("table", COMPARED)
+def test_ingest_matches_a_full_build(builds, table):
+    incremental, full = (rows(db, table, COMPARED[table]) for db in builds)
+    if table == "build_meta":
+        incremental, full = ([row for row in r if row[0] != "data_version"] for r in (incremental, full))
+    assert len(incremental) == len(full) > 0
+    for got, expected in zip(incremental, full):
+        assert got == pytest.approx(expected)
+
+
+def test_ingest_appends_to_the_basket_store(builds):
+    incremental, full = (store_dir(db) for db in builds)
+    for name in ARRAYS + ("skus", "store_ids"):
+        assert np.array_equal(np.load(incremental / f"{name}.npy"), np.load(full / f"{name}.npy"))
+
+
+@pytest.fixture
+def prefix_db(tmp_path):
+    write_sample_csvs(tmp_path / "prefix", n_orders=PREFIX_ORDERS)
+    write_sample_csvs(tmp_path / "data")
+    return build_database(tmp_path / "prefix", tmp_path / "app.db"), tmp_path / "data"
+
+
+def test_ingest_skips_items_of_orders_it_did_not_insert(prefix_db):
+    db_file, data_dir = prefix_db
+    with open(data_dir / "orderItems.csv", "a", newline="") as f:
+        csv.writer(f).writerow(["PZ001", 99999])
+    build_database(data_dir, db_file, incremental=True)
+    assert rows(db_file, "orderItems", "orderID")[-1][1] == 3000
+
+
+def test_failed_ingest_leaves_the_database_unchanged(prefix_db):
+    db_file, data_dir = prefix_db
+    before = {table: rows(db_file, table, order_by) for table, order_by in COMPARED.items()}
+    # Fails on the items, after the new orders are already in
+    with open(data_dir / "orderItems.csv", "a", newline="") as f:
+        csv.writer(f).writerow(["PZ999", 3000])
+    with pytest.raises(sqlite3.IntegrityError):
+        build_database(data_dir, db_file, incremental=True)
+    assert before == {table: rows(db_file, table, order_by) for table, order_by in COMPARED.items()}
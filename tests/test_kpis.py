@@ -0,0 +1,59 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+import kpis
+from src.data.kpis import build_store_kpis
+
+ORDERS = pd.DataFrame({
+    "customerID": ["C1", "C2", "C1", "C3", "C2"],
+    "storeID": ["S1", "S1", "S2", "S2", "S1"],
+    "orderDate": pd.to_datetime(["2021-01-01", "2021-01-02", "2021-01-05", "2021-01-08", "2021-01-10"]),
+    "nItems": [1, 2, 3, 1, 2],
+    "total": [10.0, 20.0, 30.0, 10.0, 25.0],
+})
+STORES = pd.DataFrame({"storeID": ["S1", "S2"], "state": ["California", "Nevada"], "state_abbr": ["CA", "NV"]})
+
+
+def test_compare_sums_both_periods():
+    current, previous = build_store_kpis(ORDERS, STORES).compare("2021-01-06", "2021-01-10")
+    assert current["orders"] == 2 and current["revenue"] == 35
+    assert previous["orders"] == 3 and previous["revenue"] == 60
+    assert previous["new_customers"] == 2
+
+
+def test_compare_has_no_previous_period_before_the_data():
+    store_kpis = build_store_kpis(ORDERS, STORES)
+    current, previous = store_kpis.compare("2021-01-03", "2021-01-10")
+    assert current["orders"] == 3
+    assert previous is None
+    assert store_kpis.compare("2021-01-02", "2021-01-02", store_id="S1")[1]["orders"] == 1
+
+
+def test_state_matches_name_and_abbreviation():
+    store_kpis = build_store_kpis(ORDERS, STORES)
+    assert store_kpis.totals(state="Nevada") == store_kpis.totals(state="NV")
+    assert store_kpis.totals(state="NV")["revenue"] == 40
+    assert store_kpis.totals(None, "2021-01-05", state="CA")["orders"] == 2
+
+
+def test_api_has_no_previous_period_before_the_first_order(api_client):
+    body = api_client.get("/api/kpis?from=2020-01-05&to=2020-01-20").get_json()
+    assert body["orders"] > 0
+    assert body["previous"] is None and body["growth"] is None
+    body = api_client.get("/api/kpis?from=2020-01-17&to=2020-02-01").get_json()
+    assert body["previous"]["from"] == "2020-01-01" and body["previous"]["to"] == "2020-01-16"
+
+
+def test_api_and_dashboard_compute_the_same_kpis(api_client, sample_db):
+    with sqlite3.connect(sample_db) as conn:
+        orders = pd.read_sql("SELECT * FROM orders", conn, parse_dates=["orderDate"])
+        stores = pd.read_sql("SELECT * FROM stores", conn)
+    dashboard = build_store_kpis(orders, stores)
+    api = kpis.get_store_kpis(object())
+    assert (dashboard.first_day, dashboard.last_day) == (api.first_day, api.last_day)
+    for args in [("2021-03-01", "2021-05-31"), ("2020-06-01", "2021-06-01", "S100002"),
+                 ("2021-01-01", "2021-12-31", None, "NV")]:
+        current, previous = dashboard.compare(*args)
+        assert api.compare(*args) == (pytest.approx(current), pytest.approx(previous))
@@ -0,0 +1,35 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+FREQUENCIES = {"day": "D", "week": "W-SUN", "month": "M"}
+
+
+def _expected_volatility(sample_db, bucket):
+    with sqlite3.connect(sample_db) as conn:
+        lines = pd.read_sql("SELECT SKU, day, orders FROM rollup_sku_day", conn, parse_dates=["day"])
+    periods = lines["day"].dt.to_period(FREQUENCIES[bucket])
+    last_day = lines["day"].max()
+    last = last_day.to_period(FREQUENCIES[bucket])
+    if last.end_time.normalize() != last_day:
+        last -= 1
+    counts = lines.groupby(["SKU", periods])["orders"].sum()
+    expected = {}
+    for sku, series in counts.groupby(level="SKU"):
+        series = series.droplevel("SKU")
+        full = series.reindex(pd.period_range(series.index.min(), last), fill_value=0)
+        expected[sku] = (len(full), full.mean(), full.std(ddof=0))
+    return expected
+
+
+@pytest.mark.parametrize("bucket", FREQUENCIES)
+def test_volatility_counts_empty_buckets_and_skips_the_open_one(api_client, sample_db, bucket):
+    rows = api_client.get(f"/api/orders/volatility?bucket={bucket}").get_json()
+    expected = _expected_volatility(sample_db, bucket)
+    assert {row["SKU"] for row in rows} == set(expected)
+    for row in rows:
+        n, mean, std = expected[row["SKU"]]
+        assert row["buckets"] == n
+        assert row["mean_orders"] == pytest.approx(mean, abs=1e-3)
+        assert row["std_orders"] == pytest.approx(std, abs=1e-3)
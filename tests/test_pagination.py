@@ -0,0 +1,98 @@
+import sqlite3
+
+import pytest
+
+import pagination
+
+PAGED_ENDPOINTS = [
+    "/api/customers",
+    "/api/customers/top",
+    "/api/customers/recurring",
+    "/api/stores/revenue_trend",
+    "/api/stores/product_sales",
+    "/api/geo/assignments/summary",
+    "/api/trends/alerts",
+]
+
+
+def _all_pages(client, url, limit):
+    rows, cursor, pages = [], None, 0
+    while True:
+        sep = "&" if "?" in url else "?"
+        page_url = f"{url}{sep}limit={limit}" + (f"&cursor={cursor}" if cursor else "")
+        response = client.get(page_url)
+        assert response.status_code == 200
+        page = response.get_json()
+        assert len(page) <= limit
+        rows.extend(page)
+        pages += 1
+        cursor = response.headers.get(pagination.NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return rows, pages
+
+
+@pytest.mark.parametrize("url", PAGED_ENDPOINTS)
+def test_pages_concatenate_to_the_full_result(api_client, url):
+    full = api_client.get(url)
+    assert full.status_code == 200
+    assert pagination.NEXT_CURSOR_HEADER not in full.headers
+    rows, pages = _all_pages(api_client, url, limit=7)
+    assert rows == full.get_json()
+    assert pages == max(1, -(-len(rows) // 7))
+
+
+@pytest.fixture
+def small_pages(api_client, monkeypatch):
+    monkeypatch.setitem(api_client.application.config, "DEFAULT_PAGE_SIZE", 10)
+    monkeypatch.setitem(api_client.application.config, "MAX_PAGE_SIZE", 20)
+
+
+def test_no_limit_returns_every_row(api_client, sample_db, small_pages):
+    with sqlite3.connect(sample_db) as conn:
+        expected = conn.execute("SELECT COUNT(*) FROM rollup_store_month").fetchone()[0]
+    assert expected > 20
+    response = api_client.get("/api/stores/revenue_trend")
+    assert len(response.get_json()) == expected
+    assert pagination.NEXT_CURSOR_HEADER not in response.headers
+
+
+def test_cursor_without_limit_uses_the_default_page_size(api_client, small_pages):
+    first = api_client.get("/api/stores/revenue_trend?limit=1")
+    cursor = first.headers[pagination.NEXT_CURSOR_HEADER]
+    assert len(api_client.get(f"/api/stores/revenue_trend?cursor={cursor}").get_json()) == 10
+    assert len(api_client.get("/api/stores/revenue_trend?limit=500").get_json()) == 20
+
+
+def test_mixed_direction_order_is_respected(api_client):
+    rows, _ = _all_pages(api_client, "/api/customers/top", limit=11)
+    keys = [(-row["order_count"], row["customerID"]) for row in rows]
+    assert keys == sorted(keys)
+    assert len({row["customerID"] for row in rows}) == len(rows)
+
+
+def test_materialized_query_runs_once_per_data_version(api_client, monkeypatch):
+    calls = []
+    query_db = pagination.query_db
+    monkeypatch.setattr(pagination, "query_db", lambda sql, args=(): calls.append(sql) or query_db(sql, args))
+    monkeypatch.setattr(pagination, "_materialized", pagination._Materialized())
+    _, pages = _all_pages(api_client, "/api/customers/avg_order", limit=50)
+    assert pages > 1
+    assert len(calls) == 1
+
+
+@pytest.mark.parametrize("url", ["/api/customers/top", "/api/customers/avg_order"])
+def test_unpaged_aggregates_stream_instead_of_materializing(api_client, monkeypatch, url):
+    materialized = pagination._Materialized()
+    monkeypatch.setattr(pagination, "_materialized", materialized)
+    full = api_client.get(url)
+    assert full.is_streamed
+    assert materialized._results == {}
+    rows, _ = _all_pages(api_client, url, limit=100)
+    assert len(materialized._results) == 1
+    assert rows == full.get_json()
+
+
+@pytest.mark.parametrize("query", ["limit=0", "limit=abc", "cursor=not-a-cursor", "cursor=WzFd"])
+def test_bad_paging_arguments_are_rejected(api_client, query):
+    assert api_client.get(f"/api/customers/top?{query}").status_code == 400
+    assert api_client.get(f"/api/stores/revenue_trend?{query}").status_code == 400
@@ -0,0 +1,65 @@
+import sqlite3
+
+import pytest
+
+import kpis
+import pagination
+from query_plans import endpoint_queries, explain_all
+from routes import geo, orders
+
+# Request -> endpoint of the plan report whose statements it must run
+SERVED = [
+    ("/api/customers/onetime", "/api/customers/onetime"),
+    ("/api/customers/top", "/api/customers/top"),
+    ("/api/customers/top?limit=5", "/api/customers/top"),
+    ("/api/stores/revenue_trend?limit=5", "/api/stores/revenue_trend"),
+    ("/api/stores/product_sales?store=S100001", "/api/stores/product_sales"),
+    ("/api/geo/assignments?store=S100002&limit=5", "/api/geo/assignments"),
+    ("/api/geo/assignments/summary", "/api/geo/assignments/summary"),
+    ("/api/geo/nearest_store?customer=C000001", "/api/geo/nearest_store"),
+    ("/api/trends/alerts?from=2021-01-01&limit=5", "/api/trends/alerts"),
+    ("/api/kpis?from=2021-01-01&to=2021-03-31&store=S100001", "/api/kpis"),
+    ("/api/orders/avg_items", "/api/orders/avg_items"),
+    ("/api/orders/volatility?bucket=month", "/api/orders/volatility"),
+]
+
+
+def test_every_statement_explains(sample_db, capsys):
+    with sqlite3.connect(sample_db) as conn:
+        explain_all(conn)
+    report = capsys.readouterr().out
+    for endpoint in ("/api/customers/onetime", "/api/geo/assignments", "/api/orders/basket"):
+        assert f"\n{endpoint}\n" in report
+
+
+@pytest.fixture
+def executed(api_client, monkeypatch):
+    """
+    SQL the endpoints hand to the database, bypassing the response cache and
+    the materialized results
+    """
+    statements = []
+
+    def recording(run):
+        return lambda sql, *args, **kwargs: statements.append(sql) or run(sql, *args, **kwargs)
+
+    for module in (pagination, geo, kpis, orders):
+        monkeypatch.setattr(module, "query_db", recording(module.query_db))
+    monkeypatch.setattr(pagination, "stream_db", recording(pagination.stream_db))
+    monkeypatch.setattr(pagination, "_materialized", pagination._Materialized())
+    monkeypatch.setattr(kpis, "_kpis", None)
+    api_client.application.extensions["response_cache"].sync_version(None)
+    return statements
+
+
+@pytest.mark.parametrize("url, endpoint", SERVED)
+def test_plan_report_covers_the_served_sql(api_client, executed, url, endpoint):
+    response = api_client.get(url)
+    assert response.status_code == 200
+    cursor = response.headers.get(pagination.NEXT_CURSOR_HEADER)
+    if cursor:
+        assert api_client.get(f"{url}&cursor={cursor}").status_code == 200
+    # A first page is the full result plus LIMIT; compare without it
+    planned = {sql.removesuffix(" LIMIT ?") for sql, _ in endpoint_queries()[endpoint]}
+    assert executed
+    assert {sql.removesuffix(" LIMIT ?") for sql in executed} <= planned
@@ -0,0 +1,50 @@
+import json
+import sqlite3
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+import shared.snapshot
+from snapshot import write_snapshot
+from src.data.data_loader import load_db_tables, load_tables
+
+
+@pytest.fixture
+def db_tables(sample_db):
+    return load_db_tables(sample_db)
+
+
+def test_snapshot_matches_app_db(sample_db, db_tables):
+    tables, version = load_tables(sample_db.parent / "snapshot", sample_db)
+    db, db_version = db_tables
+    assert version == db_version
+    for name, df in db.items():
+        pd.testing.assert_frame_equal(tables[name], df)
+    assert isinstance(tables["orders"]["storeID"].dtype, pd.CategoricalDtype)
+    assert tables["orders"]["orderDate"].dtype == "datetime64[ns]"
+
+
+def test_snapshot_is_streamed_in_batches(sample_db, db_tables, tmp_path, monkeypatch):
+    monkeypatch.setattr(shared.snapshot, "BATCH_ROWS", 1000)
+    with sqlite3.connect(sample_db) as conn:
+        counts = write_snapshot(conn, tmp_path, "v1")
+    with pa.memory_map(str(tmp_path / "orderitems.arrows")) as source:
+        batches = list(pa.ipc.open_stream(source))
+    assert len(batches) == -(-counts["orderitems"] // 1000) > 1
+    tables, version = load_tables(tmp_path, sample_db)
+    assert version == "v1"
+    for name, df in db_tables[0].items():
+        pd.testing.assert_frame_equal(tables[name], df)
+
+
+def test_incomplete_snapshot_falls_back_to_app_db(sample_db, db_tables, tmp_path):
+    (tmp_path / "meta.json").write_text(json.dumps({"data_version": "stale"}))
+    tables, version = load_tables(tmp_path, sample_db)
+    assert version == db_tables[1]
+    assert len(tables["orders"]) == len(db_tables[0]["orders"])
+
+
+def test_missing_data_fails_loudly(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        load_tables(tmp_path / "snapshot", tmp_path / "app.db")
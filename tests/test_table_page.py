@@ -0,0 +1,31 @@
+import pandas as pd
+
+from src.utils.table_page import table_page
+
+VALUES = pd.DataFrame({
+    "Kunde": [f"C{i:03d}" for i in range(25)],
+    "Ø Bestellwert": [float(i % 7) for i in range(25)],
+})
+
+
+def test_pages_are_slices_with_a_page_count():
+    rows, page_count = table_page(VALUES, 2, 10)
+    assert page_count == 3
+    assert [row["Kunde"] for row in rows] == ["C020", "C021", "C022", "C023", "C024"]
+    assert table_page(VALUES.iloc[:0], 0, 10) == ([], 1)
+
+
+def test_sort_applies_to_all_rows_before_paging():
+    rows, _ = table_page(VALUES, 0, 4, [{"column_id": "Ø Bestellwert", "direction": "desc"}])
+    assert [row["Kunde"] for row in rows] == ["C006", "C013", "C020", "C005"]
+
+
+def test_filter_query_conditions_are_combined():
+    query = '{Kunde} scontains C01 && {Ø Bestellwert} s>= 4'
+    rows, page_count = table_page(VALUES, 0, 10, filter_query=query)
+    assert [row["Kunde"] for row in rows] == ["C011", "C012", "C013", "C018", "C019"]
+    assert page_count == 1
+    assert len(table_page(VALUES, 0, 30, filter_query="{Ø Bestellwert} s= 3")[0]) == 4
+    assert len(table_page(VALUES, 0, 30, filter_query='{Kunde} icontains "c02"')[0]) == 5
+    # Unreadable conditions filter nothing, like the native table
+    assert len(table_page(VALUES, 0, 30, filter_query="{Ø Bestellwert} s> abc && {Name} s= 1")[0]) == 25
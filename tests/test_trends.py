@@ -0,0 +1,79 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import trends
+from shared.trends import TrendCube, detect_peaks, season_labels, seasonal_indices, yoy_growth
+from src.data.trends import build_trend_cube
+
+DAYS = np.arange(np.datetime64("2021-01-01"), np.datetime64("2023-01-01"))
+
+
+def test_yoy_growth_compares_the_same_calendar_days():
+    # 1 per day in 2021, 2 per day in 2022
+    values = np.where(DAYS < np.datetime64("2022-01-01"), 1.0, 2.0)[:, None]
+    window = slice(int(np.searchsorted(DAYS, np.datetime64("2021-12-01"))),
+                   int(np.searchsorted(DAYS, np.datetime64("2022-03-15"))))
+    months, current, previous, growth = yoy_growth(DAYS, values, window)
+    assert [str(m) for m in months] == ["2021-12", "2022-01", "2022-02", "2022-03"]
+    assert np.isnan(previous[0, 0]) and np.isnan(growth[0, 0])
+    assert current[1:, 0].tolist() == [62, 56, 28]
+    # The partial March is compared with 1-14 March 2021 only
+    assert previous[1:, 0].tolist() == [31, 28, 14]
+    assert np.allclose(growth[1:, 0], 1.0)
+
+
+def test_seasonal_indices_of_a_weekday_pattern():
+    weekday = season_labels(DAYS, "weekday")
+    assert weekday[0] == 4  # 1 January 2021 was a Friday
+    values = np.where(weekday == 5, 4.0, 1.0)[:, None]
+    indices, counts = seasonal_indices(DAYS, values, "weekday")
+    assert counts.sum() == len(DAYS)
+    overall = values.mean()
+    assert indices[5, 0] == pytest.approx(4 / overall)
+    assert np.allclose(np.delete(indices[:, 0], 5), 1 / overall)
+
+
+def test_detect_peaks_finds_the_spike():
+    rng = np.random.default_rng(0)
+    values = 100 + rng.normal(0, 5, 200)
+    values[150] = 200
+    idx, expected, z = detect_peaks(values, window=28, threshold=4)
+    assert idx.tolist() == [150]
+    assert expected[0] == pytest.approx(values[122:150].mean())
+    assert z[0] > 4
+    assert len(detect_peaks(values[:20], window=28)[0]) == 0
+
+
+def test_cube_counts_an_order_once_across_categories():
+    day = np.datetime64("2022-05-02")
+    cube = TrendCube(
+        ["Classic", "Vegetarian"], ["S1", "S2"], ["CA", "NV"], ["CA", "NV"],
+        {"day": [day, day, day], "Category": ["Classic", "Vegetarian", "Classic"],
+         "storeID": ["S1", "S1", "S9"], "revenue": [10.0, 5.0, 99.0], "orders": [1, 1, 1]},
+        {"day": [day, day + 2], "storeID": ["S1", "S2"], "orders": [1, 3]},
+    )
+    assert len(cube.days) == 3
+    values, labels = cube.series("orders")
+    assert labels == ["total"] and values[:, 0].tolist() == [1, 0, 3]
+    values, labels = cube.series("orders", "category")
+    assert labels == ["Classic", "Vegetarian"] and values[0].tolist() == [1, 1]
+    # The row of the unknown store S9 is dropped
+    assert cube.series("revenue")[0][:, 0].tolist() == [15, 0, 0]
+    assert cube.series("revenue", stores=cube.store_mask(state="NV"))[0].sum() == 0
+    assert cube.day_slice("2022-01-01", "2022-05-03") == slice(0, 2)
+
+
+def test_api_and_dashboard_build_the_same_cube(api_client, sample_db):
+    with sqlite3.connect(sample_db) as conn:
+        tables = {name: pd.read_sql(f"SELECT * FROM {name}", conn) for name in
+                  ("orders", "orderItems", "products", "stores")}
+    tables["orders"]["orderDate"] = pd.to_datetime(tables["orders"]["orderDate"])
+    dashboard = build_trend_cube(tables["orders"], tables["orderItems"], tables["products"], tables["stores"])
+    api = trends.get_cube(object())
+    assert dashboard.categories == api.categories and list(dashboard.store_ids) == api.store_ids
+    assert (dashboard.days == api.days).all()
+    for name in ("revenue", "orders", "store_orders"):
+        assert np.allclose(getattr(dashboard, name), getattr(api, name))